@@ -27,12 +27,15 @@ class AccountService:
         if cached:
             return cached
 
-        endpoint = "/exchange/v1/users/balances"
-        result = self.api_service.make_authenticated_request(endpoint,{})
+        result = self._fetch_balances()
         
         if user_id:
             cache_data(cache_key, result, ttl=300)  # Cache for 5 minutes
         return result
+
+    def _fetch_balances(self) -> List[Dict]:
+        endpoint = "/exchange/v1/users/balances"
+        return self.api_service.make_authenticated_request(endpoint, {})
     
     def display_portfolio(self) -> None:
         """
@@ -1,15 +1,25 @@
 # from api_service import CoinDCXApiService
 from main import load_credentials
 from api_service import CoinDCXApiService
+import indicators
 
-api_key, api_secret = load_credentials()
-coindcx = CoinDCXApiService(api_key, api_secret)
-# Initialize your CoinDCX API client
-# coindcx = CoinDCXApiService()
-
-# Fetch market data and balance data
-market_data = coindcx.get_ticker_data(symbol="BTCUSDT")
-balance_data = coindcx.get_balance()
+def closing_prices(market_data):
+    """
+    Closing prices, oldest first, from ticker dictionaries ('last_price'),
+    a candle DataFrame ('close') or a plain sequence of numbers.
+    """
+    if hasattr(market_data, "columns"):
+        return [float(p) for p in market_data["close"]]
+    if isinstance(market_data, dict):
+        market_data = [market_data]
+    prices = []
+    for item in market_data:
+        if isinstance(item, dict):
+            if item.get("last_price"):
+                prices.append(float(item["last_price"]))
+        else:
+            prices.append(float(item))
+    return prices
 
 # Define a simulated trading agent class with a name attribute
 class SimulatedTradingAgent:
@@ -21,22 +31,42 @@ class SimulatedTradingAgent:
 
     def analyze_market(self, market_data):
         """
-        Analyze market data for BTC/USDT. Assumes `market_data` is a list of dictionaries,
-        each with a 'last_price' key.
+        Analyze market data for BTC/USDT. `market_data` is a list of dictionaries
+        with a 'last_price' key (oldest first), a candle DataFrame with a 'close'
+        column, or a sequence of closing prices.
+
+        With at least 26 prices the trend comes from SMA(20), MACD(12, 26, 9)
+        and RSI(14); shorter histories fall back to comparing against the mean.
         """
         try:
-            # Extract prices from market data
-            prices = [float(item.get("last_price", 0)) for item in market_data if item.get("last_price")]
+            prices = closing_prices(market_data)
             if not prices:
                 return f"{self.name}: Insufficient data to analyze."
-            
-            avg_price = sum(prices) / len(prices)
-            current_price = prices[-1]
-            
-            if current_price > avg_price:
-                return f"{self.name}: Bullish trend detected – current price {current_price} is above average {avg_price:.2f}."
+
+            if len(prices) < 26:
+                avg_price = sum(prices) / len(prices)
+                current_price = prices[-1]
+                if current_price > avg_price:
+                    return f"{self.name}: Bullish trend detected – current price {current_price} is above average {avg_price:.2f}."
+                else:
+                    return f"{self.name}: Bearish trend detected – current price {current_price} is below average {avg_price:.2f}."
+
+            summary = indicators.trend_summary(prices)
+            detail = (f"price {summary['last']:.2f}, SMA20 {summary['sma_20']:.2f}, "
+                      f"MACD {summary['macd']:.4f} vs signal {summary['macd_signal']:.4f}, RSI14 {summary['rsi_14']:.1f}")
+            if summary["rsi_14"] >= 70:
+                detail += " (overbought)"
+            elif summary["rsi_14"] <= 30:
+                detail += " (oversold)"
+
+            above_average = summary["last"] > summary["sma_20"]
+            rising = summary["macd"] > summary["macd_signal"]
+            if above_average and rising:
+                return f"{self.name}: Bullish trend detected – {detail}."
+            elif not above_average and not rising:
+                return f"{self.name}: Bearish trend detected – {detail}."
             else:
-                return f"{self.name}: Bearish trend detected – current price {current_price} is below average {avg_price:.2f}."
+                return f"{self.name}: Mixed signals – {detail}."
         except Exception as e:
             return f"{self.name}: Error in market analysis: {str(e)}"
 
@@ -68,12 +98,28 @@ trade_agent = SimulatedTradingAgent(
     backstory="Veteran trading strategist."
 )
 
-# Execute agent functions to produce output
-market_analysis = market_agent.analyze_market(market_data)
-trade_recommendation = trade_agent.advise_trade(market_analysis, balance_data)
 
-# Print out the results
-print("Market Analysis:")
-print(market_analysis)
-print("\nTrade Recommendation:")
-print(trade_recommendation)
+def main():
+    api_key, api_secret = load_credentials()
+    coindcx = CoinDCXApiService(api_key, api_secret)
+    # Initialize your CoinDCX API client
+    # coindcx = CoinDCXApiService()
+
+    # Fetch market data and balance data
+    market_data = coindcx.get_ticker_data(symbol="BTCUSDT")
+    balance_data = coindcx.get_balance()
+
+    # Execute agent functions to produce output
+    market_analysis = market_agent.analyze_market(market_data)
+    trade_recommendation = trade_agent.advise_trade(market_analysis, balance_data)
+
+    # Print out the results
+    print("Market Analysis:")
+    print(market_analysis)
+    print("\nTrade Recommendation:")
+    print(trade_recommendation)
+
+
+# Importing the module (as app.py does) must not call the API
+if __name__ == "__main__":
+    main()
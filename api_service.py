@@ -1,59 +1,170 @@
-import json
 import time
-import hmac
-import hashlib
-import requests
+import metrics
 from typing import Dict, Optional
 from dotenv import load_dotenv
 import os
 
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from transport import HttpTransport, get_default_transport
+from rate_limiter import RequestScheduler, get_default_scheduler
+from signing import RequestSigner
+from singleflight import SingleFlight, get_default_single_flight
+from resilience import PublicRequestGuard, get_default_guard
+
+class ApiRequestError(Exception):
+    """
+    Raised when CoinDCX answers a request with a non-success status.
+    """
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"Request failed with status {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+def is_ambiguous_error(error: Exception) -> bool:
+    """
+    True if a failed request may still have been carried out by the exchange:
+    a 5xx (or 408) answer, a read timeout, or a connection lost after the
+    request went out. Errors raised before anything was sent (connection
+    refused, connect timeout, local checks) and other answers are not.
+    """
+    if isinstance(error, ApiRequestError):
+        return error.status_code >= 500 or error.status_code == 408
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return False
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return not isinstance(reason, NewConnectionError)
+    return isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError))
+
 class CoinDCXApiService:
     """
     Service for handling API communication with CoinDCX.
     """
     
     BASE_URL = "https://api.coindcx.com"
+    # Times a request rejected with 429 is re-queued behind the scheduler's backoff
+    RATE_LIMIT_RETRIES = 3
+    # Pause before the second retry when the server sends no Retry-After, doubled for each further one
+    RATE_LIMIT_BACKOFF = 0.25
 
     # def __init__(self, api_key: str, api_secret: str):
     #     self.api_key = api_key
     #     self.api_secret = api_secret
     #     self.base_url = self.BASE_URL
-    def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        transport: Optional[HttpTransport] = None,
+        base_url: Optional[str] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        signer: Optional[RequestSigner] = None,
+        single_flight: Optional[SingleFlight] = None,
+        guard: Optional[PublicRequestGuard] = None,
+    ):
         load_dotenv()  # Load environment variables from .env file
         self.api_key = api_key or os.getenv("COINDCX_API_KEY")
         self.api_secret = api_secret or os.getenv("COINDCX_API_SECRET")
-        self.base_url = "https://api.coindcx.com"
+        # COINDCX_BASE_URL points the client at another host (e.g. mock_exchange.py)
+        self.base_url = (base_url or os.getenv("COINDCX_BASE_URL") or self.BASE_URL).rstrip("/")
+        # Pooled keep-alive connections, shared with every service built on this instance
+        self.transport = transport or get_default_transport()
+        # Client-side rate limiting, order create/cancel first
+        self.scheduler = scheduler or get_default_scheduler()
+        # HMAC key schedule computed once; public-only instances have no secret
+        self.signer = signer or (RequestSigner(self.api_secret) if self.api_secret else None)
+        # Coalesces identical public GETs across every session in the process
+        self.single_flight = single_flight or get_default_single_flight()
+        # Circuit breakers (and optional hedging) on public market data
+        self.guard = guard or get_default_guard()
+        # The process-wide scheduler, coalescer and guard register their metrics
+        # collectors when created; injected instances are not exported
 
-    def make_authenticated_request(self, endpoint: str, body: dict = None) -> Dict:
+    def _send(self, method: str, endpoint: str, authenticated: bool, send):
         """
-        Make an authenticated POST request to the CoinDCX API.
+        Run `send` once the scheduler grants a slot for the endpoint's rate-limit group,
+        recording latency, status, payload sizes and retries.
+
+        A 429 pauses the group (for Retry-After, if given, else one token
+        interval and then exponentially longer) and the request waits for a
+        new slot and is sent again, up to RATE_LIMIT_RETRIES times. A 429 means the request was not executed, so this is safe for
+        POSTs too; `send` re-signs with a fresh timestamp each time.
         """
-        timestamp = int(round(time.time() * 1000))
-        body = body or {}
-        payload = {
-            "timestamp": timestamp,
-            **body
-        }
+        group = self.scheduler.classify(endpoint, authenticated)
+        for attempt in range(self.RATE_LIMIT_RETRIES + 1):
+            with self.scheduler.slot(group):
+                start = time.perf_counter()
+                try:
+                    response = send()
+                except Exception:
+                    metrics.HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, endpoint=endpoint, method=method, status="error")
+                    raise
+                metrics.HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, endpoint=endpoint, method=method, status=response.status_code)
+
+            self._record_sizes(method, endpoint, response)
+
+            if response.status_code != 429:
+                return response
+            retry_after = response.headers.get("Retry-After")
+            try:
+                retry_after = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after = None
+            if retry_after is None and attempt:
+                retry_after = self.RATE_LIMIT_BACKOFF * 2 ** (attempt - 1)
+            if self.scheduler.on_rate_limited(group, retry_after) is None:
+                break  # pacing disabled: nothing would hold the retry back
+        return response
 
-        json_body = json.dumps(payload, separators=(',', ':'))
+    @staticmethod
+    def _record_sizes(method: str, endpoint: str, response) -> None:
+        request_body = response.request.body if response.request is not None else None
+        metrics.HTTP_REQUEST_SIZE.observe(len(request_body or b""), endpoint=endpoint, method=method)
+        metrics.HTTP_RESPONSE_SIZE.observe(len(response.content), endpoint=endpoint, method=method)
 
-        signature = hmac.new(
-            self.api_secret.encode('utf-8'),
-            msg=json_body.encode('utf-8'),
-            digestmod=hashlib.sha256
-        ).hexdigest()
+        retries = getattr(response.raw, "retries", None)
+        if retries is not None and retries.history:
+            metrics.HTTP_RETRIES.inc(len(retries.history), endpoint=endpoint, method=method)
 
-        headers = {
-            'Content-Type': 'application/json',
-            'X-AUTH-APIKEY': self.api_key,
-            'X-AUTH-SIGNATURE': signature
-        }
+    def _signed_post(self, endpoint: str, body: dict = None):
+        """
+        Timestamp, serialize, sign and POST a body. The signed bytes are the bytes sent.
+        """
+        if self.signer is None:
+            raise ValueError("API secret is required for authenticated requests")
 
         url = f"{self.base_url}{endpoint}"
-        response = requests.post(url, headers=headers, data=json_body)
+        body = body or {}
+
+        def send():
+            # Timestamp and sign only once a slot is granted, so queueing can't stale the signature
+            payload = {
+                "timestamp": int(round(time.time() * 1000)),
+                **body
+            }
+            json_body, signature = self.signer.sign_payload(payload)
+
+            headers = {
+                'Content-Type': 'application/json',
+                'X-AUTH-APIKEY': self.api_key,
+                'X-AUTH-SIGNATURE': signature
+            }
+            return self.transport.post(url, headers=headers, data=json_body)
+
+        return self._send("POST", endpoint, True, send)
+
+    def make_authenticated_request(self, endpoint: str, body: dict = None) -> Dict:
+        """
+        Make an authenticated POST request to the CoinDCX API.
+        """
+        response = self._signed_post(endpoint, body)
 
         if not response.ok:
-            raise Exception(f"Request failed with status {response.status_code}: {response.text}")
+            raise ApiRequestError(response.status_code, response.text)
 
         return response.json()
     
@@ -61,31 +172,16 @@ class CoinDCXApiService:
         """
         Sign the payload with HMAC SHA256 using your API secret.
         """
-        # Serialize payload without spaces for consistency
-        payload_str = json.dumps(payload, separators=(',', ':'))
-        signature = hmac.new(
-            self.api_secret.encode('utf-8'),
-            msg=payload_str.encode('utf-8'),
-            digestmod=hashlib.sha256
-        ).hexdigest()
-        return signature
+        return self.signer.sign_payload(payload)[1]
+
     def get_balance(self):
         """
         Example method to fetch the user's account balance.
         You may need to adjust the endpoint and payload according to
         CoinDCX API documentation.
         """
-        url = self.base_url + "/exchange/v1/users/balances"  # Adjust endpoint if needed.
-        payload = {
-            "timestamp": int(round(time.time() * 1000))
-        }
-        signature = self._sign_payload(payload)
-        headers = {
-            "X-AUTH-APIKEY": self.api_key,
-            "X-AUTH-SIGNATURE": signature,
-            "Content-Type": "application/json"
-        }
-        response = requests.post(url, data=json.dumps(payload), headers=headers)
+        endpoint = "/exchange/v1/users/balances"  # Adjust endpoint if needed.
+        response = self._signed_post(endpoint)
         return response.json()
     
     def get_ticker_data(self, symbol):
@@ -94,23 +190,40 @@ class CoinDCXApiService:
         Fetch ticker data for a given symbol from CoinDCX.
         Adjust endpoint and filtering logic as per the CoinDCX API documentation.
         """
-            url = f"{self.base_url}/exchange/ticker"
-            response = requests.get(url)
-            data = response.json()
+            data = self.make_public_request("/exchange/ticker")
         # Assuming data is a list of dictionaries and each has a 'market' field:
             return [item for item in data if item.get("market") == symbol]
 
     def make_public_request(self, endpoint: str, method: str = "GET", params: Optional[Dict] = None) -> Dict:
+        """
+        Make an unauthenticated request to the CoinDCX API.
+        
+        Concurrent identical GETs share one in-flight request, and its parsed
+        result is reused for the single-flight freshness window. The result is
+        shared between callers, so treat it as read-only.
+        
+        GETs run behind the endpoint's circuit breaker: while it is open the
+        last good response for the same request is returned (or
+        CircuitOpenError raised if there is none).
+        """
+        if method.upper() == "GET":
+            key = (self.base_url, endpoint, tuple(sorted((params or {}).items())))
+            snapshot_key = self.guard.snapshot_key(endpoint, params, self.base_url)
+            fetch = lambda: self._public_request(endpoint, "GET", params)
+            return self.single_flight.do(key, lambda: self.guard.call(endpoint, snapshot_key, fetch))
+        return self._public_request(endpoint, method, params)
+
+    def _public_request(self, endpoint: str, method: str, params: Optional[Dict]) -> Dict:
         url = f"{self.base_url}{endpoint}"
 
         if method.upper() == "GET":
-            response = requests.get(url, params=params)
+            response = self._send("GET", endpoint, False, lambda: self.transport.get(url, params=params))
         elif method.upper() == "POST":
-            response = requests.post(url, json=params if params else {})
+            response = self._send("POST", endpoint, False, lambda: self.transport.post(url, json=params if params else {}))
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
         
         if response.status_code == 200:
             return response.json()
         else:
-            raise Exception(f"Request failed with status {response.status_code}: {response.text}")
+            raise ApiRequestError(response.status_code, response.text)
\ No newline at end of file
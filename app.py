@@ -5,12 +5,19 @@ import faiss
 import os
 from sentence_transformers import SentenceTransformer
 import uuid
+import time
 from redis_cache import cache_data, get_cached_data, redis_client
 import sys
 import torch
 import pandas as pd
 from api_service import CoinDCXApiService  # Importing the CoinDCX API service
 from ai_agents import SimulatedTradingAgent  # Importing the LLM-based analysis function
+from metrics import start_metrics_server
+from market_stream import MarketStream, feed_from_url
+from candle_engine import get_default_candle_engine
+from tick_store import TickStore
+from order_manager import OrderManager
+from risk_engine import RiskEngine
 
 # Remove torch from module watcher
 sys.modules['torch'].__path__ = []
@@ -18,12 +25,66 @@ sys.modules['torch'].__path__ = []
 # Load credentials
 api_key, api_secret = load_credentials()
 
+# Optional Prometheus endpoint, e.g. COINDCX_METRICS_PORT=9108 (started once per process)
+@st.cache_resource
+def _start_metrics_server(port):
+    return start_metrics_server(port)
+
+if os.getenv("COINDCX_METRICS_PORT"):
+    _start_metrics_server(int(os.getenv("COINDCX_METRICS_PORT")))
+
 # Initialize CoinDCX API client
 coindcx = CoinDCXApiService(api_key, api_secret)
 
 # Initialize Trading App
 app = TradingApp(api_key, api_secret)
 
+# Optional tick history on disk, e.g. COINDCX_TICK_STORE=tick_data (one writer per process)
+@st.cache_resource
+def _start_tick_store(root):
+    return TickStore(root).start()
+
+if os.getenv("COINDCX_TICK_STORE"):
+    app.market_service.set_tick_store(_start_tick_store(os.getenv("COINDCX_TICK_STORE")))
+
+# Optional streaming market data, shared by all sessions (started once per process)
+@st.cache_resource
+def _start_market_stream(url):
+    stream = MarketStream(feed_from_url(url), seed=app.market_service._get_rest_ticker_data)
+    if app.market_service.tick_store is not None:
+        app.market_service.tick_store.attach(stream)
+    return stream.start()
+
+# Candles shared by all sessions, fed by the live trade stream when streaming
+@st.cache_resource
+def _candle_engine(_stream=None):
+    engine = get_default_candle_engine()
+    if _stream is not None:
+        engine.attach(_stream)
+    return engine
+
+if os.getenv("COINDCX_STREAM") or os.getenv("COINDCX_STREAM_URL"):
+    app.market_service.stream = _start_market_stream(os.getenv("COINDCX_STREAM_URL"))
+candle_engine = _candle_engine(app.market_service.stream)
+
+# Optional local order table from the private order stream, e.g. COINDCX_ORDER_STREAM=1
+# (one connection per process; every session reads active orders from it)
+@st.cache_resource
+def _start_order_manager():
+    return OrderManager(app.order_service).start()
+
+if os.getenv("COINDCX_ORDER_STREAM"):
+    app.order_service.order_manager = _start_order_manager()
+
+# Optional pre-trade risk checks, e.g. COINDCX_RISK_ENGINE=1
+# (one balance and exposure model per process, shared by every session)
+@st.cache_resource
+def _risk_engine():
+    return RiskEngine(app.account_service, app.market_service, app.order_service)
+
+if os.getenv("COINDCX_RISK_ENGINE"):
+    app.order_service.risk_engine = _risk_engine()
+
 # Streamlit page config
 st.set_page_config(page_title="CoinDCX Trading Platform", layout="centered")
 st.title("🪙 CoinDCX Trading Platform")
@@ -116,18 +177,14 @@ else:
                 else:
                     st.markdown("### 🔍 Filtered Market Overview")
 
-                    # Convert numeric columns
-                    numeric_cols = ["Last Price", "High", "Low", "Volume"]
-                    for col in numeric_cols:
-                        df[col] = pd.to_numeric(df[col], errors='coerce')  # handle any bad data
-
+                    # Numeric columns come typed (float64) from the shared ticker snapshot
                     st.dataframe(
                         df.style.format({
                             "Last Price": "{:.6f}",
                             "High": "{:.6f}",
                             "Low": "{:.6f}",
                             "Volume": "{:.4f}",
-                            "Change %": "{}"
+                            "Change %": "{:.2f}"
                         }),
                         use_container_width=True
                     )
@@ -256,23 +313,46 @@ else:
         st.subheader("❌ Cancel Order")
         try:
             active_orders = app.order_service.get_active_orders(user_id=st.session_state["user_id"])
+            if isinstance(active_orders, dict):
+                active_orders = active_orders.get("orders", [])
             if not active_orders:
                 st.info("No active orders to cancel.")
             else:
                 orders_df = pd.DataFrame(active_orders)
                 st.dataframe(orders_df, use_container_width=True)
 
-                order_id = st.text_input("Enter Order ID to cancel:")
-                cancel_button = st.button("Cancel Order")
-                
-                if cancel_button and order_id:
-                    try:
-                        response = app.order_service.cancel_order(order_id, user_id=st.session_state["user_id"])
-                        st.success(f"✅ Order {order_id} canceled successfully! Response: {response}")
-                    except Exception as e:
-                        st.error(f"Error canceling order: {e}")
-                elif cancel_button and not order_id:
-                    st.warning("Please enter an Order ID to cancel.")
+                labels = {
+                    o["id"]: f"{o.get('market')} {o.get('side')} {o.get('total_quantity')} @ {o.get('price_per_unit')} ({o['id']})"
+                    for o in active_orders
+                }
+                selected = st.multiselect("Orders to cancel", list(labels), format_func=labels.get)
+                cancel_selected = st.button("Cancel Selected")
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    market = st.selectbox("Market", ["All markets"] + sorted({o.get("market") for o in active_orders}))
+                with col2:
+                    side = st.selectbox("Side", ["Both", "buy", "sell"])
+                cancel_matching = st.button("Cancel All Matching")
+
+                results = None
+                start = time.perf_counter()
+                if cancel_selected and selected:
+                    results = app.order_service.cancel_orders(selected)
+                elif cancel_selected:
+                    st.warning("Please select at least one order to cancel.")
+                elif cancel_matching:
+                    results = app.order_service.cancel_all(
+                        None if market == "All markets" else market, None if side == "Both" else side
+                    )
+
+                if results is not None:
+                    elapsed = time.perf_counter() - start
+                    failed = [r for r in results if not r["ok"]]
+                    st.success(f"✅ Canceled {len(results) - len(failed)} of {len(results)} orders in {elapsed * 1000:.0f} ms")
+                    if failed:
+                        st.error(f"{len(failed)} orders could not be canceled")
+                        st.dataframe(pd.DataFrame(failed), use_container_width=True)
         except Exception as e:
             st.error(f"Error fetching active orders: {e}")
 
@@ -280,7 +360,19 @@ else:
     elif menu == "View Order History":
         st.subheader("📜 Order History")
         try:
-            order_history = app.order_service.get_order_history(user_id=st.session_state["user_id"])
+            # Filters are range scans on the local ledger; only new trades are fetched
+            app.order_service.sync_order_history()
+            markets = app.order_service.ledger.markets()
+            history_market = st.selectbox("Market", ["All"] + markets)
+            days = st.number_input("Last N days (0 = all)", min_value=0, value=30, step=1)
+            max_rows = st.number_input("Max rows", min_value=10, value=500, step=100)
+            start = int((time.time() - days * 86400) * 1000) if days else None
+            order_history = app.order_service.get_order_history(
+                user_id=st.session_state["user_id"],
+                market=None if history_market == "All" else history_market,
+                start=start,
+                limit=int(max_rows),
+            )
             if not order_history:
                 st.info("No order history available.")
             else:
@@ -289,53 +381,30 @@ else:
         except Exception as e:
             st.error(f"Error fetching order history: {e}")
 
+        with st.expander("Orders you placed"):
+            try:
+                page = st.number_input("Page", min_value=1, value=1, step=1) - 1
+                placed = app.order_service.get_placed_orders(st.session_state["user_id"], page=page, page_size=50)
+                if not placed:
+                    st.info("No orders on this page.")
+                else:
+                    st.dataframe(pd.DataFrame(placed), use_container_width=True)
+            except Exception as e:
+                st.error(f"Error fetching placed orders: {e}")
+
 # 6. Agent Analysis
     elif menu == "Agent Analysis":
         st.subheader("🤖 Agent Analysis")
         try:
             # Get market for analysis
             market = st.text_input("Market to analyze (e.g., BTCUSDT)", "BTCUSDT")
-            timeframe = st.selectbox("Timeframe", ["1h", "4h", "1d", "1w"])
+            timeframe = st.selectbox("Timeframe", ["1m", "5m", "1h", "1d"])
             
             if st.button("Run Analysis"):
                 # Placeholder for calling the analysis service
                 st.info("Running market analysis...")
                 
-                # Initialize simulated agents
-                class SimulatedTradingAgent:
-                    def __init__(self, name, role, goal, backstory):
-                        self.name = name
-                        self.role = role
-                        self.goal = goal
-                        self.backstory = backstory
-
-                    def analyze_market(self, market_data):
-                        """Analyze market data for BTC/USDT. Assumes `market_data` is a list of dictionaries."""
-                        try:
-                            prices = [float(item.get("last_price", 0)) for item in market_data if item.get("last_price")]
-                            if not prices:
-                                return f"{self.name}: Insufficient data to analyze."
-                            
-                            avg_price = sum(prices) / len(prices)
-                            current_price = prices[-1]
-                            
-                            if current_price > avg_price:
-                                return f"{self.name}: Bullish trend detected – current price {current_price} is above average {avg_price:.2f}."
-                            else:
-                                return f"{self.name}: Bearish trend detected – current price {current_price} is below average {avg_price:.2f}."
-                        except Exception as e:
-                            return f"{self.name}: Error in market analysis: {str(e)}"
-
-                    def advise_trade(self, market_analysis, balance_data):
-                        """Advise trades based on market trends."""
-                        if "Bullish" in market_analysis:
-                            return f"{self.name}: Advice - Consider buying."
-                        elif "Bearish" in market_analysis:
-                            return f"{self.name}: Advice - Consider selling."
-                        else:
-                            return f"{self.name}: Advice - Hold your current positions."
-
-                # Create agent instances
+                # Agents from ai_agents.py (shared analysis logic)
                 market_agent = SimulatedTradingAgent(
                     name="Crypto Analyst Alpha",
                     role="Market Analyst",
@@ -350,13 +419,10 @@ else:
                     backstory="Experienced in managing portfolios and advising trades."
                 )
 
-                # Example market data for analysis
-                market_data = [
-                    {"symbol": "BTCUSDT", "last_price": 60000},
-                    {"symbol": "BTCUSDT", "last_price": 61000},
-                    {"symbol": "BTCUSDT", "last_price": 59500},
-                    {"symbol": "BTCUSDT", "last_price": 63000},
-                ]
+                # Candles built from recent trades (and the live stream, if enabled)
+                candle_engine.add_trades(market, app.market_service.get_trade_history(market, limit=5000))
+                candles = candle_engine.dataframe(market, timeframe, 200)
+                market_data = [{"symbol": market, "last_price": close} for close in candles["close"]]
 
                 # Perform analysis using the agents
                 market_analysis = market_agent.analyze_market(market_data)
@@ -373,9 +439,11 @@ else:
                 st.write("Support levels: $40,000, $38,500")
                 st.write("Resistance levels: $42,000, $44,000")
                 
-                # You could also display charts
-                st.subheader("Market Chart")
-                st.line_chart({"price": [41000, 41200, 41500, 41300, 41600, 41800, 42000]})
+                st.subheader(f"Market Chart ({timeframe} closes)")
+                if candles.empty:
+                    st.info("No trades available for this market yet.")
+                else:
+                    st.line_chart(candles["close"])
                 
                 # And recommendations
                 st.subheader("Recommendations")
@@ -0,0 +1,247 @@
+# async_api_service.py
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from api_service import CoinDCXApiService
+
+
+class AsyncCoinDCXApiService:
+    """
+    Asyncio twin of CoinDCXApiService.
+
+    Every call goes through the same CoinDCXApiService code path (signing,
+    pooled transport, error handling), executed on a bounded worker pool so
+    dozens of requests can be awaited together with asyncio.gather.
+    The timestamp of signed requests is taken when the request is actually
+    sent, not when it was scheduled.
+    """
+
+    def __init__(
+        self,
+        api_service: Optional[CoinDCXApiService] = None,
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        """
+        Initialize the async API service.
+
+        Args:
+            api_service: CoinDCXApiService to wrap (created from the credentials if omitted)
+            api_key: CoinDCX API key, used only when api_service is omitted
+            api_secret: CoinDCX API secret, used only when api_service is omitted
+            max_concurrency: Maximum requests in flight (defaults to the connection pool size)
+        """
+        self.api_service = api_service or CoinDCXApiService(api_key, api_secret)
+        self.max_concurrency = max_concurrency or self.api_service.transport.pool_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="coindcx-async",
+        )
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run a blocking call on the request worker pool and await its result.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def make_authenticated_request(self, endpoint: str, body: dict = None) -> Dict:
+        """
+        Make an authenticated POST request to the CoinDCX API.
+        """
+        return await self.run(self.api_service.make_authenticated_request, endpoint, body)
+
+    async def make_public_request(self, endpoint: str, method: str = "GET", params: Optional[Dict] = None) -> Dict:
+        """
+        Make an unauthenticated request to the CoinDCX API.
+        """
+        return await self.run(self.api_service.make_public_request, endpoint, method, params)
+
+    async def get_balance(self):
+        return await self.run(self.api_service.get_balance)
+
+    async def get_ticker_data(self, symbol):
+        return await self.run(self.api_service.get_ticker_data, symbol)
+
+    def close(self) -> None:
+        """
+        Shut down the worker pool. The underlying transport is left open.
+        """
+        self._executor.shutdown(wait=False)
+
+
+class _AsyncServiceWrapper:
+    """
+    Exposes the methods of a sync service as coroutines run on the shared pool.
+    """
+
+    def __init__(self, service, async_api: AsyncCoinDCXApiService):
+        self.service = service
+        self.async_api = async_api
+
+    async def _call(self, name: str, *args, **kwargs):
+        return await self.async_api.run(getattr(self.service, name), *args, **kwargs)
+
+
+async def _gather_by_key(coros: Dict[str, "asyncio.Future"]) -> Dict:
+    """
+    Await a dict of coroutines concurrently. Failed entries map to None.
+    """
+    keys = list(coros)
+    results = await asyncio.gather(*coros.values(), return_exceptions=True)
+
+    gathered = {}
+    for key, result in zip(keys, results):
+        if isinstance(result, Exception):
+            print(f"[ERROR] Request for {key} failed: {result}")
+            result = None
+        gathered[key] = result
+    return gathered
+
+
+class AsyncMarketService(_AsyncServiceWrapper):
+    """
+    Async version of MarketService with multi-market fan-out helpers.
+    """
+
+    async def get_market_data(self) -> List[Dict]:
+        return await self._call("get_market_data")
+
+    async def get_ticker_data(self) -> Dict:
+        return await self._call("get_ticker_data")
+
+    async def get_ticker_dataframe(self, filter_market=""):
+        return await self._call("get_ticker_dataframe", filter_market)
+
+    async def get_order_book(self, market: str) -> Dict:
+        return await self._call("get_order_book", market)
+
+    async def get_trade_history(self, market: str) -> List[Dict]:
+        return await self._call("get_trade_history", market)
+
+    async def get_order_books(self, markets: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Fetch the order books of many markets concurrently.
+
+        Args:
+            markets: Market identifiers (e.g., ["BTCINR", "ETHINR"])
+
+        Returns:
+            Dictionary of market -> order book (None if that market failed)
+        """
+        return await _gather_by_key({market: self.get_order_book(market) for market in markets})
+
+    async def get_trade_histories(self, markets: Iterable[str]) -> Dict[str, List[Dict]]:
+        """
+        Fetch recent trades of many markets concurrently.
+
+        Args:
+            markets: Market identifiers (e.g., ["BTCINR", "ETHINR"])
+
+        Returns:
+            Dictionary of market -> trades (None if that market failed)
+        """
+        return await _gather_by_key({market: self.get_trade_history(market) for market in markets})
+
+
+class AsyncAccountService(_AsyncServiceWrapper):
+    """
+    Async version of AccountService.
+    """
+
+    async def get_account_balance(self, user_id=None):
+        return await self._call("get_account_balance", user_id)
+
+    async def get_deposit_history(self) -> List[Dict]:
+        return await self._call("get_deposit_history")
+
+    async def get_withdrawal_history(self) -> List[Dict]:
+        return await self._call("get_withdrawal_history")
+
+
+class AsyncOrderService(_AsyncServiceWrapper):
+    """
+    Async version of OrderService.
+    """
+
+    async def place_limit_order(self, market: str, side: str, price: float, quantity: float, user_id=None) -> Dict:
+        return await self._call("place_limit_order", market, side, price, quantity, user_id=user_id)
+
+    async def place_market_order(self, market: str, side: str, quantity: float, user_id=None) -> Dict:
+        return await self._call("place_market_order", market, side, quantity, user_id=user_id)
+
+    async def cancel_order(self, order_id: str, user_id=None) -> Dict:
+        return await self._call("cancel_order", order_id, user_id=user_id)
+
+    async def cancel_orders(self, order_ids: List[str]) -> List[Dict]:
+        return await self._call("cancel_orders", order_ids)
+
+    async def cancel_all(self, market: str = None, side: str = None) -> List[Dict]:
+        return await self._call("cancel_all", market, side)
+
+    async def get_active_orders(self, user_id=None):
+        return await self._call("get_active_orders", user_id)
+
+    async def get_order_status(self, order_id: str) -> Dict:
+        return await self._call("get_order_status", order_id)
+
+    async def get_order_history(self, user_id=None, market: str = None, start: int = None, end: int = None,
+                                limit: int = None) -> List[Dict]:
+        return await self._call("get_order_history", user_id, market=market, start=start, end=end, limit=limit)
+
+    async def get_order_statuses(self, order_ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Fetch the status of many orders concurrently.
+
+        Returns:
+            Dictionary of order id -> status (None if that lookup failed)
+        """
+        return await _gather_by_key({order_id: self.get_order_status(order_id) for order_id in order_ids})
+
+
+class AsyncTradingApp:
+    """
+    Async facade over a TradingApp's services, sharing its connection pool.
+    """
+
+    def __init__(self, app, max_concurrency: Optional[int] = None):
+        """
+        Args:
+            app: A TradingApp instance
+            max_concurrency: Maximum requests in flight (defaults to the connection pool size)
+        """
+        self.api_service = AsyncCoinDCXApiService(app.api_service, max_concurrency=max_concurrency)
+        self.market_service = AsyncMarketService(app.market_service, self.api_service)
+        self.account_service = AsyncAccountService(app.account_service, self.api_service)
+        self.order_service = AsyncOrderService(app.order_service, self.api_service)
+
+    async def refresh(self, markets: Iterable[str] = (), user_id=None) -> Dict:
+        """
+        Refresh the portfolio and scan markets in a single concurrent round.
+
+        Args:
+            markets: Markets whose order books should be fetched
+            user_id: User identifier used for caching
+
+        Returns:
+            Dictionary with balances, active_orders, order_history and order_books
+        """
+        markets = list(markets)
+        balances, active_orders, order_history, order_books = await asyncio.gather(
+            self.account_service.get_account_balance(user_id),
+            self.order_service.get_active_orders(user_id),
+            self.order_service.get_order_history(user_id),
+            self.market_service.get_order_books(markets),
+        )
+        return {
+            "balances": balances,
+            "active_orders": active_orders,
+            "order_history": order_history,
+            "order_books": order_books,
+        }
+
+    def close(self) -> None:
+        self.api_service.close()
@@ -0,0 +1,75 @@
+# benchmark_bulk_cancel.py
+"""
+Times pulling many resting orders off the mock exchange:
+
+1. Sequential loop of single cancels (what the Cancel Order page did).
+2. Concurrent single cancels (the bulk fallback).
+3. cancel_orders: cancel_by_ids in chunks.
+4. cancel_all for one market.
+
+Each run places fresh orders first. Runs once with client-side pacing
+disabled and once with the default RequestScheduler, which allows 30
+order requests per second.
+
+Usage:
+    python benchmark_bulk_cancel.py [--orders 300] [--latency-ms 20]
+"""
+import argparse
+import time
+
+from api_service import CoinDCXApiService
+from market_metadata import MarketMetadataCache
+from mock_exchange import MockExchangeConfig, start_mock_exchange
+from order_ledger import OrderLedger
+from order_service import OrderService
+from rate_limiter import RequestScheduler
+from singleflight import SingleFlight
+from transport import HttpTransport
+
+
+def make_service(base_url, scheduler):
+    api = CoinDCXApiService("mock-key", "mock-secret", transport=HttpTransport(pool_size=16), base_url=base_url,
+                            scheduler=scheduler, single_flight=SingleFlight(ttl=0))
+    return OrderService(api, market_metadata=MarketMetadataCache(), ledger=OrderLedger(":memory:"))
+
+
+def place(service, count):
+    specs = [{"market": "BTCINR", "side": "buy", "quantity": 0.001, "price": 5000000 - i} for i in range(count)]
+    return [r["order"]["id"] for r in service.place_orders_batch(specs, max_workers=8) if r["ok"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    server, exchange = start_mock_exchange(MockExchangeConfig(latency_ms=args.latency_ms))
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    placer = make_service(base_url, RequestScheduler.unlimited())
+
+    print(f"{args.orders} resting orders, {args.latency_ms:.0f} ms server latency")
+    for label, scheduler in (("no pacing", RequestScheduler.unlimited()), ("default pacing", None)):
+        service = make_service(base_url, scheduler)
+        cases = [
+            ("sequential loop", lambda ids: [service.cancel_order(order_id) for order_id in ids]),
+            ("concurrent singles", lambda ids: service._cancel_each(ids)),
+            ("cancel_orders", lambda ids: service.cancel_orders(ids)),
+            ("cancel_all(market)", lambda ids: service.cancel_all("BTCINR")),
+        ]
+        print(f"\n== {label} ==")
+        for name, cancel in cases:
+            ids = place(placer, args.orders)
+            requests = exchange.stats["requests"]
+            start = time.perf_counter()
+            cancel(ids)
+            elapsed = time.perf_counter() - start
+            with exchange.lock:
+                still_open = sum(1 for o in exchange.orders.values() if o["status"] == "open")
+            print(f"{name:<20} {elapsed * 1000:>9.0f} ms  {exchange.stats['requests'] - requests:>4} requests  "
+                  f"{still_open} left open")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
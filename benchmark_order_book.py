@@ -0,0 +1,102 @@
+# benchmark_order_book.py
+"""
+Measures the incremental order book against the current approach of
+re-sorting the raw {price-string: quantity} dict on every read.
+
+Simulates many markets receiving depth updates concentrated near the top of
+the book, with a best bid/ask + spread read after every update.
+
+Usage:
+    python benchmark_order_book.py [--markets 50] [--levels 200] [--updates 200000]
+"""
+import argparse
+import random
+import time
+
+from order_book import OrderBook
+
+
+def make_snapshot(rng, mid, levels):
+    tick = mid * 0.0001
+    return {
+        "bids": {f"{mid - tick * (i + 1):.8g}": f"{rng.uniform(0.01, 5):.6f}" for i in range(levels)},
+        "asks": {f"{mid + tick * (i + 1):.8g}": f"{rng.uniform(0.01, 5):.6f}" for i in range(levels)},
+    }
+
+
+def make_updates(rng, mids, count):
+    """
+    Updates near the top of book: mostly quantity changes, some new and removed levels.
+    """
+    updates = []
+    for _ in range(count):
+        market = rng.randrange(len(mids))
+        mid = mids[market]
+        tick = mid * 0.0001
+        side = "bids" if rng.random() < 0.5 else "asks"
+        depth = min(int(rng.expovariate(0.15)), 250)
+        price = mid - tick * (depth + 1) if side == "bids" else mid + tick * (depth + 1)
+        quantity = 0.0 if rng.random() < 0.2 else rng.uniform(0.01, 5)
+        updates.append((market, {side: {f"{price:.8g}": f"{quantity:.6f}"}}))
+    return updates
+
+
+def run_naive(snapshots, updates):
+    books = [{"bids": dict(s["bids"]), "asks": dict(s["asks"])} for s in snapshots]
+    start = time.perf_counter()
+    for market, update in updates:
+        book = books[market]
+        for side, levels in update.items():
+            for price, quantity in levels.items():
+                if float(quantity) > 0:
+                    book[side][price] = quantity
+                else:
+                    book[side].pop(price, None)
+        # What consumers do today: parse and re-sort to find the top of book
+        bids = sorted(((float(p), float(q)) for p, q in book["bids"].items()), reverse=True)
+        asks = sorted((float(p), float(q)) for p, q in book["asks"].items())
+        spread = asks[0][0] - bids[0][0]
+    return time.perf_counter() - start
+
+
+def run_incremental(snapshots, updates):
+    books = []
+    for i, snapshot in enumerate(snapshots):
+        book = OrderBook(str(i))
+        book.load_snapshot(snapshot)
+        books.append(book)
+    start = time.perf_counter()
+    for market, update in updates:
+        book = books[market]
+        book.apply_update(update)
+        spread = book.spread
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=50)
+    parser.add_argument("--levels", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    mids = [rng.uniform(1, 5_000_000) for _ in range(args.markets)]
+    snapshots = [make_snapshot(rng, mid, args.levels) for mid in mids]
+    updates = make_updates(rng, mids, args.updates)
+
+    naive_updates = updates[: max(1, args.updates // 20)]  # the naive path is far slower
+    naive = run_naive(snapshots, naive_updates) / len(naive_updates)
+    incremental = run_incremental(snapshots, updates) / len(updates)
+
+    print(f"{args.markets} markets x {args.levels} levels per side, update + spread read each time")
+    print(f"re-sort raw dict   {naive * 1e6:8.2f} us/update   {1 / naive:12,.0f} updates/s")
+    print(f"incremental book   {incremental * 1e6:8.2f} us/update   {1 / incremental:12,.0f} updates/s")
+    print(f"speedup            {naive / incremental:8.1f}x")
+    per_market = 1 / incremental / args.markets
+    print(f"one core sustains ~{per_market:,.0f} updates/s per market across {args.markets} markets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmark_order_ledger.py
+"""
+Order history views against the mock exchange with a long trade history.
+
+1. Full download: page through all of /exchange/v1/orders/trade_history on
+   every view and filter it in pandas (what a complete history needs
+   without local storage).
+2. OrderLedger: sync only the trades made since the last view, then run an
+   indexed range query (one market, last 7 days).
+
+Between views a few new trades are made, so both see fresh data.
+
+Usage:
+    python benchmark_order_ledger.py [--trades 50000] [--views 20] [--new-per-view 20] [--latency-ms 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from api_service import CoinDCXApiService
+from market_metadata import MarketMetadataCache
+from mock_exchange import MockExchangeConfig, start_mock_exchange
+from order_ledger import OrderLedger
+from order_service import OrderService
+from rate_limiter import RequestScheduler
+from singleflight import SingleFlight
+
+MARKETS = ("BTCINR", "ETHINR", "SOLINR", "XRPINR", "BTCUSDT", "ETHUSDT")
+DAY_MS = 86_400_000
+
+
+def make_trades(exchange, count, offset=0):
+    for i in range(count):
+        market = MARKETS[(offset + i) % len(MARKETS)]
+        exchange.create_order({"market": market, "side": "buy" if i % 2 else "sell", "order_type": "market_order",
+                               "total_quantity": 0.01})
+
+
+def spread_history(exchange, days=180):
+    # Back-date the seeded trades evenly over `days`, oldest first
+    now = int(time.time() * 1000)
+    with exchange.lock:
+        step = days * DAY_MS // max(len(exchange.fills), 1)
+        for i, trade in enumerate(exchange.fills):
+            trade["timestamp"] = now - (len(exchange.fills) - i) * step
+
+
+def full_download(service, page_size=5000):
+    trades, from_id = [], 0
+    while True:
+        page = service._fetch_trade_page(from_id, page_size)
+        trades.extend(page)
+        if len(page) < page_size:
+            return trades
+        from_id = page[-1]["id"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=50000)
+    parser.add_argument("--views", type=int, default=20)
+    parser.add_argument("--new-per-view", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    server, exchange = start_mock_exchange(MockExchangeConfig(latency_ms=args.latency_ms))
+    make_trades(exchange, args.trades)
+    spread_history(exchange)
+    api = CoinDCXApiService("mock-key", "mock-secret", base_url=f"http://127.0.0.1:{server.server_address[1]}",
+                            scheduler=RequestScheduler.unlimited(), single_flight=SingleFlight(ttl=0))
+    path = os.path.join(tempfile.mkdtemp(prefix="order_ledger_"), "ledger.db")
+    ledger = OrderLedger(path, page_size=5000, min_sync_interval=0)
+    service = OrderService(api, market_metadata=MarketMetadataCache(), ledger=ledger)
+
+    print(f"{args.trades} trades over 180 days, {args.views} views, {args.new_per_view} new trades per view, "
+          f"{args.latency_ms:.0f} ms latency")
+    start = time.perf_counter()
+    service.sync_order_history(force=True)
+    print(f"initial ledger sync: {(time.perf_counter() - start) * 1000:.0f} ms, {ledger.sync_requests} requests, "
+          f"{ledger.stats()['trades']} trades stored")
+
+    print(f"{'approach':<16} {'ms/view':>9} {'requests/view':>14} {'rows shown':>11}")
+    for label in ("full download", "ledger"):
+        elapsed, requests, rows = 0.0, 0, 0
+        for view in range(args.views):
+            make_trades(exchange, args.new_per_view, offset=view)
+            since = int(time.time() * 1000) - 7 * DAY_MS
+            before = exchange.stats["requests"]
+            t = time.perf_counter()
+            if label == "full download":
+                df = pd.DataFrame(full_download(service))
+                df = df[(df["symbol"] == "BTCINR") & (df["timestamp"] >= since)].sort_values("timestamp", ascending=False)
+            else:
+                df = pd.DataFrame(service.get_order_history(market="BTCINR", start=since))
+            elapsed += time.perf_counter() - t
+            requests += exchange.stats["requests"] - before
+            rows = len(df)
+        print(f"{label:<16} {elapsed / args.views * 1000:>9.1f} {requests / args.views:>14.1f} {rows:>11}")
+
+    stored = ledger.trades()
+    with exchange.lock:
+        expected = len(exchange.fills)
+    ids = [t["id"] for t in stored]
+    print(f"ledger holds {len(stored)} of {expected} trades, {len(ids) - len(set(ids))} duplicates")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
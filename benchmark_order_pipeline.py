@@ -0,0 +1,107 @@
+# benchmark_order_pipeline.py
+"""
+Sustained order submission against the mock exchange.
+
+1. Blocking baseline: one place_limit_order round-trip after another.
+2. OrderPipeline, one order per request.
+3. OrderPipeline, batching waiting orders into create_multiple.
+
+Producer threads submit orders as fast as the pipeline accepts them.
+Reports orders per minute, how long submit() blocks the caller, and checks
+that every order reached the exchange exactly once with a unique client id.
+
+Usage:
+    python benchmark_order_pipeline.py [--orders 5000] [--producers 4] [--latency-ms 20] [--paced]
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from api_service import CoinDCXApiService
+from market_metadata import MarketMetadataCache
+from mock_exchange import MockExchangeConfig, start_mock_exchange
+from order_ledger import OrderLedger
+from order_pipeline import OrderPipeline
+from order_service import OrderService
+from rate_limiter import RequestScheduler
+from singleflight import SingleFlight
+from transport import HttpTransport
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def check(exchange, before, placed_ids):
+    with exchange.lock:
+        new = [o for o in exchange.orders.values() if o["id"] not in before]
+    client_ids = [o["client_order_id"] for o in new]
+    return len(new), len(client_ids) - len(set(client_ids)), len(set(placed_ids) - {o["id"] for o in new})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--producers", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--paced", action="store_true", help="use the default client-side rate limits")
+    args = parser.parse_args()
+
+    server, exchange = start_mock_exchange(MockExchangeConfig(latency_ms=args.latency_ms))
+    api = CoinDCXApiService(
+        "mock-key", "mock-secret", transport=HttpTransport(pool_size=args.workers + 2),
+        base_url=f"http://127.0.0.1:{server.server_address[1]}",
+        scheduler=None if args.paced else RequestScheduler.unlimited(), single_flight=SingleFlight(ttl=0),
+    )
+    service = OrderService(api, market_metadata=MarketMetadataCache(), ledger=OrderLedger(":memory:"))
+    journal_dir = tempfile.mkdtemp(prefix="order_journal_")
+
+    print(f"{args.orders} orders, {args.producers} producers, {args.workers} workers, "
+          f"{args.latency_ms:.0f} ms latency, pacing {'on' if args.paced else 'off'}")
+    print(f"{'approach':<22} {'orders/min':>11} {'submit p50':>11} {'submit p99':>11} "
+          f"{'on exchange':>12} {'dup ids':>8}")
+
+    count = min(args.orders, 300)
+    before = set(exchange.orders)
+    start = time.perf_counter()
+    ids = [service.place_limit_order("BTCINR", "buy", 5000000, 0.001)["orders"][0]["id"] for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    placed, duplicates, _ = check(exchange, before, ids)
+    per_order = elapsed / count
+    print(f"{'blocking loop':<22} {count / elapsed * 60:>11.0f} {per_order * 1000:>8.1f} ms {per_order * 1000:>8.1f} ms "
+          f"{placed:>12} {duplicates:>8}")
+
+    for label, batch in (("pipeline, single", False), ("pipeline, batched", True)):
+        path = os.path.join(journal_dir, f"{'batched' if batch else 'single'}.jsonl")
+        pipeline = OrderPipeline(service, workers=args.workers, queue_size=1000, journal_path=path, batch=batch)
+        before = set(exchange.orders)
+        submit_times, futures = [], []
+
+        def produce(n):
+            for i in range(n, args.orders, args.producers):
+                t = time.perf_counter()
+                futures.append(pipeline.submit("BTCINR", "buy", 0.001, price=5000000 - i % 1000))
+                submit_times.append(time.perf_counter() - t)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.producers) as producers:
+            list(producers.map(produce, range(args.producers)))
+        wait(futures)
+        elapsed = time.perf_counter() - start
+        pipeline.close()
+
+        placed_ids = [f.result()["id"] for f in futures if f.exception() is None]
+        placed, duplicates, missing = check(exchange, before, placed_ids)
+        stats = pipeline.stats()
+        print(f"{label:<22} {args.orders / elapsed * 60:>11.0f} {percentile(submit_times, 0.5) * 1e6:>8.0f} us "
+              f"{percentile(submit_times, 0.99) * 1e6:>8.0f} us {placed:>12} {duplicates:>8}"
+              f"   ({stats['requests']} requests, {stats['failed']} failed, {stats['pending']} left in journal)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmark_rate_limiter.py
+"""
+Drives a burst of market-data polling plus order placement against the mock
+exchange configured to answer 429 above a per-group rate, once with
+pacing disabled and once with the RequestScheduler.
+
+Usage:
+    python benchmark_rate_limiter.py [--pollers 8] [--polls 40] [--orders 20]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api_service import CoinDCXApiService
+from mock_exchange import DEFAULT_PRICES, MockExchangeConfig, start_mock_exchange
+from rate_limiter import RequestScheduler
+from resilience import PublicRequestGuard
+from singleflight import SingleFlight
+from transport import HttpTransport
+
+# Server-side limits: group -> (requests per second, burst)
+SERVER_LIMITS = {
+    "orders": (10.0, 5),
+    "public": (20.0, 20),
+}
+
+
+def run_scenario(label, scheduler, args):
+    server, _ = start_mock_exchange(MockExchangeConfig(rate_limits=SERVER_LIMITS))
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    # No transport-level retries, so every 429 is visible to the caller
+    transport = HttpTransport(pool_size=args.pollers + 2, max_retries=0)
+    # Own circuit breakers per scenario, so one scenario's 429s don't open the next one's
+    api = CoinDCXApiService("mock-key", "mock-secret", transport=transport, base_url=base_url, scheduler=scheduler,
+                            single_flight=SingleFlight(ttl=0), guard=PublicRequestGuard())
+    markets = list(DEFAULT_PRICES)
+
+    rejected = {"public": 0, "orders": 0}
+    order_latency = []
+
+    def poll(n):
+        # Each poller scans a different market's order book
+        for _ in range(args.polls):
+            try:
+                api.make_public_request("/market_data/orderbook", params={"pair": markets[n % len(markets)]})
+            except Exception:
+                rejected["public"] += 1
+
+    def place(i):
+        start = time.perf_counter()
+        try:
+            api.make_authenticated_request("/exchange/v1/orders/create", {
+                "market": "BTCINR", "side": "buy", "order_type": "limit_order",
+                "price_per_unit": 1.0, "total_quantity": 0.001, "client_order_id": str(i),
+            })
+        except Exception:
+            rejected["orders"] += 1
+        order_latency.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.pollers + 2) as pool:
+        for n in range(args.pollers):
+            pool.submit(poll, n)
+        for i in range(args.orders):
+            pool.submit(place, i)
+            time.sleep(0.05)  # orders arrive at ~20/s while the pollers hammer market data
+    elapsed = time.perf_counter() - start
+
+    order_latency.sort()
+    print(f"\n== {label} ({elapsed:.1f}s) ==")
+    print(f"429s: market data {rejected['public']}/{args.pollers * args.polls}, orders {rejected['orders']}/{args.orders}")
+    print(f"order latency p50 {order_latency[len(order_latency) // 2]:.1f} ms, max {order_latency[-1]:.1f} ms")
+    for group, stats in scheduler.stats().items():
+        if stats["requests"]:
+            print(f"  {group:<8} requests {stats['requests']:4d}  wait p50 {stats['p50_wait_ms']:7.1f} ms  "
+                  f"p99 {stats['p99_wait_ms']:7.1f} ms  429s {stats['rate_limited']}")
+
+    transport.close()
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pollers", type=int, default=8, help="concurrent market-data polling threads")
+    parser.add_argument("--polls", type=int, default=40, help="requests per poller")
+    parser.add_argument("--orders", type=int, default=20, help="orders placed during the burst")
+    args = parser.parse_args()
+
+    run_scenario("no pacing", RequestScheduler.unlimited(), args)
+    run_scenario("RequestScheduler", RequestScheduler(
+        limits={"public": (18.0, 15), "orders": (9.0, 5)},
+        max_in_flight=4,
+    ), args)
+
+
+if __name__ == "__main__":
+    main()
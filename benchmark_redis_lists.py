@@ -0,0 +1,97 @@
+# benchmark_redis_lists.py
+"""
+Cost of appending to a cached order-history list as it grows.
+
+1. Old read-modify-write: GET the JSON list, append, SET it back.
+2. redis_cache.append_to_cache_list: RPUSH + LTRIM in one MULTI/EXEC.
+
+Reports microseconds per append at several list sizes, then runs
+concurrent appenders against one key and counts lost entries.
+
+Needs a Redis server on localhost:6379 (the one redis_cache uses).
+Keys are created under "benchmark:" and deleted afterwards.
+
+Usage:
+    python benchmark_redis_lists.py [--sizes 10,1000,10000,100000] [--appends 200] [--threads 8]
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+
+import redis_cache
+from redis_cache import append_to_cache_list, cache_list_length, redis_client
+
+ORDER = {"id": "3f0e2a4c-0000-4000-8000-000000000000", "client_order_id": "coindcx_ab12_1700000000000000",
+         "market": "BTCINR", "side": "buy", "order_type": "limit_order", "status": "open",
+         "price_per_unit": 5400000.0, "total_quantity": 0.001, "remaining_quantity": 0.001,
+         "created_at": 1700000000000, "updated_at": 1700000000000}
+
+
+def legacy_append(full_key, value):
+    # The previous append_to_cache_list: O(list size) per call, not atomic
+    cached = redis_client.get(full_key)
+    data = json.loads(cached) if cached else []
+    redis_client.set(full_key, json.dumps(data + [value]))
+
+
+def seed(full_key, size, legacy):
+    redis_client.delete(full_key)
+    if legacy:
+        redis_client.set(full_key, json.dumps([ORDER] * size))
+    elif size:
+        redis_client.rpush(full_key, *[json.dumps(ORDER)] * size)
+
+
+def time_appends(append, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        append()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,1000,10000,100000")
+    parser.add_argument("--appends", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    try:
+        redis_client.ping()
+    except redis.ConnectionError as e:
+        raise SystemExit(f"Redis is not reachable on localhost:6379: {e}")
+
+    legacy_key, list_key = "benchmark:legacy", "benchmark:list"
+    sizes = [int(size) for size in args.sizes.split(",")]
+    cap = max(sizes) + args.appends * args.threads
+    print(f"{args.appends} appends per size, entries of {len(json.dumps(ORDER))} bytes")
+    print(f"{'list size':>10} {'read-modify-write':>18} {'RPUSH+LTRIM':>12}")
+    for size in sizes:
+        seed(legacy_key, size, legacy=True)
+        legacy_us = time_appends(lambda: legacy_append(legacy_key, ORDER), args.appends)
+        seed(list_key, size, legacy=False)
+        list_us = time_appends(lambda: append_to_cache_list("benchmark", "list", ORDER, cap=cap), args.appends)
+        print(f"{size:>10} {legacy_us:>15.0f} us {list_us:>9.0f} us")
+
+    expected = args.threads * args.appends
+    print(f"\n{args.threads} threads x {args.appends} concurrent appends onto an empty key")
+    for label, key, append in (
+        ("read-modify-write", legacy_key, lambda: legacy_append(legacy_key, ORDER)),
+        ("RPUSH+LTRIM", list_key, lambda: append_to_cache_list("benchmark", "list", ORDER, cap=cap)),
+    ):
+        redis_client.delete(key)
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            for _ in range(args.threads):
+                pool.submit(time_appends, append, args.appends)
+        stored = len(json.loads(redis_client.get(key))) if label == "read-modify-write" else cache_list_length(key)
+        print(f"{label:<18} stored {stored} of {expected} ({expected - stored} lost)")
+
+    redis_client.delete(legacy_key, list_key)
+    print(f"\nDefault cap per list: {redis_cache.DEFAULT_LIST_CAP} (COINDCX_CACHE_LIST_CAP)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmark_resilience.py
+"""
+Exercises the public-request guard against the mock exchange with injected latency.
+
+1. Hedging: sequential order-book requests against a server where a share of
+   responses are slow outliers, without and with hedged requests.
+2. Circuit breaker: the server starts failing slowly; after the breaker opens,
+   callers get the last good snapshot immediately.
+
+Usage:
+    python benchmark_resilience.py [--requests 300] [--tail-rate 0.05] [--tail-latency-ms 300]
+"""
+import argparse
+import time
+
+from api_service import CoinDCXApiService
+from mock_exchange import MockExchangeConfig, start_mock_exchange
+from rate_limiter import RequestScheduler
+from resilience import PublicRequestGuard
+from singleflight import SingleFlight
+from transport import HttpTransport
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+    return f"p50 {pick(0.50):7.1f} ms   p95 {pick(0.95):7.1f} ms   p99 {pick(0.99):7.1f} ms   max {samples[-1] * 1000:7.1f} ms"
+
+
+def make_api(base_url, guard):
+    return CoinDCXApiService(
+        "mock-key", "mock-secret",
+        transport=HttpTransport(pool_size=8, max_retries=0),
+        base_url=base_url,
+        scheduler=RequestScheduler.unlimited(),
+        single_flight=SingleFlight(ttl=0),
+        guard=guard,
+    )
+
+
+def run_hedging(args):
+    print("== Hedged requests ==")
+    server, _ = start_mock_exchange(MockExchangeConfig(
+        latency_ms=5, jitter_ms=2, tail_rate=args.tail_rate, tail_latency_ms=args.tail_latency_ms, seed=7,
+    ))
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    for hedge in (False, True):
+        guard = PublicRequestGuard(hedge=hedge)
+        api = make_api(base_url, guard)
+        samples = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            api.make_public_request("/market_data/orderbook", params={"pair": "BTCINR"})
+            samples.append(time.perf_counter() - start)
+        stats = guard.stats()
+        label = "hedging on " if hedge else "hedging off"
+        print(f"{label}  {percentiles(samples)}   hedges fired {stats['hedges_fired']}, won {stats['hedges_won']}")
+    server.shutdown()
+
+
+def run_breaker(args):
+    print("\n== Circuit breaker ==")
+    server, exchange = start_mock_exchange(MockExchangeConfig(latency_ms=5))
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    guard = PublicRequestGuard(failure_threshold=5, reset_timeout=2.0)
+    api = make_api(base_url, guard)
+
+    api.make_public_request("/exchange/ticker")  # last good snapshot
+
+    # The exchange turns slow and broken
+    exchange.config.latency_ms = 200
+    exchange.config.error_rate = 1.0
+
+    samples, failures, stale = [], 0, 0
+    for _ in range(50):
+        start = time.perf_counter()
+        try:
+            api.make_public_request("/exchange/ticker")
+            stale += 1
+        except Exception:
+            failures += 1
+        samples.append(time.perf_counter() - start)
+
+    stats = guard.stats()
+    print(f"50 requests while failing: {failures} errors, {stale} served from snapshot")
+    print(f"latency  {percentiles(samples)}")
+    print(f"breaker  {stats['endpoints']['/exchange/ticker']}")
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    parser.add_argument("--tail-latency-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    run_hedging(args)
+    run_breaker(args)
+
+
+if __name__ == "__main__":
+    main()
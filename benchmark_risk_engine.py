@@ -0,0 +1,108 @@
+# benchmark_risk_engine.py
+"""
+Cost of a pre-trade balance check against the mock exchange.
+
+1. Balance round-trip: fetch /exchange/v1/users/balances before every
+   order (what checking with AccountService.get_account_balance costs).
+2. RiskEngine.check: the in-memory model (balance, open order value per
+   market, open order count, price band), plus releasing the reservation.
+
+Then several threads reserve small orders concurrently until the balance
+runs out, checking that the model never reserves more than was available.
+
+Usage:
+    python benchmark_risk_engine.py [--checks 100000] [--round-trips 100] [--threads 8] [--latency-ms 20]
+"""
+import argparse
+import threading
+import time
+
+from account_service import AccountService
+from api_service import CoinDCXApiService
+from market_metadata import MarketMetadataCache
+from market_service import MarketService
+from mock_exchange import MockExchangeConfig, start_mock_exchange
+from order_ledger import OrderLedger
+from order_service import OrderService
+from rate_limiter import RequestScheduler
+from risk_engine import RiskEngine, RiskLimitError
+from singleflight import SingleFlight
+from ticker_snapshot import TickerSnapshotCache
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=100000)
+    parser.add_argument("--round-trips", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    server, exchange = start_mock_exchange(MockExchangeConfig(latency_ms=args.latency_ms))
+    api = CoinDCXApiService("mock-key", "mock-secret", base_url=f"http://127.0.0.1:{server.server_address[1]}",
+                            scheduler=RequestScheduler.unlimited(), single_flight=SingleFlight(ttl=0))
+    metadata = MarketMetadataCache()
+    market_service = MarketService(api, ticker_cache=TickerSnapshotCache(), market_metadata=metadata)
+    account_service = AccountService(api, market_service)
+    order_service = OrderService(api, market_metadata=metadata, ledger=OrderLedger(":memory:"))
+    risk = RiskEngine(account_service, market_service, order_service, max_open_orders=None,
+                      default_max_notional=None, balance_ttl=3600)
+
+    samples = []
+    for _ in range(args.round_trips):
+        start = time.perf_counter()
+        balances = {b["currency"]: float(b["balance"]) for b in account_service._fetch_balances()}
+        _ = balances.get("INR", 0.0) >= 45 * 10
+        samples.append(time.perf_counter() - start)
+    print(f"{args.latency_ms:.0f} ms server latency")
+    print(f"{'approach':<20} {'p50':>10} {'p99':>10}")
+    print(f"{'balance round-trip':<20} {percentile(samples, 0.5) * 1e6:>7.0f} us {percentile(samples, 0.99) * 1e6:>7.0f} us")
+
+    start = time.perf_counter()
+    risk.ensure_synced()
+    risk.reference_price("XRPINR")
+    print(f"(initial model load: {(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    samples = []
+    for i in range(args.checks):
+        key = f"bench_{i}"
+        start = time.perf_counter()
+        risk.check(key, "XRPINR", "buy", "limit_order", 10, 45)
+        risk.release(key)
+        samples.append(time.perf_counter() - start)
+    print(f"{'RiskEngine check':<20} {percentile(samples, 0.5) * 1e6:>7.1f} us {percentile(samples, 0.99) * 1e6:>7.1f} us"
+          f"   (check + release, {args.checks} orders)")
+
+    available = risk.free["INR"]
+    accepted, rejected = [0] * args.threads, [0] * args.threads
+
+    def reserve(worker):
+        i = 0
+        while True:
+            try:
+                risk.check(f"race_{worker}_{i}", "XRPINR", "buy", "limit_order", 1000, 45)
+                accepted[worker] += 1
+            except RiskLimitError:
+                rejected[worker] += 1
+                return
+            i += 1
+
+    threads = [threading.Thread(target=reserve, args=(n,)) for n in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    reserved = sum(accepted) * 1000 * 45 * (1 + risk.fee_rate)
+    print(f"\n{args.threads} threads reserving 45000 INR orders from {available:.0f} INR: {sum(accepted)} accepted, "
+          f"{reserved:.0f} INR reserved, {risk.free['INR']:.0f} INR left "
+          f"({'no over-reservation' if reserved <= available + 1e-6 else 'OVER-RESERVED'})")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmark_signing.py
+"""
+Signed requests per second for typical CoinDCX order bodies: the previous
+per-call hmac.new + json.dumps path versus RequestSigner with the stdlib
+encoder and with orjson (when installed).
+
+Usage:
+    python benchmark_signing.py [--iterations 200000]
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import time
+
+from signing import RequestSigner, encode_json_stdlib, orjson
+
+SECRET = "0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef"
+
+BODIES = {
+    "limit order": {
+        "timestamp": 1700000000000,
+        "side": "buy",
+        "order_type": "limit_order",
+        "market": "BTCINR",
+        "price_per_unit": 5412345.25,
+        "total_quantity": 0.00125,
+        "client_order_id": "coindcx_1700000000000_17",
+    },
+    "cancel": {
+        "timestamp": 1700000000000,
+        "id": "ead19992-43fd-11e8-b027-bb815bcb14ed",
+    },
+    "batch of 10": {
+        "timestamp": 1700000000000,
+        "orders": [
+            {
+                "side": "sell",
+                "order_type": "limit_order",
+                "market": "ETHINR",
+                "price_per_unit": 250000.0 + i,
+                "total_quantity": 0.01,
+                "client_order_id": f"coindcx_1700000000000_{i}",
+            }
+            for i in range(10)
+        ],
+    },
+}
+
+
+def legacy_sign(payload):
+    json_body = json.dumps(payload, separators=(',', ':'))
+    signature = hmac.new(
+        SECRET.encode('utf-8'),
+        msg=json_body.encode('utf-8'),
+        digestmod=hashlib.sha256
+    ).hexdigest()
+    return json_body, signature
+
+
+def rate(fn, payload, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(payload)
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    signers = {
+        "legacy (hmac.new + json.dumps)": legacy_sign,
+        "RequestSigner (stdlib json)": RequestSigner(SECRET, encoder=encode_json_stdlib).sign_payload,
+    }
+    if orjson is not None:
+        signers["RequestSigner (orjson)"] = RequestSigner(SECRET).sign_payload
+    else:
+        print("orjson not installed; skipping the orjson encoder\n")
+
+    for body_name, payload in BODIES.items():
+        print(f"== {body_name} ==")
+        baseline = None
+        for name, fn in signers.items():
+            per_sec = rate(fn, payload, args.iterations)
+            baseline = baseline or per_sec
+            print(f"  {name:<32} {per_sec:>12,.0f} signed/s  ({per_sec / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
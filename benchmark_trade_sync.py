@@ -0,0 +1,125 @@
+# benchmark_trade_sync.py
+"""
+Polls trade history for many markets on the mock exchange, comparing the
+current approach (re-fetching a fixed window every round) with the
+incremental TradeSync.
+
+Reports trades and bytes transferred per round, duplicates handed to the
+caller, and trades missed compared to the exchange's own trade log.
+
+Usage:
+    python benchmark_trade_sync.py [--markets 100] [--rounds 20] [--interval 0.5] [--window 500]
+"""
+import argparse
+import json
+import time
+
+from api_service import CoinDCXApiService
+from market_service import MarketService
+from mock_exchange import MockExchangeConfig, start_mock_exchange
+from rate_limiter import RequestScheduler
+from singleflight import SingleFlight
+from trade_sync import trade_key
+
+
+def make_service(base_url):
+    api = CoinDCXApiService(
+        "mock-key", "mock-secret", base_url=base_url,
+        scheduler=RequestScheduler.unlimited(), single_flight=SingleFlight(ttl=0),
+    )
+    return MarketService(api)
+
+
+def measure(service, markets, args, poll):
+    """
+    Run `rounds` polling rounds; poll(market) returns (page, trades handed to the caller).
+    """
+    fetched = size = duplicates = 0
+    delivered = {market: [] for market in markets}
+    started_ms = int(time.time() * 1000)
+    for _ in range(args.rounds):
+        round_start = time.monotonic()
+        for market, (page, trades) in poll(markets).items():
+            fetched += len(page)
+            size += len(json.dumps(page))
+            delivered[market].extend(trades)
+        time.sleep(max(0.0, args.interval - (time.monotonic() - round_start)))
+    for trades in delivered.values():
+        keys = [trade_key(t) for t in trades]
+        duplicates += len(keys) - len(set(keys))
+    return fetched, size, duplicates, delivered, started_ms
+
+
+def missed(exchange, delivered, since_ms):
+    """
+    Exchange trades after since_ms (and before the last delivered trade) not delivered.
+    """
+    count = 0
+    with exchange.lock:
+        log = {market: list(exchange.trades.get(market, [])) for market in delivered}
+    for market, trades in delivered.items():
+        if not trades:
+            continue
+        seen = {trade_key(t) for t in trades}
+        last = max(t["T"] for t in trades)
+        count += sum(1 for t in log[market] if since_ms < t["T"] <= last and trade_key(t) not in seen)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--window", type=int, default=500, help="trades re-fetched per market by the naive poller")
+    args = parser.parse_args()
+
+    prices = {f"C{i}INR": 100.0 + i for i in range(args.markets)}
+    server, exchange = start_mock_exchange(MockExchangeConfig(prices=prices, seed=3))
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    markets = list(prices)
+
+    # Let every market build a full trade log first
+    for _ in range(40):
+        exchange.ticker()
+        exchange._last_tick = 0.0
+
+    print(f"{args.markets} markets, {args.rounds} rounds every {args.interval}s")
+    print(f"{'approach':<18} {'trades/round':>13} {'KB/round':>10} {'duplicates':>11} {'missed':>7}")
+
+    naive_service = make_service(base_url)
+
+    def naive(markets):
+        pages = {m: naive_service.get_trade_history(m, limit=args.window) for m in markets}
+        return {m: (page, page) for m, page in pages.items()}
+
+    sync_service = make_service(base_url)
+    sync = sync_service.trade_sync
+    fetch = sync.fetch
+
+    def counted_fetch(market, limit):
+        page = fetch(market, limit)
+        pages[market] = page
+        return page
+
+    pages = {}
+    sync.fetch = counted_fetch
+
+    def incremental(markets):
+        new = sync_service.sync_trades(markets)
+        return {m: (pages[m], trades) for m, trades in new.items()}
+
+    for label, poll, service in (("fixed window", naive, naive_service), ("TradeSync", incremental, sync_service)):
+        fetched, size, duplicates, delivered, since = measure(service, markets, args, poll)
+        # The first round of each run loads history; only count trades after it
+        print(f"{label:<18} {fetched / args.rounds:>13.0f} {size / args.rounds / 1024:>10.1f} "
+              f"{duplicates:>11} {missed(exchange, delivered, since):>7}")
+
+    stats = sync.stats()
+    print(f"\nTradeSync: {stats['requests']} requests, {stats['fetched']} trades fetched, "
+          f"{stats['new']} new, {stats['gaps']} gaps")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmark_transport.py
+"""
+Per-request latency of one-shot requests.get/post calls versus the pooled
+HttpTransport, measured against the local mock exchange.
+
+Usage:
+    python benchmark_transport.py [--requests 500]
+
+Against api.coindcx.com the gap is larger than shown here, since every
+one-shot request also pays a TLS handshake on top of the TCP connect.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import statistics
+import time
+
+import requests
+
+from api_service import CoinDCXApiService
+from mock_exchange import start_mock_exchange
+from rate_limiter import RequestScheduler
+from singleflight import SingleFlight
+from transport import HttpTransport
+
+ORDER = {
+    "side": "buy", "order_type": "limit_order", "market": "BTCINR",
+    "price_per_unit": 1.0, "total_quantity": 0.001,
+}
+
+
+def legacy_signed_post(url):
+    # What make_authenticated_request used to do: sign and post on a fresh connection
+    json_body = json.dumps({"timestamp": int(time.time() * 1000), **ORDER}, separators=(',', ':'))
+    signature = hmac.new(b"mock-secret", json_body.encode(), hashlib.sha256).hexdigest()
+    headers = {"Content-Type": "application/json", "X-AUTH-APIKEY": "mock-key", "X-AUTH-SIGNATURE": signature}
+    return requests.post(url, headers=headers, data=json_body).json()
+
+
+def measure(fn, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<40} mean {statistics.mean(samples):7.3f} ms   "
+          f"p50 {statistics.median(samples):7.3f} ms   p99 {p99:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    args = parser.parse_args()
+
+    server, _ = start_mock_exchange()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    transport = HttpTransport(pool_size=4)
+    api = CoinDCXApiService("mock-key", "mock-secret", transport=transport, base_url=base_url,
+                            scheduler=RequestScheduler.unlimited(), single_flight=SingleFlight(ttl=0))
+
+    print(f"Mock exchange at {base_url}, {args.requests} requests per scenario\n")
+
+    # Before: module-level requests.* opens a new connection every call
+    report("GET  /exchange/ticker   (requests.get)",
+           measure(lambda: requests.get(f"{base_url}/exchange/ticker").json(), args.requests))
+    report("POST /orders/create     (requests.post)",
+           measure(lambda: legacy_signed_post(f"{base_url}/exchange/v1/orders/create"), args.requests))
+
+    # After: pooled keep-alive transport through the service
+    report("GET  /exchange/ticker   (pooled)",
+           measure(lambda: api.make_public_request("/exchange/ticker"), args.requests))
+    report("POST /orders/create     (pooled)",
+           measure(lambda: api.make_authenticated_request("/exchange/v1/orders/create", ORDER),
+                   args.requests))
+
+    transport.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
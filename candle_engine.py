@@ -0,0 +1,210 @@
+# candle_engine.py
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+TIMEFRAMES = {"1m": 60, "5m": 300, "1h": 3600, "1d": 86400}
+COLUMNS = ["open_time", "open", "high", "low", "close", "volume"]
+OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+
+class CandleBuffer:
+    """
+    Fixed-size ring buffer of OHLCV bars for one market and timeframe.
+
+    Bars are written twice, at slot i and i + capacity of a 2 * capacity
+    array, so the most recent n bars are always one contiguous slice and
+    can be returned as a view without copying or unwrapping.
+    """
+
+    def __init__(self, seconds: int, capacity: int = 300):
+        self.seconds = seconds
+        self.capacity = capacity
+        self._data = np.zeros((2 * capacity, len(COLUMNS)), dtype=np.float64)
+        self._head = -1   # slot of the current (latest) bar
+        self.count = 0
+
+    def _write(self, slot: int, bar) -> None:
+        self._data[slot] = bar
+        self._data[slot + self.capacity] = bar
+
+    def add_trade(self, timestamp: float, price: float, quantity: float) -> None:
+        """
+        Add one trade (timestamp in seconds). O(1) for in-order trades; late
+        trades update the bar they belong to if it is still in the buffer.
+        """
+        open_time = timestamp - timestamp % self.seconds
+        if self.count:
+            current = self._data[self._head]
+            if open_time == current[OPEN_TIME]:
+                self._update(self._head, price, quantity, close=True)
+                return
+            if open_time < current[OPEN_TIME]:
+                back = int((current[OPEN_TIME] - open_time) // self.seconds)
+                for i in range(min(back, self.count - 1), 0, -1):
+                    slot = (self._head - i) % self.capacity
+                    if self._data[slot, OPEN_TIME] == open_time:
+                        self._update(slot, price, quantity, close=False)
+                        break
+                return
+
+        self._head = (self._head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self._write(self._head, (open_time, price, price, price, price, quantity))
+
+    def _update(self, slot: int, price: float, quantity: float, close: bool) -> None:
+        for row in (self._data[slot], self._data[slot + self.capacity]):
+            if price > row[HIGH]:
+                row[HIGH] = price
+            if price < row[LOW]:
+                row[LOW] = price
+            if close:
+                row[CLOSE] = price
+            row[VOLUME] += quantity
+
+    def last(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        The most recent `n` bars (all if None), oldest first, as a read-only view.
+
+        Returns:
+            Array of shape (n, 6) with columns COLUMNS
+        """
+        n = self.count if n is None else min(n, self.count)
+        end = self._head + self.capacity + 1
+        view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def __len__(self):
+        return self.count
+
+
+class CandleEngine:
+    """
+    Builds OHLCV candles for many markets and timeframes from trades.
+
+    Feed it trade-history results (add_trades) or a live trade stream
+    (attach). Memory is bounded: every market holds one CandleBuffer per
+    timeframe, and beyond `max_markets` the least recently updated market
+    is dropped.
+    """
+
+    def __init__(self, timeframes: Iterable[str] = tuple(TIMEFRAMES), capacity: int = 300, max_markets: int = 500):
+        """
+        Args:
+            timeframes: Timeframes to build, keys of TIMEFRAMES
+            capacity: Bars kept per market and timeframe
+            max_markets: Markets kept before the least recently updated is evicted
+        """
+        self.timeframes = {tf: TIMEFRAMES[tf] for tf in timeframes}
+        self.capacity = capacity
+        self.max_markets = max_markets
+        self.markets = OrderedDict()  # market -> {timeframe: CandleBuffer}
+        self._watermarks = {}         # market -> (last trade ms, trades seen at that ms)
+        self._lock = threading.Lock()
+
+    def _buffers(self, market: str) -> Dict[str, CandleBuffer]:
+        buffers = self.markets.get(market)
+        if buffers is None:
+            buffers = self.markets[market] = {
+                tf: CandleBuffer(seconds, self.capacity) for tf, seconds in self.timeframes.items()
+            }
+            while len(self.markets) > self.max_markets:
+                evicted, _ = self.markets.popitem(last=False)
+                self._watermarks.pop(evicted, None)
+        else:
+            self.markets.move_to_end(market)
+        return buffers
+
+    def add_trade(self, market: str, timestamp_ms: float, price: float, quantity: float) -> None:
+        """
+        Add one trade to every timeframe of a market.
+        """
+        with self._lock:
+            timestamp = timestamp_ms / 1000
+            for buffer in self._buffers(market).values():
+                buffer.add_trade(timestamp, price, quantity)
+
+    def add_trades(self, market: str, trades: Iterable[Dict]) -> int:
+        """
+        Add CoinDCX trades ({"p", "q", "T", ...}), e.g. a get_trade_history
+        result. Trades already seen for the market are skipped, so the same
+        history can be polled repeatedly.
+
+        Returns:
+            Number of new trades added
+        """
+        trades = sorted(trades, key=lambda t: t["T"])
+        added = 0
+        with self._lock:
+            last_ms, seen = self._watermarks.get(market, (-1, set()))
+            buffers = self._buffers(market).values()
+            for trade in trades:
+                ts = trade["T"]
+                key = (trade["p"], trade["q"], trade.get("m"))
+                if ts < last_ms or (ts == last_ms and key in seen):
+                    continue
+                if ts > last_ms:
+                    last_ms, seen = ts, set()
+                seen.add(key)
+                price, quantity = float(trade["p"]), float(trade["q"])
+                for buffer in buffers:
+                    buffer.add_trade(ts / 1000, price, quantity)
+                added += 1
+            self._watermarks[market] = (last_ms, seen)
+        return added
+
+    def on_trade(self, trade: Dict) -> None:
+        """
+        MarketStream trade callback ({"s": pair, "p", "q", "T", "m"}).
+        """
+        from market_stream import pair_to_market
+
+        self.add_trades(pair_to_market(trade["s"]), [trade])
+
+    def attach(self, stream) -> "CandleEngine":
+        """
+        Build candles from a MarketStream's live trades.
+        """
+        stream.subscribe(self.on_trade)
+        return self
+
+    def candles(self, market: str, timeframe: str, n: Optional[int] = None) -> np.ndarray:
+        """
+        The last `n` bars for a market and timeframe as a zero-copy, read-only
+        (n, 6) array with columns COLUMNS; empty if the market is unknown.
+        """
+        with self._lock:
+            buffers = self.markets.get(market)
+            if buffers is None:
+                return np.empty((0, len(COLUMNS)))
+            return buffers[timeframe].last(n)
+
+    def dataframe(self, market: str, timeframe: str, n: Optional[int] = None) -> pd.DataFrame:
+        """
+        The last `n` bars as a DataFrame indexed by bar open time (copies the data).
+        """
+        bars = self.candles(market, timeframe, n)
+        df = pd.DataFrame(bars[:, 1:], columns=COLUMNS[1:])
+        df.index = pd.to_datetime(bars[:, OPEN_TIME], unit="s")
+        df.index.name = "open_time"
+        return df
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_default_candle_engine() -> CandleEngine:
+    """
+    Get the process-wide candle engine shared by every session.
+    """
+    global _default_engine
+    if _default_engine is None:
+        with _default_engine_lock:
+            if _default_engine is None:
+                _default_engine = CandleEngine()
+    return _default_engine
@@ -0,0 +1,268 @@
+# candles.py
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+MINUTE_MS = 60_000
+INTERVAL_MS = {
+    "1m": MINUTE_MS,
+    "5m": 5 * MINUTE_MS,
+    "15m": 15 * MINUTE_MS,
+    "30m": 30 * MINUTE_MS,
+    "1h": 60 * MINUTE_MS,
+    "2h": 120 * MINUTE_MS,
+    "4h": 240 * MINUTE_MS,
+    "6h": 360 * MINUTE_MS,
+    "8h": 480 * MINUTE_MS,
+    "1d": 1440 * MINUTE_MS,
+    "3d": 3 * 1440 * MINUTE_MS,
+    "1w": 7 * 1440 * MINUTE_MS,
+}
+COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+
+
+def to_ms(value: Union[None, int, float, datetime, pd.Timestamp]) -> Optional[int]:
+    """
+    Epoch milliseconds from a datetime/Timestamp or a number (seconds or milliseconds).
+    """
+    if value is None:
+        return None
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return int(pd.Timestamp(value).timestamp() * 1000)
+    value = float(value)
+    return int(value * 1000) if value < 1e11 else int(value)
+
+
+class CandleCache:
+    """
+    Local candle cache per (origin, pair, interval), origin being the base
+    URL the candles were fetched from.
+
+    Holds the candles fetched so far as a sorted array plus the time ranges
+    known to be complete, so a query only needs to fetch the gaps. The
+    still-forming candle is never marked complete. Optionally persisted as
+    one .npz file per key under `path`, named with a hash of the origin
+    ("I-BTC_INR_1m.<hash>.npz").
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Directory to persist the cache in (memory only if None)
+        """
+        self.path = path
+        self._data = {}      # key -> (n, 6) array sorted by time
+        self._covered = {}   # key -> [[start, end), ...] sorted, non-overlapping
+        self._lock = threading.Lock()
+
+    def _file(self, key: Tuple[str, str, str]) -> str:
+        origin, pair, interval = key
+        tag = hashlib.sha1((origin or "").encode()).hexdigest()[:8]
+        return os.path.join(self.path, f"{pair.replace('/', '_')}_{interval}.{tag}.npz")
+
+    def _load(self, key: Tuple[str, str, str]) -> None:
+        if key in self._data:
+            return
+        self._data[key] = np.empty((0, len(COLUMNS)))
+        self._covered[key] = []
+        if self.path and os.path.exists(self._file(key)):
+            try:
+                with np.load(self._file(key)) as saved:
+                    self._data[key] = saved["data"]
+                    self._covered[key] = [list(r) for r in saved["covered"]]
+            except Exception as e:
+                print(f"[ERROR] Could not read candle cache {self._file(key)}: {e}")
+
+    def gaps(self, key: Tuple[str, str, str], start: int, end: int) -> List[Tuple[int, int]]:
+        """
+        Sub-ranges of [start, end) not yet covered.
+        """
+        with self._lock:
+            self._load(key)
+            gaps, cursor = [], start
+            for lo, hi in self._covered[key]:
+                if hi <= cursor:
+                    continue
+                if lo >= end:
+                    break
+                if lo > cursor:
+                    gaps.append((cursor, lo))
+                cursor = max(cursor, hi)
+            if cursor < end:
+                gaps.append((cursor, end))
+            return gaps
+
+    def store(self, key: Tuple[str, str, str], candles: np.ndarray, start: int, end: int) -> None:
+        """
+        Merge fetched candles and mark [start, end) as covered (end may be
+        lowered by the caller to exclude the forming candle).
+        """
+        with self._lock:
+            self._load(key)
+            if len(candles):
+                # New rows first so they win over older copies of the same candle
+                merged = np.concatenate([candles, self._data[key]])
+                _, first = np.unique(merged[:, 0], return_index=True)
+                self._data[key] = merged[first]
+            if end > start:
+                ranges = sorted(self._covered[key] + [[start, end]])
+                covered = [ranges[0]]
+                for lo, hi in ranges[1:]:
+                    if lo <= covered[-1][1]:
+                        covered[-1][1] = max(covered[-1][1], hi)
+                    else:
+                        covered.append([lo, hi])
+                self._covered[key] = covered
+            if self.path:
+                os.makedirs(self.path, exist_ok=True)
+                tmp = self._file(key) + ".tmp.npz"
+                np.savez(tmp, data=self._data[key], covered=np.array(self._covered[key], dtype=np.int64).reshape(-1, 2))
+                os.replace(tmp, self._file(key))
+
+    def read(self, key: Tuple[str, str, str], start: int, end: int) -> np.ndarray:
+        """
+        Cached candles with open time in [start, end), oldest first (a copy).
+        """
+        with self._lock:
+            self._load(key)
+            data = self._data[key]
+            times = data[:, 0]
+            lo, hi = np.searchsorted(times, start, "left"), np.searchsorted(times, end, "left")
+            return data[lo:hi].copy()
+
+
+class CandleClient:
+    """
+    Historical candles from the public /market_data/candles endpoint.
+
+    Long ranges are split into pages of at most `page_limit` candles that
+    are fetched concurrently (the API service's scheduler still paces them
+    against the public rate limit). Results go through a CandleCache so
+    only missing ranges, typically just the latest candles, are requested.
+    """
+
+    ENDPOINT = "/market_data/candles"
+
+    def __init__(self, api_service, cache: Optional[CandleCache] = None, max_workers: int = 4,
+                 page_limit: int = 1000, market_index=None, market_rules=None):
+        """
+        Args:
+            api_service: CoinDCXApiService used for the requests
+            cache: CandleCache (defaults to the process-wide one)
+            max_workers: Pages fetched at the same time
+            page_limit: Candles per request (the API maximum is 1000)
+            market_index: Optional MarketIndex used to turn "BTCINR" into "I-BTC_INR"
+            market_rules: Optional callable market -> MarketRules whose markets_details
+                pair is used when known
+        """
+        self.api_service = api_service
+        self.cache = cache or get_default_candle_cache()
+        self.max_workers = max_workers
+        self.page_limit = page_limit
+        self.market_index = market_index
+        self.market_rules = market_rules
+        self.requests = 0
+
+    def pair(self, market: str) -> str:
+        """
+        CoinDCX candle pair name for a market ("BTCINR" -> "I-BTC_INR").
+        """
+        if "-" in market:
+            return market
+        if self.market_rules is not None:
+            try:
+                rules = self.market_rules(market)
+            except Exception as e:
+                print(f"[ERROR] Could not look up the candle pair of {market}: {e}")
+                rules = None
+            if rules is not None and rules.pair:
+                return rules.pair
+        if self.market_index is not None and market in self.market_index:
+            position = self.market_index.positions[market.upper()]
+            base, quote = self.market_index.bases[position], self.market_index.quotes[position]
+        else:
+            from market_index import split_market
+            base, quote = split_market(market.upper())
+        return f"{'I' if quote == 'INR' else 'B'}-{base}_{quote}"
+
+    def _fetch_page(self, pair: str, interval: str, start: int, end: int) -> np.ndarray:
+        params = {"pair": pair, "interval": interval, "startTime": start, "endTime": end - 1,
+                  "limit": self.page_limit}
+        self.requests += 1
+        rows = self.api_service.make_public_request(self.ENDPOINT, params=params) or []
+        candles = np.array(
+            [[float(r["time"]), float(r["open"]), float(r["high"]), float(r["low"]), float(r["close"]),
+              float(r["volume"])] for r in rows],
+            dtype=np.float64,
+        ).reshape(-1, len(COLUMNS))
+        times = candles[:, 0]
+        return candles[(times >= start) & (times < end)]
+
+    def _pages(self, start: int, end: int, step: int) -> List[Tuple[int, int]]:
+        span = step * self.page_limit
+        return [(lo, min(lo + span, end)) for lo in range(start, end, span)]
+
+    def get_candles(self, market: str, interval: str = "1m", start=None, end=None) -> pd.DataFrame:
+        """
+        Candles with open time in [start, end).
+
+        Args:
+            market: Market ("BTCINR") or pair ("I-BTC_INR")
+            interval: One of INTERVAL_MS
+            start: datetime or epoch (s or ms); defaults to page_limit candles before end
+            end: datetime or epoch (s or ms); defaults to now
+
+        Returns:
+            DataFrame indexed by open time with open, high, low, close, volume
+        """
+        step = INTERVAL_MS[interval]
+        now = int(time.time() * 1000)
+        end = min(to_ms(end) or now, now + step)
+        start = to_ms(start) if start is not None else end - step * self.page_limit
+        start -= start % step
+        end += -end % step
+        forming = now - now % step  # open time of the candle still being built
+
+        pair = self.pair(market)
+        key = (self.api_service.base_url, pair, interval)
+        pages = [page for lo, hi in self.cache.gaps(key, start, end) for page in self._pages(lo, hi, step)]
+
+        if len(pages) == 1:
+            results = [self._fetch_page(pair, interval, *pages[0])]
+        elif pages:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pages))) as pool:
+                results = list(pool.map(lambda page: self._fetch_page(pair, interval, *page), pages))
+        else:
+            results = []
+
+        for (lo, hi), candles in zip(pages, results):
+            self.cache.store(key, candles, lo, min(hi, forming))
+
+        data = self.cache.read(key, start, end)
+        df = pd.DataFrame(data[:, 1:], columns=COLUMNS[1:])
+        df.index = pd.to_datetime(data[:, 0], unit="ms")
+        df.index.name = "open_time"
+        return df
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_candle_cache() -> CandleCache:
+    """
+    Get the process-wide candle cache (persisted under COINDCX_CANDLE_CACHE if set).
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = CandleCache(os.getenv("COINDCX_CANDLE_CACHE"))
+    return _default_cache
@@ -0,0 +1,380 @@
+# indicators.py
+"""
+Vectorized technical indicators over candle arrays.
+
+Every function works along the last axis, so a 1-D array is one market
+and a 2-D (markets x bars) array computes all markets in one call. Bars
+before an indicator has enough history are NaN. EMA-based indicators
+follow pandas' ewm(adjust=False) convention (seeded with the first value).
+
+The *State classes compute the same values incrementally in O(1) per bar,
+for a single market (scalars) or many markets at once (1-D arrays).
+"""
+import math
+from collections import namedtuple
+from typing import Optional, Tuple
+
+import numpy as np
+
+MACD = namedtuple("MACD", ["macd", "signal", "histogram"])
+Bands = namedtuple("Bands", ["middle", "upper", "lower"])
+
+# Largest weight growth allowed inside one EMA block. The scaled prefix sums
+# are multiplied back down before use, so the error stays relative to the
+# inputs; the bound only has to keep them far from float64 overflow
+_EMA_MAX_GROWTH = 1e100
+
+# Bars per block for rolling standard deviations (see _rolling_std)
+_STD_BLOCK = 4096
+
+
+def _as_float(x) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+
+def sma(x, n: int) -> np.ndarray:
+    """
+    Simple moving average over `n` bars (prefix sums, O(N)).
+    """
+    x = _as_float(x)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] < n:
+        return out
+    # Re-center on the first value so the prefix sums stay small
+    anchor = x[..., :1]
+    c = np.cumsum(x - anchor, axis=-1)
+    window = c[..., n - 1:].copy()
+    window[..., 1:] -= c[..., :-n]
+    out[..., n - 1:] = window / n + anchor
+    return out
+
+
+def ema_alpha(x, alpha: float) -> np.ndarray:
+    """
+    Exponential moving average with smoothing factor `alpha`, y[0] = x[0].
+
+    The recursion y[t] = alpha * x[t] + (1 - alpha) * y[t-1] is evaluated
+    blockwise: inside a block it is a prefix sum of x scaled by growing
+    powers of 1 / (1 - alpha), and only the carry between blocks is
+    sequential, so there is one NumPy pass per block instead of a Python
+    step per bar.
+    """
+    x = _as_float(x)
+    length = x.shape[-1]
+    out = np.empty(x.shape)
+    if length == 0:
+        return out
+    decay = 1.0 - alpha
+    if decay <= 0:
+        out[...] = x
+        return out
+    block = max(1, min(length, int(math.log(_EMA_MAX_GROWTH) / -math.log(decay))))
+    powers = decay ** np.arange(1, block + 1)      # decay^(t+1) for t in the block
+    inverse = decay ** -np.arange(block)           # decay^-k
+
+    prev = x[..., 0]
+    for start in range(0, length, block):
+        end = min(start + block, length)
+        size = end - start
+        chunk = x[..., start:end]
+        # y[t] = decay^(t+1) * prev + alpha * decay^t * sum_{k<=t} x[k] * decay^-k
+        acc = np.cumsum(chunk * inverse[:size], axis=-1)
+        y = powers[:size] * prev[..., None] + alpha * (powers[:size] / decay) * acc
+        out[..., start:end] = y
+        prev = y[..., -1]
+    return out
+
+
+def ema(x, n: int) -> np.ndarray:
+    """
+    Exponential moving average with span `n` (alpha = 2 / (n + 1)).
+    """
+    return ema_alpha(x, 2.0 / (n + 1))
+
+
+def rsi(close, n: int = 14) -> np.ndarray:
+    """
+    Relative strength index with Wilder smoothing (alpha = 1 / n).
+    """
+    close = _as_float(close)
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] <= n:
+        return out
+    delta = np.diff(close, axis=-1)
+    gain = ema_alpha(np.clip(delta, 0, None), 1.0 / n)
+    loss = ema_alpha(np.clip(-delta, 0, None), 1.0 / n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = 100.0 - 100.0 / (1.0 + gain / loss)
+    value = np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), value)
+    out[..., n:] = value[..., n - 1:]
+    return out
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9) -> MACD:
+    """
+    MACD line (EMA fast - EMA slow), its signal EMA and the histogram.
+    """
+    close = _as_float(close)
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return MACD(line, signal_line, line - signal_line)
+
+
+def _rolling_std(x: np.ndarray, n: int) -> np.ndarray:
+    """
+    Population standard deviation of every n-bar window, in O(N).
+
+    Prefix sums of x and x^2 are taken per block of _STD_BLOCK windows,
+    each re-centered on its own first value, so prices that drift far over
+    a long history don't cancel catastrophically.
+    """
+    length = x.shape[-1]
+    out = np.full(x.shape, np.nan)
+    windows = length - n + 1
+    if windows <= 0:
+        return out
+    block = min(_STD_BLOCK, windows)
+    blocks = -(-windows // block)
+    padded_length = blocks * block + n - 1
+    pad = [(0, 0)] * (x.ndim - 1) + [(0, padded_length - length)]
+    padded = np.pad(x, pad, mode="edge")
+    # (..., blocks, block + n - 1) overlapping segments, one per block of windows
+    segments = np.lib.stride_tricks.sliding_window_view(padded, block + n - 1, axis=-1)[..., ::block, :]
+    d = segments - segments[..., :1]
+    zeros = np.zeros(d.shape[:-1] + (1,))
+    c1 = np.concatenate([zeros, np.cumsum(d, axis=-1)], axis=-1)
+    c2 = np.concatenate([zeros, np.cumsum(d * d, axis=-1)], axis=-1)
+    mean = (c1[..., n:n + block] - c1[..., :block]) / n
+    var = (c2[..., n:n + block] - c2[..., :block]) / n - mean * mean
+    std = np.sqrt(np.maximum(var, 0.0)).reshape(x.shape[:-1] + (blocks * block,))
+    out[..., n - 1:] = std[..., :windows]
+    return out
+
+
+def bollinger(close, n: int = 20, k: float = 2.0) -> Bands:
+    """
+    Bollinger bands: SMA(n) +/- k population standard deviations.
+    """
+    close = _as_float(close)
+    middle = sma(close, n)
+    std = _rolling_std(close, n)
+    return Bands(middle, middle + k * std, middle - k * std)
+
+
+def true_range(high, low, close) -> np.ndarray:
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    prev_close = np.concatenate([close[..., :1], close[..., :-1]], axis=-1)
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(high, low, close, n: int = 14) -> np.ndarray:
+    """
+    Average true range with Wilder smoothing (alpha = 1 / n).
+    """
+    out = ema_alpha(true_range(high, low, close), 1.0 / n)
+    out[..., : n - 1] = np.nan
+    return out
+
+
+def vwap(high, low, close, volume, n: Optional[int] = None) -> np.ndarray:
+    """
+    Volume-weighted average of the typical price, cumulative or over the last `n` bars.
+    """
+    typical = (_as_float(high) + _as_float(low) + _as_float(close)) / 3.0
+    volume = _as_float(volume)
+    pv = np.cumsum(typical * volume, axis=-1)
+    vol = np.cumsum(volume, axis=-1)
+    if n is not None:
+        pv[..., n:] = pv[..., n:] - pv[..., :-n].copy()
+        vol[..., n:] = vol[..., n:] - vol[..., :-n].copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = pv / vol
+    if n is not None:
+        out[..., : n - 1] = np.nan
+    return out
+
+
+# --- incremental state -------------------------------------------------
+
+
+class SMAState:
+    """
+    Rolling SMA updated in O(1) per bar.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.count = 0
+        self._buffer = None
+        self._index = 0
+        self._sum = 0.0
+
+    def update(self, x):
+        x = _as_float(x)
+        if self._buffer is None:
+            self._buffer = np.zeros((self.n,) + x.shape)
+        self._sum = self._sum + x - self._buffer[self._index]
+        self._buffer[self._index] = x
+        self._index = (self._index + 1) % self.n
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self):
+        if self.count < self.n:
+            return np.full(np.shape(self._sum), np.nan) if np.ndim(self._sum) else math.nan
+        return self._sum / self.n
+
+
+class EMAState:
+    """
+    EMA updated in O(1) per bar; matches ema() / ema_alpha().
+    """
+
+    def __init__(self, n: Optional[int] = None, alpha: Optional[float] = None):
+        self.alpha = alpha if alpha is not None else 2.0 / (n + 1)
+        self.value = None
+
+    def update(self, x):
+        x = _as_float(x)
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class RSIState:
+    """
+    Wilder RSI updated in O(1) per bar; matches rsi().
+    """
+
+    def __init__(self, n: int = 14):
+        self.n = n
+        self.count = 0
+        self._prev = None
+        self._gain = EMAState(alpha=1.0 / n)
+        self._loss = EMAState(alpha=1.0 / n)
+        self.value = math.nan
+
+    def update(self, close):
+        close = _as_float(close)
+        if self._prev is not None:
+            delta = close - self._prev
+            gain = self._gain.update(np.clip(delta, 0, None))
+            loss = self._loss.update(np.clip(-delta, 0, None))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                value = 100.0 - 100.0 / (1.0 + gain / loss)
+            value = np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), value)
+            self.value = value if self.count >= self.n else np.full(np.shape(value), np.nan)
+        self._prev = close
+        self.count += 1
+        return self.value
+
+
+class MACDState:
+    """
+    MACD updated in O(1) per bar; matches macd().
+    """
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self._fast, self._slow, self._signal = EMAState(fast), EMAState(slow), EMAState(signal)
+        self.value = None
+
+    def update(self, close) -> MACD:
+        line = self._fast.update(close) - self._slow.update(close)
+        signal_line = self._signal.update(line)
+        self.value = MACD(line, signal_line, line - signal_line)
+        return self.value
+
+
+class BollingerState:
+    """
+    Bollinger bands updated in O(1) per bar from running sums; matches bollinger().
+    """
+
+    def __init__(self, n: int = 20, k: float = 2.0):
+        self.n = n
+        self.k = k
+        self.count = 0
+        self._buffer = None
+        self._index = 0
+        self._anchor = None
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+    def update(self, close) -> Bands:
+        close = _as_float(close)
+        if self._buffer is None:
+            self._anchor = close
+            self._buffer = np.zeros((self.n,) + close.shape)
+        x = close - self._anchor  # re-centered to keep the sums well conditioned
+        old = self._buffer[self._index]
+        self._sum = self._sum + x - old
+        self._sumsq = self._sumsq + x * x - old * old
+        self._buffer[self._index] = x
+        self._index = (self._index + 1) % self.n
+        self.count += 1
+        if self.count < self.n:
+            nan = np.full(close.shape, np.nan)
+            return Bands(nan, nan, nan)
+        mean = self._sum / self.n
+        std = np.sqrt(np.maximum(self._sumsq / self.n - mean * mean, 0.0))
+        middle = mean + self._anchor
+        return Bands(middle, middle + self.k * std, middle - self.k * std)
+
+
+class ATRState:
+    """
+    Wilder ATR updated in O(1) per bar; matches atr().
+    """
+
+    def __init__(self, n: int = 14):
+        self.n = n
+        self.count = 0
+        self._prev_close = None
+        self._ema = EMAState(alpha=1.0 / n)
+
+    def update(self, high, low, close):
+        high, low, close = _as_float(high), _as_float(low), _as_float(close)
+        prev = close if self._prev_close is None else self._prev_close
+        tr = np.maximum(high - low, np.maximum(np.abs(high - prev), np.abs(low - prev)))
+        self._prev_close = close
+        value = self._ema.update(tr)
+        self.count += 1
+        return value if self.count >= self.n else np.full(np.shape(value), np.nan)
+
+
+class VWAPState:
+    """
+    Cumulative VWAP updated in O(1) per bar; matches vwap() without a window.
+    """
+
+    def __init__(self):
+        self._pv = 0.0
+        self._volume = 0.0
+
+    def update(self, high, low, close, volume):
+        volume = _as_float(volume)
+        self._pv = self._pv + (_as_float(high) + _as_float(low) + _as_float(close)) / 3.0 * volume
+        self._volume = self._volume + volume
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self._pv / self._volume
+
+
+def trend_summary(close) -> dict:
+    """
+    Latest indicator readings for a close series, used by the analysis agents.
+
+    Returns:
+        Dict with last, sma_20, ema_12, ema_26, rsi_14, macd, macd_signal
+        (NaN where there is not enough history)
+    """
+    close = _as_float(close)
+    line, signal_line, _ = macd(close)
+    return {
+        "last": float(close[-1]),
+        "sma_20": float(sma(close, min(20, len(close)))[-1]),
+        "ema_12": float(ema(close, 12)[-1]),
+        "ema_26": float(ema(close, 26)[-1]),
+        "rsi_14": float(rsi(close, 14)[-1]),
+        "macd": float(line[-1]),
+        "macd_signal": float(signal_line[-1]),
+    }
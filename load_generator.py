@@ -0,0 +1,227 @@
+# load_generator.py
+"""
+Open-loop load generator driving TradingApp services against the mock
+exchange (or any CoinDCX-compatible base URL) at a target request rate.
+
+Latency is measured from each request's scheduled start, so a slow server
+shows up as queueing instead of silently lowering the offered load.
+
+Usage:
+    python load_generator.py --rps 200 --duration 10 [--latency-ms 20 --jitter-ms 5 --error-rate 0.01]
+    python load_generator.py --base-url http://127.0.0.1:8001 --rps 100 --mix ticker=50,create=25,cancel=25
+"""
+import argparse
+import collections
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from main import TradingApp
+from market_metadata import MarketMetadataCache, OrderValidationError
+from mock_exchange import MockExchangeConfig, start_mock_exchange
+from order_ledger import OrderLedger
+from rate_limiter import RequestScheduler
+from singleflight import SingleFlight
+from transport import HttpTransport
+
+DEFAULT_MIX = "ticker=30,orderbook=20,trades=15,balances=10,create=10,status=10,cancel=5"
+MARKETS = ["BTCINR", "ETHINR", "XRPINR", "SOLINR", "BTCUSDT", "ETHUSDT"]
+
+
+class LoadGenerator:
+    """
+    Issues a weighted mix of service calls at a fixed rate and records latencies.
+    """
+
+    def __init__(self, app: TradingApp, mix: dict, seed: int = None):
+        self.app = app
+        self.ops = list(mix)
+        self.weights = [mix[op] for op in self.ops]
+        self.random = random.Random(seed)
+        self.open_orders = collections.deque(maxlen=10000)
+        self.lock = threading.Lock()
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.Counter()
+        self.rejected = collections.Counter()  # refused by local pre-validation, never sent
+        self.mids = {}
+        self.mids_at = 0.0
+
+    def _mid(self, market: str) -> float:
+        # Ticker mids, refreshed every few seconds rather than per order
+        if time.time() - self.mids_at > 5.0:
+            with self.lock:
+                if time.time() - self.mids_at > 5.0:
+                    mids = {}
+                    for row in self.app.market_service.get_ticker_data():
+                        bid, ask = float(row.get("bid") or 0), float(row.get("ask") or 0)
+                        mids[row["market"]] = (bid + ask) / 2 if bid > 0 and ask > 0 else float(row["last_price"])
+                    self.mids, self.mids_at = mids, time.time()
+        return self.mids[market]
+
+    def _resting_order(self, market: str, side: str):
+        """
+        A price 10% away from the mid, so the order rests inside the market's
+        price limits, and the smallest quantity that meets its minimums.
+        """
+        mid = self._mid(market)
+        price = mid * (0.9 if side == "buy" else 1.1)
+        quantity = 0.001
+        rules = self.app.market_service.get_market_rules(market)
+        if rules is not None:
+            price = float(rules.round_price(price))
+            minimum = float(rules.min_quantity or 0)
+            if rules.min_notional:
+                minimum = max(minimum, float(rules.min_notional) / price)
+            step = float(rules.step or 0) or 10 ** -(rules.quantity_precision or 8)
+            # Round up to the step, with headroom so rounding down stays above the minimums
+            quantity = math.ceil(minimum * 1.05 / step) * step
+        return price, quantity
+
+    def _run_op(self, op: str):
+        market = self.random.choice(MARKETS)
+        market_service = self.app.market_service
+        order_service = self.app.order_service
+
+        if op == "ticker":
+            market_service.get_ticker_dataframe()
+        elif op == "orderbook":
+            market_service.get_order_book(market)
+        elif op == "trades":
+            market_service.get_trade_history(market)
+        elif op == "balances":
+            self.app.api_service.get_balance()
+        elif op == "create":
+            side = self.random.choice(["buy", "sell"])
+            price, quantity = self._resting_order(market, side)
+            response = order_service.place_limit_order(market, side, price, quantity)
+            for order in response.get("orders", []):
+                self.open_orders.append(order["id"])
+        elif op in ("status", "cancel"):
+            try:
+                order_id = self.open_orders.popleft() if op == "cancel" else self.open_orders[-1]
+            except IndexError:
+                return False  # nothing to act on yet
+            if op == "cancel":
+                order_service.cancel_order(order_id)
+            else:
+                order_service.get_order_status(order_id)
+        return True
+
+    def _fire(self, op: str, scheduled: float):
+        rejected = failed = False
+        try:
+            if self._run_op(op) is False:
+                return
+        except OrderValidationError:
+            rejected = True
+        except Exception:
+            failed = True
+        latency = time.perf_counter() - scheduled
+        with self.lock:
+            self.latencies[op].append(latency)
+            if rejected:
+                self.rejected[op] += 1
+            elif failed:
+                self.errors[op] += 1
+
+    def run(self, rps: float, duration: float, concurrency: int) -> float:
+        """
+        Offer `rps` requests per second for `duration` seconds.
+
+        Returns:
+            Wall-clock seconds until all requests completed
+        """
+        interval = 1.0 / rps
+        total = int(rps * duration)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for i in range(total):
+                scheduled = start + i * interval
+                sleep_for = scheduled - time.perf_counter()
+                if sleep_for > 0:
+                    time.sleep(sleep_for)
+                op = self.random.choices(self.ops, self.weights)[0]
+                pool.submit(self._fire, op, scheduled)
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float) -> None:
+        def pct(values, p):
+            return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+        completed = sum(len(v) for v in self.latencies.values())
+        print(f"\n{completed} requests in {elapsed:.2f}s -> {completed / elapsed:.1f} req/s, "
+              f"{sum(self.errors.values())} errors, {sum(self.rejected.values())} rejected locally\n")
+        print(f"{'operation':<10} {'count':>7} {'errors':>7} {'rejected':>9} {'p50 ms':>9} {'p95 ms':>9} "
+              f"{'p99 ms':>9} {'max ms':>9}")
+        for op in self.ops:
+            values = sorted(self.latencies.get(op, []))
+            if not values:
+                continue
+            print(f"{op:<10} {len(values):>7} {self.errors[op]:>7} {self.rejected[op]:>9} {pct(values, 0.50):>9.2f} "
+                  f"{pct(values, 0.95):>9.2f} {pct(values, 0.99):>9.2f} {values[-1] * 1000:>9.2f}")
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        op, weight = part.split("=")
+        mix[op.strip()] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="target exchange; an in-process mock exchange is started if omitted")
+    parser.add_argument("--api-key", default="mock-key")
+    parser.add_argument("--api-secret", default="mock-secret")
+    parser.add_argument("--rps", type=float, default=100.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of offered load")
+    parser.add_argument("--concurrency", type=int, default=64, help="maximum requests in flight")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation=weight list")
+    parser.add_argument("--pace", action="store_true", help="keep the client-side rate limiter on")
+    parser.add_argument("--coalesce-ttl", type=float, default=0.0, help="single-flight freshness window")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mock exchange latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="mock exchange jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="mock exchange error rate")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, _ = start_mock_exchange(MockExchangeConfig(
+            api_key=args.api_key,
+            api_secret=args.api_secret,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        ))
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        print(f"Started mock exchange at {base_url}")
+
+    app = TradingApp(
+        args.api_key,
+        args.api_secret,
+        transport=HttpTransport(pool_size=args.concurrency, max_retries=0),
+        base_url=base_url,
+        scheduler=RequestScheduler(max_in_flight=args.concurrency) if args.pace else RequestScheduler.unlimited(),
+        single_flight=SingleFlight(ttl=args.coalesce_ttl),
+        # Rules and orders of this run only, never the shared on-disk caches
+        market_metadata=MarketMetadataCache(),
+        order_ledger=OrderLedger(":memory:"),
+    )
+
+    generator = LoadGenerator(app, parse_mix(args.mix), seed=args.seed)
+    print(f"Offering {args.rps:.0f} req/s for {args.duration:.0f}s against {base_url} ...")
+    elapsed = generator.run(args.rps, args.duration, args.concurrency)
+    generator.report(elapsed)
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 # main.py
+import asyncio
 import os
 import sys
 from dotenv import load_dotenv
@@ -6,9 +7,16 @@ from pathlib import Path
 
 # Import services
 from api_service import CoinDCXApiService
+from transport import HttpTransport
 from market_service import MarketService
 from account_service import AccountService
 from order_service import OrderService
+from async_api_service import AsyncTradingApp
+from metrics import start_metrics_server
+from market_stream import feed_from_url
+from tick_store import TickStore
+from order_manager import OrderManager
+from risk_engine import RiskEngine
 
 class TradingApp:
     """
@@ -16,22 +24,84 @@ class TradingApp:
     Integrates all microservices and provides a user interface.
     """
     
-    def __init__(self, api_key: str, api_secret: str):
+    def __init__(self, api_key: str, api_secret: str, transport: HttpTransport = None, market_metadata=None,
+                 order_ledger=None, **api_options):
         """
         Initialize the trading application with all required services.
         
         Args:
             api_key: CoinDCX API key
             api_secret: CoinDCX API secret
+            transport: Optional HttpTransport; by default the process-wide
+                connection pool is shared by all services
+            market_metadata: Optional MarketMetadataCache shared by the market
+                and order services; by default the one for the base URL
+            order_ledger: Optional OrderLedger; by default the one for the
+                account and base URL
+            **api_options: Extra CoinDCXApiService options (base_url, scheduler, ...)
         """
-        # Initialize services
-        self.api_service = CoinDCXApiService(api_key, api_secret)
-        self.market_service = MarketService()
+        # Initialize services (all of them share one connection pool)
+        self.api_service = CoinDCXApiService(api_key, api_secret, transport=transport, **api_options)
+        self.market_service = MarketService(self.api_service, market_metadata=market_metadata)
         self.account_service = AccountService(self.api_service, self.market_service)
-        self.order_service = OrderService(self.api_service)
+        self.order_service = OrderService(self.api_service, market_metadata=self.market_service.market_metadata,
+                                          ledger=order_ledger)
         # self.market_service = MarketService()
         # self.account_service = AccountService(api_key, api_secret)
         # self.order_service = OrderService(api_key, api_secret)
+
+    def start_order_stream(self, feed=None) -> OrderManager:
+        """
+        Keep a local order table from the private order stream, so active
+        orders and order status no longer poll the API.
+        
+        Args:
+            feed: Feed for order_manager.OrderManager (defaults to the
+                authenticated CoinDCX socket)
+            
+        Returns:
+            The running OrderManager
+        """
+        if self.order_service.order_manager is None:
+            self.order_service.order_manager = OrderManager(self.order_service, feed)
+        return self.order_service.order_manager.start()
+
+    def enable_risk_engine(self, **limits) -> RiskEngine:
+        """
+        Check every order against local risk limits (available balance,
+        open order value per market, open order count, price band around
+        the mid) before it is sent.
+        
+        Args:
+            **limits: risk_engine.RiskEngine options (max_open_orders,
+                max_notional, default_max_notional, price_band, ...)
+            
+        Returns:
+            The RiskEngine in front of the order service
+        """
+        if self.order_service.risk_engine is None:
+            self.order_service.risk_engine = RiskEngine(
+                self.account_service, self.market_service, self.order_service, **limits
+            )
+        return self.order_service.risk_engine
+
+    def refresh(self, markets=(), user_id=None) -> dict:
+        """
+        Fetch balances, active orders, order history and the order books of
+        the given markets concurrently instead of one call after another.
+        
+        Args:
+            markets: Markets whose order books should be fetched
+            user_id: User identifier used for caching
+            
+        Returns:
+            Dictionary with balances, active_orders, order_history and order_books
+        """
+        async_app = AsyncTradingApp(self)
+        try:
+            return asyncio.run(async_app.refresh(markets, user_id))
+        finally:
+            async_app.close()
     
         
     def main_menu(self) -> None:
@@ -171,7 +241,28 @@ if __name__ == "__main__":
     # Load API credentials from .env file
     api_key, api_secret = load_credentials()
     print("API credentials loaded successfully from .env file.")
+
+    # Optional Prometheus endpoint, e.g. COINDCX_METRICS_PORT=9108
+    if os.getenv("COINDCX_METRICS_PORT"):
+        start_metrics_server(int(os.getenv("COINDCX_METRICS_PORT")))
     
     # Initialize and run the trading app
     app = TradingApp(api_key, api_secret)
+
+    # Optional tick history on disk, e.g. COINDCX_TICK_STORE=tick_data
+    if os.getenv("COINDCX_TICK_STORE"):
+        app.market_service.set_tick_store(TickStore(os.getenv("COINDCX_TICK_STORE")).start())
+
+    # Optional streaming market data, e.g. COINDCX_STREAM=1 or COINDCX_STREAM_URL=ws://127.0.0.1:8002
+    if os.getenv("COINDCX_STREAM") or os.getenv("COINDCX_STREAM_URL"):
+        app.market_service.start_stream(feed_from_url(os.getenv("COINDCX_STREAM_URL")))
+
+    # Optional local order table from the private order stream, e.g. COINDCX_ORDER_STREAM=1
+    if os.getenv("COINDCX_ORDER_STREAM"):
+        app.start_order_stream()
+
+    # Optional pre-trade risk checks, e.g. COINDCX_RISK_ENGINE=1
+    if os.getenv("COINDCX_RISK_ENGINE"):
+        app.enable_risk_engine()
+
     app.main_menu()
\ No newline at end of file
@@ -0,0 +1,187 @@
+# market_index.py
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ticker_snapshot import quote_currency
+
+
+def split_market(symbol: str, details: Optional[Dict] = None) -> Tuple[str, str]:
+    """
+    Split a market symbol into (base, quote), preferring markets_details fields.
+
+    Args:
+        symbol: Market symbol, e.g. "ETHWINR"
+        details: Optional markets_details entry for the symbol
+    """
+    if details:
+        base = details.get("target_currency_short_name")
+        quote = details.get("base_currency_short_name")
+        if base and quote:
+            return base.upper(), quote.upper()
+    quote = quote_currency(symbol)
+    return (symbol[: -len(quote)], quote) if quote else (symbol, "")
+
+
+class MarketIndex:
+    """
+    Index of market symbols by base asset, quote asset and symbol prefix.
+
+    Every symbol gets a stable position. Lookups return positions (or
+    symbols) from precomputed tables: exact base/quote matches are dict
+    lookups, prefix autocomplete is two bisects on the sorted symbol list.
+    Refreshing diffs the new market list against the index and only touches
+    added and removed symbols.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        """
+        Args:
+            ttl: Seconds after which ensure_fresh reloads the market list
+        """
+        self.ttl = ttl
+        self.symbols = []        # position -> symbol (None once removed)
+        self.positions = {}      # symbol -> position
+        self.bases = {}          # position -> base asset
+        self.quotes = {}         # position -> quote asset
+        self._by_base = {}       # base -> [positions]
+        self._by_quote = {}      # quote -> [positions]
+        self._sorted = []        # (symbol, position), sorted, for prefix search
+        self.version = 0
+        self.refreshed_at = 0.0
+        self._lock = threading.RLock()
+
+    def refresh(self, markets: Iterable, details: Optional[Iterable[Dict]] = None) -> Tuple[int, int]:
+        """
+        Bring the index in line with a market list.
+
+        Args:
+            markets: Market symbols (get_market_data) or dicts with a "symbol"/"market" key
+            details: Optional markets_details entries used to split base and quote exactly
+
+        Returns:
+            Tuple of (added, removed) counts
+        """
+        symbols = set()
+        for market in markets:
+            if isinstance(market, dict):
+                market = market.get("symbol") or market.get("market") or market.get("coindcx_name")
+            if market:
+                symbols.add(market.upper())
+        details_by_symbol = {
+            (d.get("symbol") or d.get("coindcx_name") or "").upper(): d for d in (details or [])
+        }
+
+        with self._lock:
+            removed = [s for s in self.positions if s not in symbols]
+            added = sorted(s for s in symbols if s not in self.positions)
+            for symbol in removed:
+                self._remove(symbol)
+            for symbol in added:
+                self._add(symbol, details_by_symbol.get(symbol))
+            if added or removed:
+                self.version += 1
+            self.refreshed_at = time.monotonic()
+        return len(added), len(removed)
+
+    def _add(self, symbol: str, details: Optional[Dict]) -> None:
+        position = len(self.symbols)
+        base, quote = split_market(symbol, details)
+        self.symbols.append(symbol)
+        self.positions[symbol] = position
+        self.bases[position] = base
+        self.quotes[position] = quote
+        self._by_base.setdefault(base, []).append(position)
+        self._by_quote.setdefault(quote, []).append(position)
+        insort(self._sorted, (symbol, position))
+
+    def _remove(self, symbol: str) -> None:
+        position = self.positions.pop(symbol)
+        self.symbols[position] = None
+        base, quote = self.bases.pop(position), self.quotes.pop(position)
+        self._by_base[base].remove(position)
+        self._by_quote[quote].remove(position)
+        del self._sorted[bisect_left(self._sorted, (symbol, position))]
+
+    def ensure_fresh(self, load: Callable[[], Iterable]) -> "MarketIndex":
+        """
+        Reload the market list with `load()` if it is older than the TTL.
+        Only one caller reloads; a failed reload keeps the current index.
+        """
+        if self.refreshed_at and time.monotonic() - self.refreshed_at < self.ttl:
+            return self
+        with self._lock:
+            if not self.refreshed_at or time.monotonic() - self.refreshed_at >= self.ttl:
+                try:
+                    self.refresh(load())
+                except Exception as e:
+                    if not self.positions:
+                        raise
+                    print(f"[ERROR] Market index refresh failed: {e}")
+                    self.refreshed_at = time.monotonic()  # retry after the next TTL
+        return self
+
+    # --- lookups -------------------------------------------------------
+
+    def by_base(self, base: str) -> List[int]:
+        return list(self._by_base.get(base.upper(), ()))
+
+    def by_quote(self, quote: str) -> List[int]:
+        return list(self._by_quote.get(quote.upper(), ()))
+
+    def by_prefix(self, prefix: str) -> List[int]:
+        prefix = prefix.upper()
+        with self._lock:
+            start = bisect_left(self._sorted, (prefix,))
+            end = bisect_left(self._sorted, (prefix + "\uffff",))
+            return [position for _, position in self._sorted[start:end]]
+
+    def search(self, text: str = "", quote: Optional[str] = None) -> List[str]:
+        """
+        Symbols matching a coin, symbol or prefix, optionally for one quote currency.
+
+        An exact base asset ("ETH") returns only that coin's markets (not
+        "ETHW"); an exact symbol returns itself; anything else is treated as
+        a symbol prefix.
+
+        Args:
+            text: Coin, symbol or prefix (case-insensitive); empty for all markets
+            quote: Quote currency, e.g. "INR"
+        """
+        text = text.strip().upper()
+        with self._lock:
+            if not text:
+                positions = self.by_quote(quote) if quote else list(self.positions.values())
+            elif text in self._by_base and self._by_base[text]:
+                positions = self.by_base(text)
+            elif text in self.positions:
+                positions = [self.positions[text]]
+            else:
+                positions = self.by_prefix(text)
+            if quote:
+                quote = quote.upper()
+                positions = [p for p in positions if self.quotes[p] == quote]
+            return [self.symbols[p] for p in sorted(positions)]
+
+    def __contains__(self, symbol: str):
+        return symbol.upper() in self.positions
+
+    def __len__(self):
+        return len(self.positions)
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_default_market_index() -> MarketIndex:
+    """
+    Get the process-wide market index shared by every session.
+    """
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                _default_index = MarketIndex()
+    return _default_index
@@ -0,0 +1,286 @@
+# market_metadata.py
+import hashlib
+import json
+import os
+import threading
+import time
+from decimal import ROUND_DOWN, ROUND_HALF_UP, Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+from market_index import split_market
+
+
+class OrderValidationError(ValueError):
+    """
+    Raised when an order breaks a market's trading rules, before it is sent.
+    """
+
+    def __init__(self, market: str, message: str):
+        super().__init__(f"{market}: {message}")
+        self.market = market
+
+
+def _decimal(value) -> Optional[Decimal]:
+    if value is None or value == "":
+        return None
+    return Decimal(str(value))
+
+
+class MarketRules:
+    """
+    Trading rules of one market from its markets_details entry, with the
+    rounding quanta precomputed so checking an order is O(1).
+    """
+
+    __slots__ = ("symbol", "pair", "base", "quote", "status", "order_types", "price_precision",
+                 "quantity_precision", "min_quantity", "max_quantity", "min_price", "max_price",
+                 "min_notional", "step", "_price_quantum", "_quantity_quantum", "_step")
+
+    def __init__(self, details: Dict):
+        self.symbol = (details.get("symbol") or details.get("coindcx_name") or "").upper()
+        self.pair = details.get("pair")
+        self.base, self.quote = split_market(self.symbol, details)
+        self.status = details.get("status", "active")
+        self.order_types = tuple(details.get("order_types") or ())
+        self.price_precision = details.get("base_currency_precision")
+        self.quantity_precision = details.get("target_currency_precision")
+        self.min_quantity = _decimal(details.get("min_quantity"))
+        self.max_quantity = _decimal(details.get("max_quantity"))
+        self.min_price = _decimal(details.get("min_price"))
+        self.max_price = _decimal(details.get("max_price"))
+        self.min_notional = _decimal(details.get("min_notional"))
+        self.step = _decimal(details.get("step"))
+        self._price_quantum = Decimal(1).scaleb(-int(self.price_precision)) if self.price_precision is not None else None
+        self._quantity_quantum = (
+            Decimal(1).scaleb(-int(self.quantity_precision)) if self.quantity_precision is not None else None
+        )
+        self._step = self.step if self.step else None
+
+    def round_price(self, price) -> Decimal:
+        """
+        Price rounded to the market's price precision.
+        """
+        price = Decimal(str(price))
+        if self._price_quantum is not None:
+            price = price.quantize(self._price_quantum, rounding=ROUND_HALF_UP)
+        return price
+
+    def round_quantity(self, quantity) -> Decimal:
+        """
+        Quantity rounded down to the step size and quantity precision, so it
+        never exceeds what was asked for.
+        """
+        quantity = Decimal(str(quantity))
+        if self._step is not None:
+            quantity = (quantity / self._step).to_integral_value(rounding=ROUND_DOWN) * self._step
+        if self._quantity_quantum is not None:
+            quantity = quantity.quantize(self._quantity_quantum, rounding=ROUND_DOWN)
+        return quantity
+
+    def check(self, side: str, order_type: str, quantity, price=None) -> Tuple[Optional[float], float]:
+        """
+        Round an order and check it against the rules.
+
+        Args:
+            side: "buy" or "sell"
+            order_type: e.g. "limit_order" or "market_order"
+            quantity: Order quantity
+            price: Limit price (None for market orders; the notional is then not checked)
+
+        Returns:
+            Tuple of (rounded price or None, rounded quantity)
+
+        Raises:
+            OrderValidationError: If the order would be rejected by the exchange
+        """
+        if self.status != "active":
+            raise OrderValidationError(self.symbol, f"market is {self.status}")
+        if side.lower() not in ("buy", "sell"):
+            raise OrderValidationError(self.symbol, f"invalid side {side!r}")
+        if self.order_types and order_type not in self.order_types:
+            raise OrderValidationError(self.symbol, f"{order_type} not supported (allowed: {', '.join(self.order_types)})")
+
+        rounded_quantity = self.round_quantity(quantity)
+        if rounded_quantity <= 0:
+            raise OrderValidationError(self.symbol, f"quantity {quantity} rounds to zero (step {self.step})")
+        if self.min_quantity is not None and rounded_quantity < self.min_quantity:
+            raise OrderValidationError(self.symbol, f"quantity {rounded_quantity} below minimum {self.min_quantity}")
+        if self.max_quantity is not None and rounded_quantity > self.max_quantity:
+            raise OrderValidationError(self.symbol, f"quantity {rounded_quantity} above maximum {self.max_quantity}")
+
+        rounded_price = None
+        if price is not None:
+            rounded_price = self.round_price(price)
+            if rounded_price <= 0:
+                raise OrderValidationError(self.symbol, f"price {price} rounds to zero")
+            if self.min_price is not None and rounded_price < self.min_price:
+                raise OrderValidationError(self.symbol, f"price {rounded_price} below minimum {self.min_price}")
+            if self.max_price is not None and rounded_price > self.max_price:
+                raise OrderValidationError(self.symbol, f"price {rounded_price} above maximum {self.max_price}")
+            notional = rounded_price * rounded_quantity
+            if self.min_notional is not None and notional < self.min_notional:
+                raise OrderValidationError(
+                    self.symbol, f"order value {float(notional):.8g} {self.quote} below minimum {self.min_notional}"
+                )
+
+        return (float(rounded_price) if rounded_price is not None else None), float(rounded_quantity)
+
+
+class MarketMetadataCache:
+    """
+    markets_details for every market, loaded once and kept on disk.
+
+    A cold start reads the saved file instead of waiting on the API. Once
+    the data is older than `ttl` it keeps being served while one background
+    thread fetches a fresh copy; only a cache with nothing on disk loads
+    synchronously. Per-market rules are a dict lookup.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 3600.0, origin: Optional[str] = None):
+        """
+        Args:
+            path: JSON file to persist the details in (memory only if None)
+            ttl: Seconds before the details are refreshed in the background
+            origin: Exchange the details come from (its base URL); a saved
+                file written for another origin is ignored
+        """
+        self.path = path
+        self.ttl = ttl
+        self.origin = origin
+        self.fetched_at = 0.0   # wall-clock time of the data currently held
+        self._details = []
+        self._rules = {}        # symbol and pair -> MarketRules
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._read_disk = False
+
+    def _install(self, details: List[Dict], fetched_at: float) -> None:
+        rules = {}
+        for entry in details:
+            market = MarketRules(entry)
+            if market.symbol:
+                rules[market.symbol] = market
+                if market.pair:
+                    rules[market.pair] = market
+        self._details, self._rules, self.fetched_at = details, rules, fetched_at
+
+    def _load_disk(self) -> None:
+        self._read_disk = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+            if saved.get("origin") != self.origin:
+                print(f"[INFO] Ignoring market metadata {self.path} saved for {saved.get('origin')}, not {self.origin}")
+                return
+            self._install(saved["details"], float(saved["fetched_at"]))
+        except Exception as e:
+            print(f"[ERROR] Could not read market metadata {self.path}: {e}")
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"origin": self.origin, "fetched_at": self.fetched_at, "details": self._details}, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[ERROR] Could not save market metadata {self.path}: {e}")
+
+    def refresh(self, load: Callable[[], List[Dict]]) -> None:
+        """
+        Fetch the details now with `load()` and persist them.
+        """
+        details = load() or []
+        with self._lock:
+            self._install(details, time.time())
+            self._save()
+
+    def _refresh_in_background(self, load: Callable[[], List[Dict]]) -> None:
+        def run():
+            try:
+                self.refresh(load)
+            except Exception as e:
+                print(f"[ERROR] Market metadata refresh failed: {e}")
+            finally:
+                self._refreshing = False
+
+        self._refreshing = True
+        threading.Thread(target=run, name="market-metadata", daemon=True).start()
+
+    def ensure_loaded(self, load: Callable[[], List[Dict]]) -> "MarketMetadataCache":
+        """
+        Make sure details are available: from memory, else from disk, else by
+        calling `load()`. Stale details trigger a background refresh.
+        """
+        if self._rules and time.time() - self.fetched_at < self.ttl:
+            return self
+        with self._lock:
+            if not self._read_disk:
+                self._load_disk()
+            empty = not self._rules
+        if empty:
+            self.refresh(load)
+        elif time.time() - self.fetched_at >= self.ttl:
+            with self._lock:
+                if not self._refreshing:
+                    self._refresh_in_background(load)
+        return self
+
+    def details(self) -> List[Dict]:
+        """
+        All markets_details entries as last fetched.
+        """
+        return self._details
+
+    def rules(self, market: str) -> Optional[MarketRules]:
+        """
+        Rules for a market symbol ("BTCINR") or pair ("I-BTC_INR"), None if unknown.
+        """
+        return self._rules.get(market) or self._rules.get(market.upper())
+
+    def check_order(self, market: str, side: str, order_type: str, quantity, price=None) -> Tuple[Optional[float], float]:
+        """
+        Round an order and check it against its market's rules.
+
+        Returns:
+            Tuple of (rounded price or None, rounded quantity)
+
+        Raises:
+            OrderValidationError: If the market is unknown or the order breaks its rules
+        """
+        rules = self.rules(market)
+        if rules is None:
+            raise OrderValidationError(market, "unknown market")
+        return rules.check(side, order_type, quantity, price)
+
+    def __len__(self):
+        return len(self._details)
+
+
+_default_metadata = {}  # base URL -> MarketMetadataCache
+_default_metadata_lock = threading.Lock()
+
+
+def get_default_market_metadata(base_url: Optional[str] = None) -> MarketMetadataCache:
+    """
+    Get the process-wide market metadata cache for an exchange base URL.
+
+    It is persisted next to COINDCX_MARKET_METADATA (by default
+    market_metadata.json) under a name keyed by a hash of the base URL, e.g.
+    market_metadata.1a2b3c4d.json, and the file records the base URL too.
+    """
+    metadata = _default_metadata.get(base_url)
+    if metadata is None:
+        with _default_metadata_lock:
+            metadata = _default_metadata.get(base_url)
+            if metadata is None:
+                root, ext = os.path.splitext(os.getenv("COINDCX_MARKET_METADATA", "market_metadata.json"))
+                key = hashlib.sha1((base_url or "").encode()).hexdigest()[:8]
+                metadata = _default_metadata[base_url] = MarketMetadataCache(f"{root}.{key}{ext}", origin=base_url)
+    return metadata
@@ -1,43 +1,126 @@
 # market_service.py
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 import pandas as pd
-import requests
 from datetime import datetime
+from order_book import OrderBook, OrderBookManager
+from ticker_snapshot import TickerSnapshot, get_default_ticker_cache
+from market_index import MarketIndex, get_default_market_index
+from candles import CandleClient
+from trade_sync import TradeSync
+from market_metadata import MarketMetadataCache, MarketRules, get_default_market_metadata
 
 class MarketService:
     """
     Service for handling market data and operations.
     """
     
-    def __init__(self, api_service):
+    def __init__(self, api_service=None, stream=None, ticker_cache=None, market_index=None, tick_store=None,
+                 market_metadata=None):
         """
         Initialize the market service.
         
         Args:
-            api_service: An instance of CoinDCXApiService
+            api_service: An instance of CoinDCXApiService (a public-only one
+                on the shared transport is created if omitted)
+            stream: Optional market_stream.MarketStream; while it is live,
+                ticker reads are served from its table without network calls
+            ticker_cache: Optional TickerSnapshotCache; by default the
+                process-wide one is shared by all sessions
+            market_index: Optional MarketIndex used for filtering; by default
+                the process-wide one
+            tick_store: Optional tick_store.TickStore; fetched ticker snapshots
+                and new trades are queued to it for persistence
+            market_metadata: Optional MarketMetadataCache for markets_details;
+                by default the process-wide, disk-persisted one
         """
+        if api_service is None:
+            from api_service import CoinDCXApiService
+            api_service = CoinDCXApiService()
         self.api_service = api_service
-    
-    def __init__(self):
-        self.api_url = "https://api.coindcx.com/exchange/ticker"
+        self.stream = stream
+        self.ticker_cache = ticker_cache if ticker_cache is not None else get_default_ticker_cache()
+        self.market_index = market_index if market_index is not None else get_default_market_index()
+        self.tick_store = None
+        # An empty cache is falsy (it has __len__), so test for None explicitly
+        self.market_metadata = (market_metadata if market_metadata is not None
+                                else get_default_market_metadata(self.api_service.base_url))
+        self.candle_client = CandleClient(self.api_service, market_index=self.market_index,
+                                          market_rules=self.get_market_rules)
+        self.order_books = OrderBookManager(self)
+        self.trade_sync = TradeSync(self._fetch_trade_history)
+        if tick_store is not None:
+            self.set_tick_store(tick_store)
 
-    def get_ticker_dataframe(self, filter_market=""):
-        try:
-            response = requests.get(self.api_url)
-            response.raise_for_status()
-            data = response.json()
+    def set_tick_store(self, tick_store) -> None:
+        """
+        Persist fetched ticker snapshots and new trades (REST and, when
+        streaming, live) to a tick_store.TickStore from now on.
+        """
+        if tick_store is self.tick_store:
+            return
+        self.tick_store = tick_store
+        self.trade_sync.subscribe(tick_store.record_trades)
+        if self.stream is not None:
+            tick_store.attach(self.stream)
+
+    def start_stream(self, feed=None, stale_after: float = 30.0):
+        """
+        Start streaming mode: keep a live ticker table from the market socket,
+        seeded from (and falling back to) REST polling.
+
+        Args:
+            feed: Feed for market_stream.MarketStream (defaults to the CoinDCX socket)
+            stale_after: Seconds without frames before falling back to REST
 
-            df = pd.DataFrame(data)
-            df = df[df['market'].str.endswith("INR")]
+        Returns:
+            The running MarketStream
+        """
+        from market_stream import MarketStream
+
+        if self.stream is None:
+            self.stream = MarketStream(feed, seed=self._get_rest_ticker_data, stale_after=stale_after)
+            self.order_books.attach(self.stream)
+            if self.tick_store is not None:
+                self.tick_store.attach(self.stream)
+        return self.stream.start()
+
+    def stop_stream(self) -> None:
+        if self.stream is not None:
+            self.stream.stop()
+
+    def get_ticker_snapshot(self) -> TickerSnapshot:
+        """
+        Get the shared, typed ticker snapshot: from the live table while the
+        stream is live (rebuilt when it changes), else from REST with a TTL.
+        
+        Returns:
+            TickerSnapshot with float64 numeric and categorical market/quote columns
+        """
+        if self.stream is not None and self.stream.is_live:
+            table = self.stream.table
+            return self.ticker_cache.get(("stream", id(table)), table.snapshot, version=table.version)
+        return self.ticker_cache.get(("rest", self.api_service.base_url), self._get_rest_ticker_data)
 
-            if filter_market:
-                filter_market = filter_market.upper()
-                df = df[df['market'].str.contains(filter_market)]
+    def get_market_index(self) -> Optional[MarketIndex]:
+        """
+        Get the market symbol index, reloading the market list once its TTL
+        has passed.
+        
+        Returns:
+            The MarketIndex, or None if the market list could not be loaded
+        """
+        try:
+            return self.market_index.ensure_fresh(self.get_market_data)
+        except Exception as e:
+            print(f"[ERROR] Market index load failed: {e}")
+            return None
 
-            df = df[["market", "last_price", "high", "low", "volume", "change_24_hour"]]
-            df.columns = ["Market", "Last Price", "High", "Low", "Volume", "Change %"]
+    def get_ticker_dataframe(self, filter_market="", quote="INR"):
+        try:
+            df = self.get_ticker_snapshot().view(quote, filter_market, index=self.get_market_index())
 
-            return df
+            # Callers may modify the frame, never hand out the shared one
+            return df.copy()
 
         except Exception as e:
             print(f"[ERROR] Market data fetch failed: {e}")
@@ -77,15 +160,49 @@ class MarketService:
         endpoint = "/exchange/v1/markets"
         return self.api_service.make_public_request(endpoint)
     
+    def get_market_details(self) -> List[Dict]:
+        """
+        Get trading rules (precision, limits, step size) for all markets from
+        the metadata cache, which is refreshed in the background once stale.
+        
+        Returns:
+            List of markets_details entries
+        """
+        return self.market_metadata.ensure_loaded(self._fetch_market_details).details()
+
+    def get_market_rules(self, market: str) -> Optional[MarketRules]:
+        """
+        Get the trading rules of one market.
+        
+        Args:
+            market: Market identifier (e.g., "BTCINR") or pair (e.g., "I-BTC_INR")
+            
+        Returns:
+            MarketRules, or None if the market is unknown
+        """
+        return self.market_metadata.ensure_loaded(self._fetch_market_details).rules(market)
+
+    def _fetch_market_details(self) -> List[Dict]:
+        endpoint = "/exchange/v1/markets_details"
+        return self.api_service.make_public_request(endpoint)
+    
     def get_ticker_data(self) -> Dict:
         """
-        Get ticker data for all symbols.
+        Get ticker data for all symbols (from the live table in streaming mode).
         
         Returns:
             Dictionary of ticker data
         """
+        if self.stream is not None and self.stream.is_live:
+            return self.stream.table.snapshot()
+        return self._get_rest_ticker_data()
+
+    def _get_rest_ticker_data(self) -> List[Dict]:
         endpoint = "/exchange/ticker"
-        return self.api_service.make_public_request(endpoint)
+        data = self.api_service.make_public_request(endpoint)
+        if self.tick_store is not None:
+            self.tick_store.record_tickers(data)
+        return data
     
     # def display_ticker_table(self, filter_market: Optional[str] = None) -> None:
     #     """
@@ -120,24 +237,20 @@ class MarketService:
         Args:
             filter_market: Optionally filter by market (e.g., "BTC", "ETH")
         """
-        ticker_data = self.get_ticker_data()
-        
-        df = pd.DataFrame(ticker_data)
+        try:
+            snapshot = self.get_ticker_snapshot()
+        except Exception as e:
+            print(f"[ERROR] Market data fetch failed: {e}")
+            return
 
-        if df.empty:
+        if len(snapshot) == 0:
             print("No ticker data available.")
             return
 
-        if filter_market:
-            df = df[df['market'].str.contains(filter_market, case=False)]
-
         try:
-            # Select and rename columns
-            display_df = df[['market', 'last_price', 'high', 'low', 'volume', 'change_24_hour']].copy()
-            display_df.columns = ['Market', 'Last Price', 'High', 'Low', 'Volume', '24h Change (%)']
-
-            # Convert to float safely
-            display_df['24h Change (%)'] = pd.to_numeric(display_df['24h Change (%)'], errors='coerce')
+            # Already typed; only the change column needs formatting
+            display_df = snapshot.view(None, filter_market or "", index=self.get_market_index())
+            display_df = display_df.rename(columns={'Change %': '24h Change (%)'})
             display_df['24h Change (%)'] = display_df['24h Change (%)'].map(lambda x: f"{x:.2f}%" if pd.notnull(x) else "N/A")
 
             print(display_df.to_string(index=False))
@@ -161,20 +274,73 @@ class MarketService:
         endpoint = "/market_data/orderbook"
         params = {"pair": market}
         return self.api_service.make_public_request(endpoint, params=params)
+
+    def get_candles(self, market: str, interval: str = "1m", start=None, end=None) -> pd.DataFrame:
+        """
+        Get historical OHLCV candles, paging across long ranges and fetching
+        only what the local candle cache is missing.
+        
+        Args:
+            market: Market identifier (e.g., "BTCINR") or pair (e.g., "I-BTC_INR")
+            interval: Candle interval (1m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 1d, 3d, 1w)
+            start: Range start as datetime or epoch (s or ms); defaults to 1000 candles back
+            end: Range end as datetime or epoch (s or ms); defaults to now
+            
+        Returns:
+            DataFrame indexed by open time with open, high, low, close, volume
+        """
+        return self.candle_client.get_candles(market, interval, start, end)
+
+    def get_live_order_book(self, market: str, refresh: bool = False) -> OrderBook:
+        """
+        Get the maintained order book for a market (sorted, with best bid/ask,
+        spread, mid price and cumulative depth), loading a snapshot on first use.
+        
+        Args:
+            market: Market identifier (e.g., "BTCINR")
+            refresh: Reload the snapshot from REST
+            
+        Returns:
+            OrderBook kept current by depth updates in streaming mode
+        """
+        return self.order_books.get(market, refresh=refresh)
     
-    def get_trade_history(self, market: str) -> List[Dict]:
+    def get_trade_history(self, market: str, limit: Optional[int] = None) -> List[Dict]:
         """
-        Get recent trades for a specific market.
+        Get recent trades for a specific market. The page also advances the
+        market's trade sync cursor, so subscribers only see the new trades.
         
         Args:
             market: Market identifier (e.g., "BTCINR")
+            limit: Optional number of trades to return (exchange default if omitted)
             
         Returns:
             Recent trade data
         """
+        trades = self._fetch_trade_history(market, limit)
+        self.trade_sync.ingest(market, trades, limit)
+        return trades
+
+    def _fetch_trade_history(self, market: str, limit: Optional[int] = None) -> List[Dict]:
         endpoint = "/market_data/trade_history"
         params = {"pair": market}
-        return self.api_service.make_public_request(endpoint, params=params)
+        if limit:
+            params["limit"] = limit
+        return self.api_service.make_public_request(endpoint, params=params) or []
+
+    def sync_trades(self, markets: Iterable[str]) -> Dict[str, List[Dict]]:
+        """
+        Fetch only the trades not seen before for each market. Request sizes
+        follow each market's trade rate, and new trades are passed to the
+        trade sync's subscribers (e.g. the tick store).
+        
+        Args:
+            markets: Market identifiers (e.g., ["BTCINR", "ETHINR"])
+            
+        Returns:
+            Dict of market -> new trades, oldest first
+        """
+        return self.trade_sync.poll_many(markets)
     
 
     # def get_ticker_dataframe(self, filter_market=""):
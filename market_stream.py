@@ -0,0 +1,470 @@
+# market_stream.py
+import base64
+import hashlib
+import json
+import os
+import socket
+import ssl
+import struct
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+
+def pair_to_market(pair: str) -> str:
+    """
+    Convert a CoinDCX socket pair ("B-BTC_USDT", "I-BTC_INR") to a ticker market ("BTCUSDT").
+    """
+    if "-" in pair:
+        pair = pair.split("-", 1)[1]
+    return pair.replace("_", "")
+
+
+def _decode(data):
+    """
+    Socket payloads arrive as dicts, JSON strings, or {"data": "<JSON string>"}.
+    """
+    if isinstance(data, (str, bytes)):
+        data = json.loads(data)
+    if isinstance(data, dict) and isinstance(data.get("data"), (str, bytes)):
+        data = json.loads(data["data"])
+    return data
+
+
+WS_CONTINUATION, WS_TEXT, WS_CLOSE, WS_PING, WS_PONG = 0x0, 0x1, 0x8, 0x9, 0xA
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def ws_accept_key(key: str) -> str:
+    """
+    Sec-WebSocket-Accept value for a client's Sec-WebSocket-Key.
+    """
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+def _recv_exact(sock: socket.socket, size: int, stop: Optional[threading.Event] = None) -> Optional[bytes]:
+    buf = b""
+    while len(buf) < size:
+        try:
+            chunk = sock.recv(size - len(buf))
+        except socket.timeout:
+            if stop is not None and stop.is_set():
+                return None
+            continue
+        if not chunk:
+            raise ConnectionError("WebSocket closed by peer")
+        buf += chunk
+    return buf
+
+
+def read_ws_frame(sock: socket.socket, stop: Optional[threading.Event] = None):
+    """
+    Read one WebSocket frame.
+
+    Returns:
+        Tuple of (fin, opcode, payload), or None if `stop` was set while waiting
+    """
+    header = _recv_exact(sock, 2, stop)
+    if header is None:
+        return None
+    fin, opcode = header[0] & 0x80, header[0] & 0x0F
+    masked, size = header[1] & 0x80, header[1] & 0x7F
+    if size == 126:
+        size = struct.unpack("!H", _recv_exact(sock, 2))[0]
+    elif size == 127:
+        size = struct.unpack("!Q", _recv_exact(sock, 8))[0]
+    mask = _recv_exact(sock, 4) if masked else None
+    payload = _recv_exact(sock, size) if size else b""
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return bool(fin), opcode, payload
+
+
+def send_ws_frame(sock: socket.socket, opcode: int, payload: bytes, mask: bool = False) -> None:
+    """
+    Send one unfragmented WebSocket frame (clients must mask, servers must not).
+    """
+    header = bytes([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    size = len(payload)
+    if size < 126:
+        header += bytes([mask_bit | size])
+    elif size < 1 << 16:
+        header += bytes([mask_bit | 126]) + struct.pack("!H", size)
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack("!Q", size)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    sock.sendall(header + payload)
+
+
+class LiveTickerTable:
+    """
+    In-memory ticker table kept up to date from the socket feed.
+
+    Rows have the same shape as /exchange/ticker entries, so REST consumers
+    can read them unchanged.
+    """
+
+    def __init__(self):
+        self._rows = {}     # market -> ticker row
+        self._opens = {}    # market -> 24h open price derived from the seed
+        self._lock = threading.Lock()
+        self.version = 0
+        self.updated_at = 0.0
+
+    def load(self, rows: Iterable[Dict]) -> None:
+        """
+        Replace the table with a REST ticker snapshot.
+        """
+        with self._lock:
+            self._rows = {}
+            self._opens = {}
+            for row in rows:
+                market = row.get("market")
+                if not market:
+                    continue
+                self._rows[market] = dict(row)
+                try:
+                    last = float(row["last_price"])
+                    change = float(row.get("change_24_hour") or 0)
+                    self._opens[market] = last / (1 + change / 100) if change > -100 else None
+                except (KeyError, TypeError, ValueError, ZeroDivisionError):
+                    self._opens[market] = None
+            self.version += 1
+            self.updated_at = time.time()
+
+    def _apply_price(self, market: str, price: float, quantity: float = 0.0, timestamp=None) -> None:
+        row = self._rows.get(market)
+        if row is None:
+            row = self._rows[market] = {"market": market, "high": price, "low": price, "volume": 0.0}
+        row["last_price"] = price
+        row["high"] = max(float(row.get("high") or price), price)
+        row["low"] = min(float(row.get("low") or price), price)
+        if quantity:
+            row["volume"] = float(row.get("volume") or 0) + quantity
+        opened = self._opens.get(market)
+        if opened:
+            row["change_24_hour"] = round((price / opened - 1) * 100, 3)
+        row["timestamp"] = int((timestamp or time.time() * 1000) / 1000)
+
+    def apply_prices(self, prices: Dict[str, float], timestamp=None) -> None:
+        """
+        Apply a batch of pair -> last price updates.
+        """
+        with self._lock:
+            for pair, price in prices.items():
+                self._apply_price(pair_to_market(pair), float(price), timestamp=timestamp)
+            self.version += 1
+            self.updated_at = time.time()
+
+    def apply_trade(self, trade: Dict) -> None:
+        """
+        Apply one trade ({"p": price, "q": quantity, "s": pair, "T": ms timestamp}).
+        """
+        with self._lock:
+            self._apply_price(pair_to_market(trade["s"]), float(trade["p"]), float(trade.get("q") or 0), trade.get("T"))
+            self.version += 1
+            self.updated_at = time.time()
+
+    def get(self, market: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._rows.get(market)
+            return dict(row) if row else None
+
+    def snapshot(self) -> List[Dict]:
+        """
+        Returns:
+            Copies of all rows, in /exchange/ticker shape
+        """
+        with self._lock:
+            return [dict(row) for row in self._rows.values()]
+
+    def __len__(self):
+        return len(self._rows)
+
+
+# Pseudo-event every feed emits once its channels are joined
+CONNECTED_EVENT = "connected"
+
+
+class SocketIOFeed:
+    """
+    CoinDCX socket.io stream (wss://stream.coindcx.com). Needs python-socketio[client].
+    """
+
+    URL = "wss://stream.coindcx.com"
+
+    def __init__(self, url: str = URL, channels: Iterable = ("currentPrices@spot@10s",), events: Iterable[str] = None):
+        """
+        Args:
+            url: Socket endpoint
+            channels: Channels to join, e.g. "currentPrices@spot@10s" or "B-BTC_USDT@trades",
+                or full join payloads (dicts) for authenticated channels
+            events: Socket events to forward (defaults to MarketStream.EVENTS)
+        """
+        self.url = url
+        self.channels = list(channels)
+        self.events = list(events or MarketStream.EVENTS)
+
+    def run(self, on_event: Callable[[str, object], None], stop: threading.Event) -> None:
+        """
+        Connect, join the channels and forward events until disconnected or stopped.
+        """
+        import socketio  # optional dependency, only needed for live streaming
+
+        sio = socketio.Client(reconnection=False)
+        disconnected = threading.Event()
+
+        @sio.event
+        def connect():
+            for channel in self.channels:
+                sio.emit("join", channel if isinstance(channel, dict) else {"channelName": channel})
+            on_event(CONNECTED_EVENT, None)
+
+        @sio.event
+        def disconnect():
+            disconnected.set()
+
+        for event in self.events:
+            sio.on(event, lambda data, event=event: on_event(event, data))
+
+        sio.connect(self.url, transports=["websocket"])
+        try:
+            while not stop.is_set() and not disconnected.is_set():
+                stop.wait(0.5)
+        finally:
+            sio.disconnect()
+
+
+class WebSocketFeed:
+    """
+    Plain WebSocket feed carrying JSON text frames ({"event": name, "data": payload}).
+
+    Used with relays and with the replaying stand-in in mock_exchange.py, so the
+    stream can be exercised offline without python-socketio.
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        """
+        Args:
+            url: ws:// or wss:// URL
+            timeout: Connect and handshake timeout in seconds
+        """
+        self.url = url
+        self.timeout = timeout
+
+    def _connect(self) -> socket.socket:
+        url = urlparse(self.url)
+        secure = url.scheme == "wss"
+        port = url.port or (443 if secure else 80)
+        sock = socket.create_connection((url.hostname, port), timeout=self.timeout)
+        if secure:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=url.hostname)
+
+        key = base64.b64encode(os.urandom(16)).decode()
+        sock.sendall((
+            f"GET {url.path or '/'}{'?' + url.query if url.query else ''} HTTP/1.1\r\n"
+            f"Host: {url.hostname}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+
+        response = b""
+        while b"\r\n\r\n" not in response:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("Connection closed during WebSocket handshake")
+            response += chunk
+        status_line = response.split(b"\r\n", 1)[0]
+        if b" 101 " not in status_line + b" ":
+            raise ConnectionError(f"WebSocket handshake failed: {status_line.decode(errors='replace')}")
+        return sock
+
+    def run(self, on_event: Callable[[str, object], None], stop: threading.Event) -> None:
+        sock = self._connect()
+        sock.settimeout(0.5)  # wake up regularly to notice stop
+        on_event(CONNECTED_EVENT, None)
+        try:
+            message = b""
+            while not stop.is_set():
+                frame = read_ws_frame(sock, stop)
+                if frame is None:
+                    return
+                fin, opcode, payload = frame
+                if opcode == WS_CLOSE:
+                    return
+                if opcode == WS_PING:
+                    send_ws_frame(sock, WS_PONG, payload, mask=True)
+                    continue
+                if opcode in (WS_TEXT, WS_CONTINUATION):
+                    message += payload
+                    if fin:
+                        frame_data = json.loads(message)
+                        message = b""
+                        on_event(frame_data["event"], frame_data.get("data"))
+        finally:
+            try:
+                send_ws_frame(sock, WS_CLOSE, b"", mask=True)
+            except OSError:
+                pass
+            sock.close()
+
+
+class RecordingFeed:
+    """
+    Wraps a feed and appends every frame it forwards to a JSON-lines file
+    ({"t": seconds, "event": name, "data": payload}) for the replaying stand-in.
+    """
+
+    def __init__(self, feed, path: str):
+        self.feed = feed
+        self.path = path
+
+    def run(self, on_event: Callable[[str, object], None], stop: threading.Event) -> None:
+        with open(self.path, "a", buffering=1) as f:
+            def record(event, data):
+                f.write(json.dumps({"t": time.time(), "event": event, "data": data}) + "\n")
+                on_event(event, data)
+
+            self.feed.run(record, stop)
+
+
+def feed_from_url(url: Optional[str] = None):
+    """
+    Pick the feed for a stream URL: the CoinDCX socket.io endpoint (the
+    default) or a plain WebSocket such as the mock_exchange stand-in.
+    """
+    if not url or urlparse(url).hostname == urlparse(SocketIOFeed.URL).hostname:
+        return SocketIOFeed(url or SocketIOFeed.URL)
+    return WebSocketFeed(url)
+
+
+class MarketStream:
+    """
+    Keeps a LiveTickerTable up to date from a socket feed.
+
+    On every (re)connect the table is re-seeded from one REST ticker call,
+    then only socket frames are applied. When the socket drops or goes quiet
+    for `stale_after` seconds, `is_live` turns False so readers fall back to
+    REST polling while the stream reconnects with backoff.
+    """
+
+    PRICE_EVENT = "currentPrices@spot#update"
+    TRADE_EVENT = "new-trade"
+    DEPTH_EVENTS = ("depth-snapshot", "depth-update")
+    EVENTS = (PRICE_EVENT, TRADE_EVENT) + DEPTH_EVENTS
+
+    def __init__(
+        self,
+        feed=None,
+        seed: Optional[Callable[[], List[Dict]]] = None,
+        stale_after: float = 30.0,
+        max_backoff: float = 30.0,
+    ):
+        """
+        Args:
+            feed: Object with run(on_event, stop) that returns or raises on disconnect
+                (defaults to SocketIOFeed)
+            seed: Function returning a REST ticker snapshot, called on every connect
+            stale_after: Seconds without frames after which the stream is not live
+            max_backoff: Upper bound on the reconnect delay in seconds
+        """
+        self.feed = feed or SocketIOFeed()
+        self.seed = seed
+        self.stale_after = stale_after
+        self.max_backoff = max_backoff
+        self.table = LiveTickerTable()
+
+        self.connected = False
+        self.last_event_at = 0.0
+        self.reconnects = 0
+        self.frames = 0
+        self._handlers = {}  # event -> callbacks receiving decoded payloads
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_live(self) -> bool:
+        return (
+            self.connected
+            and len(self.table) > 0
+            and time.time() - max(self.last_event_at, self.table.updated_at) < self.stale_after
+        )
+
+    def on(self, event: str, callback: Callable[[Dict], None]) -> None:
+        """
+        Receive the decoded payload of every `event` frame as it arrives.
+        """
+        self._handlers.setdefault(event, []).append(callback)
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> None:
+        """
+        Receive every decoded trade ({"p", "q", "s", "T", "m"}) as it arrives.
+        """
+        self.on(self.TRADE_EVENT, callback)
+
+    def start(self) -> "MarketStream":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="market-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _on_event(self, event: str, data) -> None:
+        try:
+            payload = _decode(data)
+            if event == self.PRICE_EVENT:
+                self.table.apply_prices(payload.get("prices", payload), payload.get("ts"))
+            elif event == self.TRADE_EVENT:
+                self.table.apply_trade(payload)
+            elif event not in self._handlers:
+                return
+            for callback in list(self._handlers.get(event, ())):
+                callback(payload)
+            self.frames += 1
+            self.last_event_at = time.time()
+        except Exception as e:
+            print(f"[ERROR] Bad market stream frame ({event}): {e}")
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                if self.seed is not None:
+                    self.table.load(self.seed())
+                self.connected = True
+                self.feed.run(self._on_event, self._stop)
+            except Exception as e:
+                print(f"[ERROR] Market stream disconnected: {e}")
+            finally:
+                self.connected = False
+
+            if self._stop.is_set():
+                break
+            if time.monotonic() - started > 60:
+                backoff = 1.0  # it was a healthy session; reconnect quickly
+            self.reconnects += 1
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def stats(self) -> Dict:
+        return {
+            "live": self.is_live,
+            "connected": self.connected,
+            "markets": len(self.table),
+            "frames": self.frames,
+            "reconnects": self.reconnects,
+            "last_event_age_s": time.time() - self.last_event_at if self.last_event_at else None,
+        }
@@ -0,0 +1,286 @@
+# metrics.py
+import bisect
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Request latency buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Payload size buckets in bytes
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonically increasing counter with labels.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with labels, rendered in Prometheus format.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., +Inf count], sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observe the duration of the wrapped block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """
+        Estimate a quantile by linear interpolation inside buckets (like histogram_quantile).
+        """
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            counts = list(series[0]) if series else None
+        if not counts or not sum(counts):
+            return None
+
+        rank = q * sum(counts)
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(key, list(counts), total) for key, (counts, total) in sorted(self._series.items())]
+
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+# A collector returns (name, type, help, [(labels dict, value), ...]) families computed at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict, float]]]]]
+
+
+class MetricsRegistry:
+    """
+    Holds metrics and renders them in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, name: str, collector: Collector) -> None:
+        """
+        Register (or replace) a callable producing gauge/counter families at scrape time.
+        """
+        with self._lock:
+            self._collectors[name] = collector
+
+    def render(self) -> str:
+        """
+        Returns:
+            All metrics in Prometheus text format
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.values())
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"[ERROR] Metrics collector failed: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# --- HTTP client metrics (CoinDCXApiService) ---
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "coindcx_http_request_duration_seconds",
+    "Duration of CoinDCX API requests, including transport retries.",
+    ["endpoint", "method", "status"],
+)
+HTTP_REQUEST_SIZE = REGISTRY.histogram(
+    "coindcx_http_request_size_bytes",
+    "Size of CoinDCX API request bodies.",
+    ["endpoint", "method"],
+    buckets=SIZE_BUCKETS,
+)
+HTTP_RESPONSE_SIZE = REGISTRY.histogram(
+    "coindcx_http_response_size_bytes",
+    "Size of CoinDCX API response bodies.",
+    ["endpoint", "method"],
+    buckets=SIZE_BUCKETS,
+)
+HTTP_RETRIES = REGISTRY.counter(
+    "coindcx_http_retries_total",
+    "Transport-level retries of CoinDCX API requests.",
+    ["endpoint", "method"],
+)
+
+# --- Redis cache metrics (redis_cache) ---
+CACHE_REQUESTS = REGISTRY.counter(
+    "coindcx_cache_requests_total",
+    "Redis cache lookups by key prefix and result.",
+    ["prefix", "result"],
+)
+CACHE_OPERATION_DURATION = REGISTRY.histogram(
+    "coindcx_cache_operation_duration_seconds",
+    "Duration of Redis cache operations by key prefix.",
+    ["prefix", "operation"],
+)
+
+
+def dump_metrics(path: str, registry: MetricsRegistry = REGISTRY) -> None:
+    """
+    Write the current metrics to `path` (atomically, for node_exporter's textfile collector).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+    with os.fdopen(fd, "w") as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
+
+
+def start_metrics_server(port: int = 9108, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY):
+    """
+    Serve /metrics on a background thread.
+
+    Args:
+        port: Port to listen on (0 picks a free one)
+        host: Interface to bind
+
+    Returns:
+        The running ThreadingHTTPServer (call shutdown() to stop it)
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,695 @@
+# mock_exchange.py
+"""
+Local stand-in for the CoinDCX REST API and market socket.
+
+Serves the endpoints used by this project, verifies HMAC signatures on
+private endpoints and can inject latency, jitter, errors and rate limits.
+With --stream-port it also serves a WebSocket that replays recorded socket
+frames (see market_stream.RecordingFeed) or synthetic ones. MockOrderFeed
+stands in for the private order stream in-process.
+
+Usage:
+    python mock_exchange.py [--port 8001] [--latency-ms 20] [--jitter-ms 5] [--error-rate 0.01]
+                            [--tail-rate 0.05 --tail-latency-ms 500]
+                            [--public-rps 50] [--private-rps 20] [--orders-rps 30]
+                            [--stream-port 8002 [--stream-frames recording.jsonl]]
+
+Then point the app at it:
+    COINDCX_BASE_URL=http://127.0.0.1:8001 COINDCX_API_KEY=mock-key COINDCX_API_SECRET=mock-secret python main.py
+
+and, for streaming mode, COINDCX_STREAM_URL=ws://127.0.0.1:8002
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import math
+import random
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+from market_stream import CONNECTED_EVENT, MarketStream, WS_CLOSE, WS_TEXT, send_ws_frame, ws_accept_key
+from rate_limiter import TokenBucket
+
+DEFAULT_PRICES = {
+    "BTCINR": 5400000.0, "ETHINR": 250000.0, "XRPINR": 45.0, "SOLINR": 12000.0, "DOGEINR": 13.5,
+    "ADAINR": 38.0, "MATICINR": 60.0, "ETHWINR": 280.0,
+    "BTCUSDT": 65000.0, "ETHUSDT": 3000.0, "SOLUSDT": 145.0, "XRPUSDT": 0.55, "ETHBTC": 0.046,
+}
+
+QUOTES = ("USDT", "INR", "BTC")
+
+
+class MockExchangeConfig:
+    """
+    Behaviour knobs of the mock exchange.
+    """
+
+    def __init__(
+        self,
+        api_key: str = "mock-key",
+        api_secret: str = "mock-secret",
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        tail_rate: float = 0.0,
+        tail_latency_ms: float = 0.0,
+        rate_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        check_signatures: bool = True,
+        prices: Optional[Dict[str, float]] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            api_key: API key accepted on private endpoints
+            api_secret: Secret used to verify X-AUTH-SIGNATURE
+            latency_ms: Base latency added to every response
+            jitter_ms: Uniform +/- jitter added to the latency
+            error_rate: Probability of answering 500 instead of serving the request
+            tail_rate: Probability of a request being a slow outlier
+            tail_latency_ms: Extra latency added to slow outliers
+            rate_limits: Group ("public", "private", "orders") -> (requests per second, burst);
+                above it the server answers 429
+            check_signatures: Reject private requests with a bad key or signature
+            prices: Market -> starting last price
+            seed: Random seed for reproducible runs
+        """
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.tail_rate = tail_rate
+        self.tail_latency_ms = tail_latency_ms
+        self.rate_limits = rate_limits or {}
+        self.check_signatures = check_signatures
+        self.prices = dict(prices or DEFAULT_PRICES)
+        self.seed = seed
+
+
+def _split_market(market: str) -> Tuple[str, str]:
+    for quote in QUOTES:
+        if market.endswith(quote) and len(market) > len(quote):
+            return market[:-len(quote)], quote
+    return market[:-3], market[-3:]
+
+
+class MockExchange:
+    """
+    In-memory exchange state: random-walk tickers, order books, trades, balances and orders.
+    """
+
+    ORDER_PREFIXES = ("/exchange/v1/orders/create", "/exchange/v1/orders/cancel")
+
+    def __init__(self, config: MockExchangeConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.prices = dict(config.prices)
+        self.trades = {market: [] for market in self.prices}
+        self.orders = {}
+        self.fills = []            # account trade log, trade id = position + 1
+        self.client_ids = {}       # client_order_id -> order id
+        self.order_listeners = []  # on_event(event, data) of connected MockOrderFeeds
+        self.balances = {"INR": 1000000.0, "USDT": 10000.0, "BTC": 0.5, "ETH": 5.0}
+        self.buckets = {group: TokenBucket(rate, burst) for group, (rate, burst) in config.rate_limits.items()}
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "bad_signatures": 0}
+        self._last_tick = time.time()
+
+    # --- request gates -------------------------------------------------
+
+    def group(self, path: str, private: bool) -> str:
+        if path.startswith(self.ORDER_PREFIXES):
+            return "orders"
+        return "private" if private else "public"
+
+    def admit(self, group: str) -> bool:
+        bucket = self.buckets.get(group)
+        if bucket is None:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            if bucket.delay(now) > 0:
+                self.stats["rate_limited"] += 1
+                return False
+            bucket.take(now)
+            return True
+
+    def verify(self, headers, raw_body: bytes) -> bool:
+        if not self.config.check_signatures:
+            return True
+        expected = hmac.new(self.config.api_secret.encode('utf-8'), raw_body, hashlib.sha256).hexdigest()
+        ok = (headers.get("X-AUTH-APIKEY") == self.config.api_key
+              and hmac.compare_digest(expected, headers.get("X-AUTH-SIGNATURE", "")))
+        if not ok:
+            with self.lock:
+                self.stats["bad_signatures"] += 1
+        return ok
+
+    def delay(self) -> None:
+        jitter = self.random.uniform(-self.config.jitter_ms, self.config.jitter_ms) if self.config.jitter_ms else 0.0
+        seconds = max(0.0, self.config.latency_ms + jitter) / 1000
+        if self.config.tail_rate and self.random.random() < self.config.tail_rate:
+            seconds += self.config.tail_latency_ms / 1000
+        if seconds:
+            time.sleep(seconds)
+
+    # --- market data ---------------------------------------------------
+
+    def _tick(self) -> None:
+        """
+        Random-walk prices and print a few trades per market, at most every 100ms.
+        """
+        now = time.time()
+        if now - self._last_tick < 0.1:
+            return
+        self._last_tick = now
+        for market, price in self.prices.items():
+            price *= 1 + self.random.gauss(0, 0.0005)
+            self.prices[market] = price
+            trades = self.trades[market]
+            for _ in range(self.random.randint(0, 3)):
+                trades.append({
+                    "p": round(price * (1 + self.random.gauss(0, 0.0002)), 8),
+                    "q": round(self.random.uniform(0.001, 2.0), 6),
+                    "s": market,
+                    "T": int(now * 1000),
+                    "m": self.random.random() < 0.5,
+                })
+            del trades[:-500]
+
+    def ticker(self):
+        with self.lock:
+            self._tick()
+            now = int(time.time())
+            return [
+                {
+                    "market": market,
+                    "change_24_hour": f"{self.random.uniform(-5, 5):.3f}",
+                    "high": f"{price * 1.02:.8g}",
+                    "low": f"{price * 0.98:.8g}",
+                    "volume": f"{self.random.uniform(100, 100000):.4f}",
+                    "last_price": f"{price:.8g}",
+                    "bid": f"{price * 0.9995:.8g}",
+                    "ask": f"{price * 1.0005:.8g}",
+                    "timestamp": now,
+                }
+                for market, price in self.prices.items()
+            ]
+
+    def markets_details(self):
+        details = []
+        for market, price in self.prices.items():
+            base, quote = _split_market(market)
+            target_precision = 2 if quote == "INR" else (4 if quote == "USDT" else 8)
+            details.append({
+                "coindcx_name": market,
+                "symbol": market,
+                "base_currency_short_name": quote,
+                "target_currency_short_name": base,
+                "base_currency_precision": target_precision,
+                "target_currency_precision": 5,
+                "min_quantity": 0.00001,
+                "max_quantity": 100000.0,
+                "min_price": round(price / 1000, 8),
+                "max_price": round(price * 1000, 8),
+                "min_notional": 100.0 if quote == "INR" else 1.0,
+                "step": 0.00001,
+                "order_types": ["limit_order", "market_order"],
+                "pair": self.pair(market),
+                "ecode": "I" if quote == "INR" else "B",
+                "status": "active",
+            })
+        return details
+
+    def order_book(self, pair: str):
+        market = self.market_from_pair(pair)
+        with self.lock:
+            self._tick()
+            price = self.prices.get(market)
+        if price is None:
+            return {"bids": {}, "asks": {}}
+        tick = price * 0.0005
+        return {
+            "bids": {f"{price - tick * (i + 1):.8g}": f"{self.random.uniform(0.01, 5):.6f}" for i in range(20)},
+            "asks": {f"{price + tick * (i + 1):.8g}": f"{self.random.uniform(0.01, 5):.6f}" for i in range(20)},
+        }
+
+    def trade_history(self, pair: str, limit: int = 30):
+        market = self.market_from_pair(pair)
+        with self.lock:
+            self._tick()
+            trades = list(self.trades.get(market, []))
+        return list(reversed(trades[-limit:]))
+
+    def socket_frames(self, count: int = 100, interval: float = 0.1) -> List[Dict]:
+        """
+        Synthetic socket frames in RecordingFeed format: a price update for
+        every market followed by new-trade frames, `count` times.
+        """
+        frames, t = [], 0.0
+        for _ in range(count):
+            with self.lock:
+                self._last_tick = 0.0
+                self._tick()
+                prices = {self.pair(market): f"{price:.8g}" for market, price in self.prices.items()}
+                trades = [dict(trade, s=self.pair(market)) for market, ts in self.trades.items() for trade in ts[-2:]]
+            frames.append({"t": t, "event": MarketStream.PRICE_EVENT, "data": {"prices": prices}})
+            frames.extend({"t": t, "event": MarketStream.TRADE_EVENT, "data": trade} for trade in trades)
+            t += interval
+        return frames
+
+    @staticmethod
+    def pair(market: str) -> str:
+        base, quote = _split_market(market)
+        return f"{'I' if quote == 'INR' else 'B'}-{base}_{quote}"
+
+    def candles(self, pair: str, interval: str, start: Optional[int], end: Optional[int], limit: int = 500):
+        """
+        Deterministic candles (the same range always returns the same bars), newest first.
+        """
+        from candles import INTERVAL_MS
+
+        market = self.market_from_pair(pair)
+        price = DEFAULT_PRICES.get(market, self.prices.get(market))
+        if price is None:
+            return []
+        step = INTERVAL_MS[interval]
+        now = int(time.time() * 1000)
+        end = min(end if end is not None else now, now)
+        first = end - end % step
+        start = max(start if start is not None else 0, first - step * (min(limit, 1000) - 1))
+        bars = []
+        for t in range(first, start - 1, -step):
+            drift = 1 + 0.02 * math.sin(t / (step * 50)) + 0.005 * math.sin(t / (step * 7))
+            open_ = price * drift
+            close = open_ * (1 + 0.002 * math.sin(t / step))
+            bars.append({
+                "open": round(open_, 8),
+                "high": round(max(open_, close) * 1.001, 8),
+                "low": round(min(open_, close) * 0.999, 8),
+                "close": round(close, 8),
+                "volume": round(10 + 5 * math.cos(t / step), 6),
+                "time": t,
+            })
+        return bars
+
+    def market_from_pair(self, pair: str) -> str:
+        # Accept both "BTCINR" and CoinDCX pair names like "I-BTC_INR"
+        if pair and "-" in pair and "_" in pair:
+            pair = pair.split("-", 1)[1].replace("_", "")
+        return pair
+
+    # --- private endpoints ---------------------------------------------
+
+    def create_order(self, body: Dict) -> Dict:
+        market = body.get("market")
+        if market not in self.prices:
+            raise ValueError(f"Invalid market {market}")
+        quantity = float(body.get("total_quantity", 0))
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+
+        order_type = body.get("order_type", "limit_order")
+        now = int(time.time() * 1000)
+        order = {
+            "id": str(uuid.uuid4()),
+            "client_order_id": body.get("client_order_id"),
+            "market": market,
+            "order_type": order_type,
+            "side": body.get("side"),
+            "status": "filled" if order_type == "market_order" else "open",
+            "fee_amount": 0.0,
+            "fee": 0.1,
+            "total_quantity": quantity,
+            "remaining_quantity": 0.0 if order_type == "market_order" else quantity,
+            "avg_price": 0.0,
+            "price_per_unit": float(body.get("price_per_unit") or self.prices[market]),
+            "created_at": now,
+            "updated_at": now,
+            "timestamp": now,
+        }
+        if order_type == "market_order":
+            order["avg_price"] = self.prices[market]
+        with self.lock:
+            client_order_id = order["client_order_id"]
+            if client_order_id:
+                if client_order_id in self.client_ids:
+                    raise ValueError(f"Duplicate client_order_id {client_order_id}")
+                self.client_ids[client_order_id] = order["id"]
+            self.orders[order["id"]] = order
+            if order["status"] == "filled":
+                self._record_fill(order, quantity, order["avg_price"], now)
+        self._publish("order-update", [dict(order)])
+        return order
+
+    def cancel(self, order_ids, market=None, side=None) -> int:
+        cancelled = []
+        with self.lock:
+            for order in self.orders.values():
+                if order["status"] not in ("open", "partially_filled"):
+                    continue
+                if order_ids is not None and order["id"] not in order_ids:
+                    continue
+                if market and order["market"] != market:
+                    continue
+                if side and order["side"] != side:
+                    continue
+                order["status"] = "cancelled"
+                order["updated_at"] = int(time.time() * 1000)
+                cancelled.append(dict(order))
+        if cancelled:
+            self._publish("order-update", cancelled)
+        return len(cancelled)
+
+    def fill(self, order_id: str, quantity: Optional[float] = None) -> Optional[Dict]:
+        """
+        Fill an open order (fully, or by `quantity`) at its limit price,
+        publishing a trade-update and an order-update like the private stream.
+        """
+        with self.lock:
+            order = self.orders.get(order_id)
+            if order is None or order["status"] not in ("open", "partially_filled"):
+                return None
+            quantity = min(quantity or order["remaining_quantity"], order["remaining_quantity"])
+            now = int(time.time() * 1000)
+            order["remaining_quantity"] = round(order["remaining_quantity"] - quantity, 12)
+            order["status"] = "filled" if order["remaining_quantity"] <= 0 else "partially_filled"
+            order["avg_price"] = order["price_per_unit"]
+            order["updated_at"] = now
+            self._record_fill(order, quantity, order["price_per_unit"], now)
+            trade = {"o": order["id"], "c": order["client_order_id"], "s": order["market"], "x": order["side"],
+                     "p": order["price_per_unit"], "q": quantity, "T": now}
+            snapshot = dict(order)
+        self._publish("trade-update", [trade])
+        self._publish("order-update", [snapshot])
+        return snapshot
+
+    def _record_fill(self, order: Dict, quantity: float, price: float, now: int) -> None:
+        # Caller holds self.lock
+        self.fills.append({
+            "id": len(self.fills) + 1, "order_id": order["id"], "side": order["side"], "fee_amount": "0.0",
+            "ecode": "I", "quantity": quantity, "price": price, "symbol": order["market"], "timestamp": now,
+        })
+
+    def _publish(self, event: str, data) -> None:
+        for listener in list(self.order_listeners):
+            listener(event, data)
+
+    def handle_private(self, path: str, body: Dict):
+        """
+        Returns:
+            Tuple of (status code, response object)
+        """
+        if path == "/exchange/v1/users/balances":
+            return 200, [{"currency": c, "balance": b, "locked_balance": 0.0} for c, b in self.balances.items()]
+        if path == "/exchange/v1/users/info":
+            return 200, {"coindcx_id": "mock-user", "first_name": "Mock", "last_name": "Trader"}
+        if path == "/exchange/v1/orders/create":
+            return 200, {"orders": [self.create_order(body)]}
+        if path == "/exchange/v1/orders/create_multiple":
+            orders = []
+            for spec in body.get("orders", []):
+                try:
+                    orders.append(self.create_order(spec))
+                except ValueError as e:
+                    orders.append({"client_order_id": spec.get("client_order_id"), "status": "rejected", "message": str(e)})
+            return 200, {"orders": orders}
+        if path == "/exchange/v1/orders/cancel":
+            if not self.cancel({body.get("id")}):
+                return 400, {"code": 400, "message": "Order not found or already closed", "status": "error"}
+            return 200, {"code": 200, "message": "success", "status": 200}
+        if path == "/exchange/v1/orders/cancel_all":
+            return 200, {"code": 200, "message": "success", "cancelled": self.cancel(None, body.get("market"), body.get("side"))}
+        if path == "/exchange/v1/orders/cancel_by_ids":
+            return 200, {"code": 200, "message": "success", "cancelled": self.cancel(set(body.get("ids", [])))}
+        if path == "/exchange/v1/orders/status":
+            with self.lock:
+                order_id = body.get("id") or self.client_ids.get(body.get("client_order_id"))
+                order = self.orders.get(order_id)
+            if order is None:
+                return 404, {"code": 404, "message": "Order not found", "status": "error"}
+            return 200, order
+        if path == "/exchange/v1/orders/active_orders":
+            with self.lock:
+                orders = [o for o in self.orders.values() if o["status"] in ("open", "partially_filled")
+                          and (not body.get("market") or o["market"] == body.get("market"))]
+            return 200, {"orders": orders}
+        if path == "/exchange/v1/orders/trade_history":
+            from_id = int(body.get("from_id") or 0)
+            limit = min(int(body.get("limit") or 500), 5000)
+            with self.lock:
+                trades = self.fills[from_id:]  # ids are positions + 1
+            if body.get("sort", "desc") == "desc":
+                trades = trades[::-1]
+            return 200, trades[:limit]
+        return 404, {"code": 404, "message": f"Unknown endpoint {path}", "status": "error"}
+
+
+def make_handler(exchange: MockExchange):
+    class MockExchangeHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _reply(self, status: int, payload) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _gate(self, path: str, private: bool) -> bool:
+            with exchange.lock:
+                exchange.stats["requests"] += 1
+            exchange.delay()
+            if not exchange.admit(exchange.group(path, private)):
+                self._reply(429, {"code": 429, "message": "Too many requests", "status": "error"})
+                return False
+            if exchange.config.error_rate and exchange.random.random() < exchange.config.error_rate:
+                with exchange.lock:
+                    exchange.stats["errors"] += 1
+                self._reply(500, {"code": 500, "message": "Injected error", "status": "error"})
+                return False
+            return True
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if not self._gate(url.path, private=False):
+                return
+
+            if url.path == "/exchange/ticker":
+                self._reply(200, exchange.ticker())
+            elif url.path == "/exchange/v1/markets":
+                self._reply(200, list(exchange.prices))
+            elif url.path == "/exchange/v1/markets_details":
+                self._reply(200, exchange.markets_details())
+            elif url.path == "/market_data/orderbook":
+                self._reply(200, exchange.order_book(params.get("pair", "")))
+            elif url.path == "/market_data/candles":
+                start, end = params.get("startTime"), params.get("endTime")
+                self._reply(200, exchange.candles(
+                    params.get("pair", ""), params.get("interval", "1m"),
+                    int(start) if start else None, int(end) if end else None, int(params.get("limit", 500)),
+                ))
+            elif url.path == "/market_data/trade_history":
+                self._reply(200, exchange.trade_history(params.get("pair", ""), int(params.get("limit", 30))))
+            else:
+                self._reply(404, {"code": 404, "message": f"Unknown endpoint {url.path}", "status": "error"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            raw_body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if not self._gate(url.path, private=True):
+                return
+            if not exchange.verify(self.headers, raw_body):
+                self._reply(401, {"code": 401, "message": "Invalid credentials", "status": "error"})
+                return
+            try:
+                body = json.loads(raw_body or b"{}")
+                status, payload = exchange.handle_private(url.path, body)
+            except ValueError as e:
+                status, payload = 422, {"code": 422, "message": str(e), "status": "error"}
+            self._reply(status, payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockExchangeHandler
+
+
+def start_mock_exchange(config: Optional[MockExchangeConfig] = None, host: str = "127.0.0.1", port: int = 0):
+    """
+    Start the mock exchange on a background thread.
+
+    Returns:
+        Tuple of (server, exchange); the base URL is f"http://{host}:{server.server_address[1]}"
+    """
+    exchange = MockExchange(config or MockExchangeConfig())
+    server = ThreadingHTTPServer((host, port), make_handler(exchange))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-exchange", daemon=True).start()
+    return server, exchange
+
+
+def _load_frames(frames) -> List[Dict]:
+    if isinstance(frames, str):
+        with open(frames) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    return list(frames)
+
+
+class MockOrderFeed:
+    """
+    In-process stand-in for the private order stream: forwards the mock
+    exchange's order-update and trade-update events to an OrderManager until
+    stopped or disconnect() simulates a dropped connection.
+    """
+
+    def __init__(self, exchange: MockExchange):
+        self.exchange = exchange
+        self._dropped = threading.Event()
+
+    def disconnect(self) -> None:
+        self._dropped.set()
+
+    def run(self, on_event, stop: threading.Event) -> None:
+        self._dropped.clear()
+        self.exchange.order_listeners.append(on_event)
+        try:
+            on_event(CONNECTED_EVENT, None)
+            while not stop.is_set() and not self._dropped.is_set():
+                stop.wait(0.05)
+        finally:
+            self.exchange.order_listeners.remove(on_event)
+
+
+def start_mock_stream(
+    frames: Union[str, List[Dict]],
+    host: str = "127.0.0.1",
+    port: int = 0,
+    speed: float = 1.0,
+    loop: bool = False,
+):
+    """
+    Start a WebSocket stand-in for the market socket that replays recorded frames
+    to every client as {"event": name, "data": payload} text frames.
+
+    The connection is closed after the last frame unless `loop` is set, which
+    lets callers exercise the stream's disconnect and REST fallback path.
+
+    Args:
+        frames: JSON-lines recording path, or a list of frames (see MockExchange.socket_frames)
+        speed: Replay speed multiplier (0 = as fast as possible)
+        loop: Restart from the first frame instead of disconnecting
+
+    Returns:
+        The server; the URL is f"ws://{host}:{server.server_address[1]}"
+    """
+    frames = _load_frames(frames)
+
+    class ReplayHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            sock = self.request
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            request = b""
+            while b"\r\n\r\n" not in request:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    return
+                request += chunk
+            headers = {}
+            for line in request.decode(errors="replace").split("\r\n")[1:]:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+            sock.sendall((
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {ws_accept_key(headers.get('sec-websocket-key', ''))}\r\n\r\n"
+            ).encode())
+
+            try:
+                while True:
+                    started = time.monotonic()
+                    first_t = frames[0].get("t", 0) if frames else 0
+                    for frame in frames:
+                        if speed:
+                            delay = (frame.get("t", 0) - first_t) / speed - (time.monotonic() - started)
+                            if delay > 0:
+                                time.sleep(delay)
+                        message = json.dumps({"event": frame["event"], "data": frame.get("data")})
+                        send_ws_frame(sock, WS_TEXT, message.encode())
+                    if not loop:
+                        break
+                send_ws_frame(sock, WS_CLOSE, b"")
+            except OSError:
+                pass  # client went away
+
+    server = socketserver.ThreadingTCPServer((host, port), ReplayHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-stream", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--api-key", default="mock-key")
+    parser.add_argument("--api-secret", default="mock-secret")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="share of slow outlier responses")
+    parser.add_argument("--tail-latency-ms", type=float, default=0.0, help="extra latency of slow outliers")
+    parser.add_argument("--public-rps", type=float, help="public market data rate limit")
+    parser.add_argument("--private-rps", type=float, help="private read rate limit")
+    parser.add_argument("--orders-rps", type=float, help="order create/cancel rate limit")
+    parser.add_argument("--no-signature-check", action="store_true")
+    parser.add_argument("--stream-port", type=int, help="also serve the market socket stand-in on this port")
+    parser.add_argument("--stream-frames", help="JSON-lines recording to replay (synthetic frames if omitted)")
+    parser.add_argument("--stream-speed", type=float, default=1.0, help="replay speed multiplier")
+    args = parser.parse_args()
+
+    rate_limits = {}
+    for group in ("public", "private", "orders"):
+        rps = getattr(args, f"{group}_rps")
+        if rps:
+            rate_limits[group] = (rps, max(1.0, rps))
+
+    config = MockExchangeConfig(
+        api_key=args.api_key,
+        api_secret=args.api_secret,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        tail_rate=args.tail_rate,
+        tail_latency_ms=args.tail_latency_ms,
+        rate_limits=rate_limits,
+        check_signatures=not args.no_signature_check,
+    )
+    server, exchange = start_mock_exchange(config, args.host, args.port)
+    print(f"Mock CoinDCX exchange listening on http://{args.host}:{server.server_address[1]}")
+    if args.stream_port is not None:
+        frames = args.stream_frames or exchange.socket_frames(count=600, interval=0.1)
+        stream_server = start_mock_stream(frames, args.host, args.stream_port, speed=args.stream_speed, loop=True)
+        print(f"Mock market socket listening on ws://{args.host}:{stream_server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\nStats: {exchange.stats}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+# order_book.py
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+class BookSide:
+    """
+    One side of an L2 book kept as two parallel sorted arrays.
+
+    Prices are stored as sort keys in ascending order with the best level at
+    the end of the array (bids by price, asks by negated price), so the best
+    price is O(1), a level is found with an O(log n) bisect, and the common
+    near-the-top insert/delete only moves the few elements behind it.
+    """
+
+    def __init__(self, is_bid: bool):
+        self.is_bid = is_bid
+        self._sign = 1.0 if is_bid else -1.0
+        self._keys = []  # sign * price, ascending; best level last
+        self._qty = []   # quantity per level, aligned with _keys
+
+    def clear(self) -> None:
+        self._keys = []
+        self._qty = []
+
+    def load(self, levels: Dict) -> None:
+        """
+        Replace the side with a {price: quantity} snapshot (strings or numbers).
+        """
+        sign = self._sign
+        pairs = sorted((sign * float(p), float(q)) for p, q in levels.items() if float(q) > 0)
+        self._keys = [k for k, _ in pairs]
+        self._qty = [q for _, q in pairs]
+
+    def update(self, price: float, quantity: float) -> None:
+        """
+        Set the quantity at a price level; zero removes the level.
+        """
+        key = self._sign * price
+        keys = self._keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if quantity > 0:
+                self._qty[i] = quantity
+            else:
+                del keys[i]
+                del self._qty[i]
+        elif quantity > 0:
+            keys.insert(i, key)
+            self._qty.insert(i, quantity)
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        """
+        Returns:
+            (price, quantity) of the best level, or None if the side is empty
+        """
+        if not self._keys:
+            return None
+        return self._sign * self._keys[-1], self._qty[-1]
+
+    def levels(self, n: Optional[int] = None) -> List[Tuple[float, float]]:
+        """
+        Returns:
+            Up to `n` (price, quantity) levels, best first
+        """
+        count = len(self._keys) if n is None else min(n, len(self._keys))
+        sign = self._sign
+        return [(sign * self._keys[-1 - i], self._qty[-1 - i]) for i in range(count)]
+
+    def cumulative_depth(self, n: Optional[int] = None) -> List[Tuple[float, float]]:
+        """
+        Returns:
+            Up to `n` (price, cumulative quantity) levels, best first
+        """
+        total = 0.0
+        depth = []
+        for price, quantity in self.levels(n):
+            total += quantity
+            depth.append((price, total))
+        return depth
+
+    def quantity_to(self, price: float) -> float:
+        """
+        Total quantity resting at prices at least as good as `price`.
+        """
+        i = bisect_left(self._keys, self._sign * price)
+        return sum(self._qty[i:])
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class OrderBook:
+    """
+    Maintained L2 order book for one market.
+
+    Load it from a /market_data/orderbook snapshot, then apply incremental
+    depth updates in the same {"bids": {price: qty}, "asks": {price: qty}}
+    form, where a zero quantity removes the level.
+
+    Updates arriving before the first snapshot, or while a snapshot is being
+    fetched (begin_snapshot), are buffered with their arrival time; the ones
+    that arrived after the snapshot was requested are replayed on top of it.
+    """
+
+    def __init__(self, market: str, max_buffer: int = 10000):
+        """
+        Args:
+            market: Market symbol
+            max_buffer: Updates buffered while waiting for a snapshot (oldest dropped first)
+        """
+        self.market = market
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+        self.updates = 0
+        self.updated_at = 0.0
+        self.snapshot_loaded = False
+        self.replayed = 0
+        self._buffer = deque(maxlen=max_buffer)  # (received_at, update)
+        self._recording = False                  # a snapshot fetch is in flight
+        self.lock = threading.Lock()
+
+    def begin_snapshot(self) -> float:
+        """
+        Start buffering updates for replay before fetching a snapshot.
+
+        Returns:
+            The request time to pass to load_snapshot
+        """
+        with self.lock:
+            self._recording = True
+        return time.time()
+
+    def abort_snapshot(self) -> None:
+        """
+        Stop buffering after a snapshot fetch failed; the book keeps whatever
+        it had (a loaded book has applied the buffered updates already).
+        """
+        with self.lock:
+            self._buffer.clear()
+            self._recording = False
+
+    def load_snapshot(self, snapshot: Dict, requested_at: Optional[float] = None) -> None:
+        """
+        Replace the book with a full snapshot, then replay the buffered
+        updates received at or after `requested_at` (none if it is None,
+        i.e. the snapshot is newer than anything received so far).
+        """
+        with self.lock:
+            self.bids.load(snapshot.get("bids") or {})
+            self.asks.load(snapshot.get("asks") or {})
+            if requested_at is not None:
+                for received_at, update in self._buffer:
+                    if received_at >= requested_at:
+                        self._apply(update)
+                        self.replayed += 1
+            self._buffer.clear()
+            self._recording = False
+            self.snapshot_loaded = True
+            self.updated_at = time.time()
+
+    def _apply(self, update: Dict) -> None:
+        # Caller holds self.lock
+        for price, quantity in (update.get("bids") or {}).items():
+            self.bids.update(float(price), float(quantity))
+        for price, quantity in (update.get("asks") or {}).items():
+            self.asks.update(float(price), float(quantity))
+
+    def apply_update(self, update: Dict) -> None:
+        """
+        Apply an incremental depth update (buffered until a snapshot is loaded).
+        """
+        with self.lock:
+            if self._recording or not self.snapshot_loaded:
+                self._buffer.append((time.time(), update))
+                if not self.snapshot_loaded:
+                    return
+            self._apply(update)
+            self.updates += 1
+            self.updated_at = time.time()
+
+    def update_level(self, side: str, price: float, quantity: float) -> None:
+        """
+        Set one level without going through a dict ("buy"/"bid" or "sell"/"ask").
+        """
+        is_bid = side in ("buy", "bid", "bids")
+        with self.lock:
+            if self._recording or not self.snapshot_loaded:
+                self._buffer.append((time.time(), {"bids" if is_bid else "asks": {price: quantity}}))
+                if not self.snapshot_loaded:
+                    return
+            (self.bids if is_bid else self.asks).update(price, quantity)
+            self.updates += 1
+            self.updated_at = time.time()
+
+    @property
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        with self.lock:
+            return self.bids.best()
+
+    @property
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        with self.lock:
+            return self.asks.best()
+
+    def top(self) -> Tuple[Optional[Tuple[float, float]], Optional[Tuple[float, float]]]:
+        """
+        Returns:
+            (best bid, best ask) read consistently
+        """
+        with self.lock:
+            return self.bids.best(), self.asks.best()
+
+    @property
+    def spread(self) -> Optional[float]:
+        bid, ask = self.top()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    @property
+    def mid_price(self) -> Optional[float]:
+        bid, ask = self.top()
+        if bid is None or ask is None:
+            return None
+        return (ask[0] + bid[0]) / 2
+
+    def cumulative_depth(self, levels: Optional[int] = None) -> Dict[str, List[Tuple[float, float]]]:
+        """
+        Returns:
+            {"bids": [...], "asks": [...]} of (price, cumulative quantity), best first
+        """
+        with self.lock:
+            return {"bids": self.bids.cumulative_depth(levels), "asks": self.asks.cumulative_depth(levels)}
+
+    def depth_within(self, pct: float) -> Dict[str, float]:
+        """
+        Quantity resting within `pct` percent of the mid price on each side.
+        """
+        mid = self.mid_price
+        if mid is None:
+            return {"bids": 0.0, "asks": 0.0}
+        with self.lock:
+            return {
+                "bids": self.bids.quantity_to(mid * (1 - pct / 100)),
+                "asks": self.asks.quantity_to(mid * (1 + pct / 100)),
+            }
+
+    def snapshot(self, levels: Optional[int] = None) -> Dict:
+        """
+        Returns:
+            {"bids": [(price, qty), ...], "asks": [...]}, best first
+        """
+        with self.lock:
+            return {"bids": self.bids.levels(levels), "asks": self.asks.levels(levels)}
+
+
+class OrderBookManager:
+    """
+    Order books for many markets.
+
+    Books are loaded from REST snapshots on first use (and reloaded once they
+    are older than `max_age` when nothing keeps them updated), and can be fed
+    incremental depth updates from a market_stream.MarketStream. Updates that
+    arrive before a book's first snapshot are buffered and replayed onto it.
+    """
+
+    DEPTH_EVENT = "depth-update"
+    SNAPSHOT_EVENT = "depth-snapshot"
+
+    def __init__(self, market_service=None, max_age: Optional[float] = None):
+        """
+        Args:
+            market_service: MarketService used to fetch snapshots
+            max_age: Seconds after which an idle book is reloaded from REST (None = never)
+        """
+        self.market_service = market_service
+        self.max_age = max_age
+        self.books = {}  # market -> OrderBook
+        self._lock = threading.Lock()
+
+    def book(self, market: str) -> OrderBook:
+        """
+        Get the book for a market, creating an empty one if needed.
+        """
+        with self._lock:
+            book = self.books.get(market)
+            if book is None:
+                book = self.books[market] = OrderBook(market)
+            return book
+
+    def get(self, market: str, refresh: bool = False) -> OrderBook:
+        """
+        Get the maintained book for a market, loading a REST snapshot when it
+        has never been loaded, is stale or `refresh` is set.
+        """
+        book = self.book(market)
+        stale = self.max_age is not None and time.time() - book.updated_at > self.max_age
+        if refresh or not book.snapshot_loaded or stale:
+            requested_at = book.begin_snapshot()
+            try:
+                snapshot = self.market_service.get_order_book(market)
+            except Exception:
+                book.abort_snapshot()
+                raise
+            book.load_snapshot(snapshot, requested_at)
+        return book
+
+    def apply_update(self, market: str, update: Dict) -> None:
+        self.book(market).apply_update(update)
+
+    def handle_event(self, event: str, payload: Dict) -> None:
+        """
+        Apply a decoded depth socket frame ({"s": pair, "bids": {...}, "asks": {...}}).
+        """
+        from market_stream import pair_to_market
+
+        market = pair_to_market(payload.get("s") or payload.get("pair") or "")
+        if not market:
+            return
+        if event == self.SNAPSHOT_EVENT:
+            self.book(market).load_snapshot(payload)
+        else:
+            self.apply_update(market, payload)
+
+    def attach(self, stream) -> "OrderBookManager":
+        """
+        Feed this manager from a MarketStream's depth frames.
+        """
+        stream.on(self.DEPTH_EVENT, lambda payload: self.handle_event(self.DEPTH_EVENT, payload))
+        stream.on(self.SNAPSHOT_EVENT, lambda payload: self.handle_event(self.SNAPSHOT_EVENT, payload))
+        return self
@@ -0,0 +1,353 @@
+# order_ledger.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    order_id TEXT,
+    market TEXT,
+    side TEXT,
+    price REAL,
+    quantity REAL,
+    fee_amount REAL,
+    timestamp INTEGER,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trades_market_time ON trades (market, timestamp);
+CREATE INDEX IF NOT EXISTS trades_time ON trades (timestamp);
+CREATE INDEX IF NOT EXISTS trades_order ON trades (order_id);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT PRIMARY KEY,
+    client_order_id TEXT,
+    market TEXT,
+    side TEXT,
+    order_type TEXT,
+    status TEXT,
+    price REAL,
+    total_quantity REAL,
+    remaining_quantity REAL,
+    created_at INTEGER,
+    updated_at INTEGER,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_market_time ON orders (market, created_at);
+CREATE INDEX IF NOT EXISTS orders_time ON orders (created_at);
+CREATE INDEX IF NOT EXISTS orders_client ON orders (client_order_id);
+
+CREATE TABLE IF NOT EXISTS sync_cursors (
+    account TEXT PRIMARY KEY,
+    last_trade_id INTEGER NOT NULL
+);
+"""
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class OrderLedger:
+    """
+    Local SQLite ledger of the account's trades and orders.
+
+    Trades are synced incrementally from /exchange/v1/orders/trade_history:
+    only records after the account's sync cursor (the highest trade id it
+    has synced) are requested, page by page, so a sync after the first one
+    costs a single request. Orders are
+    recorded from create/status responses and the order stream, keeping the
+    newest copy of each. History queries are range scans on the
+    (market, time), time and order id indexes instead of full downloads.
+    """
+
+    def __init__(self, path: str = "order_ledger.db", page_size: int = 1000, min_sync_interval: float = 5.0,
+                 account: str = ""):
+        """
+        Args:
+            path: SQLite database file (":memory:" for a throwaway ledger)
+            page_size: Trades requested per trade_history call (API maximum 5000)
+            min_sync_interval: Seconds during which a repeated sync is skipped
+            account: Key of the account (and exchange) whose sync cursor this
+                ledger advances
+        """
+        self.path = path
+        self.account = account
+        self.page_size = page_size
+        self.min_sync_interval = min_sync_interval
+        self.synced_at = 0.0
+        self.sync_requests = 0
+        self._conn = None
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """
+        The database connection, opened (and the schema created) on first use.
+        """
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    directory = os.path.dirname(self.path)
+                    if directory and self.path != ":memory:":
+                        os.makedirs(directory, exist_ok=True)
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.executescript(SCHEMA)
+                    self._conn = conn
+        return self._conn
+
+    # --- writing -------------------------------------------------------
+
+    def record_trades(self, trades: Iterable[Dict]) -> int:
+        """
+        Store trade_history records; ones already stored are ignored.
+
+        Returns:
+            Number of new trades
+        """
+        rows = [
+            (_int(t.get("id")), t.get("order_id"), t.get("symbol") or t.get("market"), t.get("side"),
+             _float(t.get("price")), _float(t.get("quantity")), _float(t.get("fee_amount")),
+             _int(t.get("timestamp")), json.dumps(t))
+            for t in trades
+            if _int(t.get("id")) is not None
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            conn = self.conn
+            before = conn.total_changes
+            with conn:
+                conn.executemany("INSERT OR IGNORE INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            return conn.total_changes - before
+
+    def record_orders(self, orders: Iterable[Dict]) -> int:
+        """
+        Store orders, keeping the stored copy where it is newer (by updated_at).
+
+        Returns:
+            Number of orders inserted or updated
+        """
+        rows = [
+            (o["id"], o.get("client_order_id"), o.get("market"), o.get("side"), o.get("order_type"),
+             o.get("status"), _float(o.get("price_per_unit")), _float(o.get("total_quantity")),
+             _float(o.get("remaining_quantity")), _int(o.get("created_at") or o.get("timestamp")),
+             _int(o.get("updated_at")) or 0, json.dumps(o))
+            for o in orders
+            if isinstance(o, dict) and o.get("id")
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            conn = self.conn
+            before = conn.total_changes
+            with conn:
+                conn.executemany(
+                    """
+                    INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (id) DO UPDATE SET
+                        client_order_id = COALESCE(excluded.client_order_id, client_order_id),
+                        market = COALESCE(excluded.market, market),
+                        side = COALESCE(excluded.side, side),
+                        order_type = COALESCE(excluded.order_type, order_type),
+                        status = COALESCE(excluded.status, status),
+                        price = COALESCE(excluded.price, price),
+                        total_quantity = COALESCE(excluded.total_quantity, total_quantity),
+                        remaining_quantity = COALESCE(excluded.remaining_quantity, remaining_quantity),
+                        created_at = COALESCE(created_at, excluded.created_at),
+                        updated_at = excluded.updated_at,
+                        raw = json_patch(raw, excluded.raw)
+                    WHERE excluded.updated_at >= updated_at
+                    """,
+                    rows,
+                )
+            return conn.total_changes - before
+
+    # --- sync ----------------------------------------------------------
+
+    def last_trade_id(self) -> int:
+        """
+        The account's sync cursor: the highest trade id synced for it.
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT last_trade_id FROM sync_cursors WHERE account = ?",
+                                    (self.account,)).fetchone()
+        return row[0] if row else 0
+
+    def _advance_cursor(self, trade_id: int) -> None:
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    """
+                    INSERT INTO sync_cursors VALUES (?, ?)
+                    ON CONFLICT (account) DO UPDATE SET last_trade_id = MAX(last_trade_id, excluded.last_trade_id)
+                    """,
+                    (self.account, trade_id),
+                )
+
+    def sync(self, fetch: Callable[[int, int], List[Dict]], force: bool = False) -> int:
+        """
+        Pull the trades newer than the last stored one.
+
+        Args:
+            fetch: fetch(from_id, limit) returning up to `limit` trades with
+                id > from_id, oldest first
+            force: Sync even if the last sync was less than min_sync_interval ago
+
+        Returns:
+            Number of new trades (0 if skipped)
+        """
+        if not force and time.monotonic() - self.synced_at < self.min_sync_interval:
+            return 0
+        with self._sync_lock:
+            # Another caller may have synced while this one waited
+            if not force and time.monotonic() - self.synced_at < self.min_sync_interval:
+                return 0
+            added = 0
+            from_id = self.last_trade_id()
+            while True:
+                page = fetch(from_id, self.page_size) or []
+                self.sync_requests += 1
+                added += self.record_trades(page)
+                ids = [_int(t.get("id")) for t in page]
+                ids = [i for i in ids if i is not None]
+                if ids and max(ids) > from_id:
+                    self._advance_cursor(max(ids))
+                if len(page) < self.page_size or not ids or max(ids) <= from_id:
+                    break
+                from_id = max(ids)
+            self.synced_at = time.monotonic()
+            return added
+
+    # --- queries -------------------------------------------------------
+
+    @staticmethod
+    def _where(market: Optional[str], start: Optional[int], end: Optional[int], column: str, **equal):
+        clauses, params = [], []
+        if market:
+            clauses.append("market = ?")
+            params.append(market)
+        for name, value in equal.items():
+            if value is not None:
+                clauses.append(f"{name} = ?")
+                params.append(value)
+        if start is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(int(start))
+        if end is not None:
+            clauses.append(f"{column} < ?")
+            params.append(int(end))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def trades(self, market: Optional[str] = None, start: Optional[int] = None, end: Optional[int] = None,
+               order_id: Optional[str] = None, side: Optional[str] = None, limit: Optional[int] = None,
+               newest_first: bool = True) -> List[Dict]:
+        """
+        Stored trades in a time range.
+
+        Args:
+            market: Market symbol (e.g., "BTCINR"), all markets if None
+            start: Inclusive start, epoch milliseconds
+            end: Exclusive end, epoch milliseconds
+            order_id: Only the fills of this order
+            side: "buy" or "sell"
+            limit: Maximum number of trades
+            newest_first: Sort order by time
+
+        Returns:
+            trade_history records as returned by the API
+        """
+        where, params = self._where(market, start, end, "timestamp", order_id=order_id, side=side)
+        order = "DESC" if newest_first else "ASC"
+        sql = f"SELECT raw FROM trades{where} ORDER BY timestamp {order}, id {order}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [json.loads(raw) for raw, in rows]
+
+    def orders(self, market: Optional[str] = None, start: Optional[int] = None, end: Optional[int] = None,
+               status: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Stored orders created in a time range, newest first.
+        """
+        where, params = self._where(market, start, end, "created_at", status=status)
+        sql = f"SELECT raw FROM orders{where} ORDER BY created_at DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [json.loads(raw) for raw, in rows]
+
+    def order(self, order_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT raw FROM orders WHERE id = ?", (order_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def order_by_client_id(self, client_order_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT raw FROM orders WHERE client_order_id = ?", (client_order_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def markets(self) -> List[str]:
+        """
+        Markets with at least one stored trade.
+        """
+        with self._lock:
+            rows = self.conn.execute("SELECT DISTINCT market FROM trades WHERE market IS NOT NULL ORDER BY market")
+            return [market for market, in rows.fetchall()]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            trades = self.conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+            orders = self.conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+        return {"trades": trades, "orders": orders, "last_trade_id": self.last_trade_id(),
+                "sync_requests": self.sync_requests}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_default_ledger = {}  # account key -> OrderLedger
+_default_ledger_lock = threading.Lock()
+
+
+def get_default_order_ledger(base_url: Optional[str] = None, api_key: Optional[str] = None) -> OrderLedger:
+    """
+    Get the process-wide order ledger for an account on an exchange.
+
+    Each (base URL, API key) pair gets its own database next to
+    COINDCX_ORDER_LEDGER (by default order_ledger.db), named with a hash of
+    the pair, e.g. order_ledger.1a2b3c4d.db; the API key itself is not stored.
+    """
+    account = hashlib.sha1(f"{base_url or ''}|{api_key or ''}".encode()).hexdigest()[:8]
+    ledger = _default_ledger.get(account)
+    if ledger is None:
+        with _default_ledger_lock:
+            ledger = _default_ledger.get(account)
+            if ledger is None:
+                root, ext = os.path.splitext(os.getenv("COINDCX_ORDER_LEDGER", "order_ledger.db"))
+                ledger = _default_ledger[account] = OrderLedger(f"{root}.{account}{ext}", account=account)
+    return ledger
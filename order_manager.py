@@ -0,0 +1,304 @@
+# order_manager.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from market_stream import CONNECTED_EVENT, SocketIOFeed, _decode
+
+OPEN_STATUSES = ("init", "open", "partially_filled")
+
+
+def _orders_from(response) -> List[Dict]:
+    """
+    Orders from a REST or socket payload: a list, {"orders": [...]} or a single order.
+    """
+    if response is None:
+        return []
+    if isinstance(response, dict):
+        if "orders" in response:
+            return list(response["orders"] or [])
+        return [response] if "id" in response else []
+    return [order for order in response if isinstance(order, dict)]
+
+
+def private_feed(api_service, url: str = SocketIOFeed.URL) -> SocketIOFeed:
+    """
+    Authenticated CoinDCX socket feed for the account's order, trade and
+    balance updates (the "coindcx" private channel).
+    """
+    _, signature = api_service.signer.sign_payload({"channel": "coindcx"})
+    channel = {"channelName": "coindcx", "authSignature": signature, "apiKey": api_service.api_key}
+    return SocketIOFeed(url, channels=[channel], events=OrderManager.EVENTS)
+
+
+class OrderManager:
+    """
+    Local, authoritative table of the account's orders.
+
+    Orders are indexed by id, client_order_id and market (open orders
+    only), and kept current by the private order/trade stream. REST is only
+    used to reconcile after every (re)connect: the open orders are
+    reloaded, and orders the table still thinks are open but the exchange
+    no longer lists get their final status fetched. Each connection has a
+    generation number, and a reconcile that finishes after its connection
+    dropped does not mark the table live. Every update carries
+    its updated_at, and an older update never overwrites a newer one, so
+    stream frames and REST results can arrive in any order.
+    """
+
+    ORDER_EVENT = "order-update"
+    TRADE_EVENT = "trade-update"
+    BALANCE_EVENT = "balance-update"
+    EVENTS = (ORDER_EVENT, TRADE_EVENT, BALANCE_EVENT)
+
+    def __init__(self, order_service, feed=None, keep_closed: int = 1000, max_backoff: float = 30.0):
+        """
+        Args:
+            order_service: OrderService used for REST reconciliation
+            feed: Object with run(on_event, stop) delivering private events
+                (defaults to the authenticated CoinDCX socket)
+            keep_closed: Closed orders kept for status lookups
+            max_backoff: Upper bound on the reconnect delay in seconds
+        """
+        self.order_service = order_service
+        self.feed = feed or private_feed(order_service.api_service)
+        self.keep_closed = keep_closed
+        self.max_backoff = max_backoff
+
+        self.orders = {}               # id -> order
+        self._by_client_id = {}        # client_order_id -> id
+        self._by_market = {}           # market -> set of open order ids
+        self._closed = OrderedDict()   # closed order ids, oldest first
+        self._lock = threading.RLock()
+        self._subscribers = []
+        if hasattr(order_service, "on_order_update"):
+            # Keeps the order ledger and risk engine current from the stream as well
+            self.subscribe(order_service.on_order_update)
+
+        self.connected = False
+        self.reconciled = False
+        self.generation = 0            # bumped on every connect and disconnect
+        self.reconnects = 0
+        self.reconciliations = 0
+        self.frames = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_live(self) -> bool:
+        """
+        True while connected and reconciled, i.e. the local table can be trusted.
+        """
+        return self.connected and self.reconciled
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> None:
+        """
+        Receive every order whose state changed, after the table is updated.
+        """
+        self._subscribers.append(callback)
+
+    # --- table ---------------------------------------------------------
+
+    def apply(self, order: Dict) -> bool:
+        """
+        Merge one order into the table unless the held copy is newer.
+
+        Returns:
+            True if the table changed
+        """
+        order_id = order.get("id")
+        if not order_id:
+            return False
+        with self._lock:
+            current = self.orders.get(order_id)
+            if current is not None and order.get("updated_at", 0) < current.get("updated_at", 0):
+                return False
+            merged = dict(current or {}, **order)
+            self.orders[order_id] = merged
+            if merged.get("client_order_id"):
+                self._by_client_id[merged["client_order_id"]] = order_id
+            self._index(merged)
+        for callback in list(self._subscribers):
+            try:
+                callback(merged)
+            except Exception as e:
+                print(f"[ERROR] Order subscriber failed: {e}")
+        return True
+
+    def _index(self, order: Dict) -> None:
+        order_id, market = order["id"], order.get("market")
+        if order.get("status") in OPEN_STATUSES:
+            self._by_market.setdefault(market, set()).add(order_id)
+            self._closed.pop(order_id, None)
+            return
+        ids = self._by_market.get(market)
+        if ids is not None:
+            ids.discard(order_id)
+            if not ids:
+                del self._by_market[market]
+        self._closed[order_id] = None
+        self._closed.move_to_end(order_id)
+        while len(self._closed) > self.keep_closed:
+            evicted, _ = self._closed.popitem(last=False)
+            order = self.orders.pop(evicted, None)
+            if order is not None and self._by_client_id.get(order.get("client_order_id")) == evicted:
+                del self._by_client_id[order["client_order_id"]]
+
+    def apply_response(self, response) -> None:
+        """
+        Track orders from a create/status response right away, before the
+        stream reports them.
+        """
+        for order in _orders_from(response):
+            self.apply(order)
+
+    def apply_trade(self, trade: Dict) -> bool:
+        """
+        Apply a fill from the trade stream ({"o": order id, "q", "T", ...}) to
+        an order the table holds, unless a newer order update already covers it.
+        """
+        with self._lock:
+            order = self.orders.get(trade.get("o"))
+            if order is None or trade.get("T", 0) <= order.get("updated_at", 0):
+                return False
+            remaining = max(float(order.get("remaining_quantity", 0)) - float(trade.get("q", 0)), 0.0)
+            update = {
+                "id": order["id"],
+                "remaining_quantity": remaining,
+                "status": "filled" if remaining <= 0 else "partially_filled",
+                "updated_at": trade["T"],
+            }
+        return self.apply(update)
+
+    def get(self, order_id: str) -> Optional[Dict]:
+        with self._lock:
+            order = self.orders.get(order_id)
+            return dict(order) if order is not None else None
+
+    def get_by_client_id(self, client_order_id: str) -> Optional[Dict]:
+        with self._lock:
+            order_id = self._by_client_id.get(client_order_id)
+            return self.get(order_id) if order_id else None
+
+    def active_orders(self, market: Optional[str] = None) -> List[Dict]:
+        """
+        Open orders, optionally for one market, oldest first.
+        """
+        with self._lock:
+            if market is not None:
+                ids = self._by_market.get(market, ())
+            else:
+                ids = [order_id for ids in self._by_market.values() for order_id in ids]
+            orders = [dict(self.orders[order_id]) for order_id in ids]
+        return sorted(orders, key=lambda o: o.get("created_at", 0))
+
+    # --- stream --------------------------------------------------------
+
+    def reconcile(self, generation: Optional[int] = None) -> None:
+        """
+        Bring the table in line with REST: reload open orders, then fetch
+        the status of orders that closed while the stream was down.
+
+        Args:
+            generation: Connection this reconcile belongs to; the table is
+                only marked reconciled if that connection is still current
+        """
+        rest_orders = _orders_from(self.order_service._fetch_active_orders())
+        for order in rest_orders:
+            self.apply(order)
+        listed = {order["id"] for order in rest_orders}
+        with self._lock:
+            missing = [order_id for ids in self._by_market.values() for order_id in ids if order_id not in listed]
+        for order_id in missing:
+            try:
+                self.apply(self.order_service._fetch_order_status(order_id))
+            except Exception as e:
+                print(f"[ERROR] Could not reconcile order {order_id}: {e}")
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                print(f"[INFO] Ignoring reconcile for stale order stream connection {generation}")
+                return
+            self.reconciled = True
+            self.reconciliations += 1
+
+    def _reconcile_in_background(self, generation: int) -> None:
+        def run():
+            try:
+                self.reconcile(generation)
+            except Exception as e:
+                print(f"[ERROR] Order reconciliation failed: {e}")
+
+        threading.Thread(target=run, name="order-reconcile", daemon=True).start()
+
+    def _on_event(self, event: str, data) -> None:
+        try:
+            if event == CONNECTED_EVENT:
+                # Subscribed: anything missed from here on arrives on the stream
+                with self._lock:
+                    self.connected = True
+                    self.reconciled = False
+                    generation = self.generation
+                self._reconcile_in_background(generation)
+                return
+            payload = _decode(data)
+            if event == self.ORDER_EVENT:
+                for order in _orders_from(payload):
+                    self.apply(order)
+            elif event == self.TRADE_EVENT:
+                for trade in payload if isinstance(payload, list) else [payload]:
+                    self.apply_trade(trade)
+            self.frames += 1
+        except Exception as e:
+            print(f"[ERROR] Bad order stream frame ({event}): {e}")
+
+    def start(self) -> "OrderManager":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="order-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            with self._lock:
+                self.generation += 1
+            try:
+                # `connected` is set by CONNECTED_EVENT once the channel is joined
+                self.feed.run(self._on_event, self._stop)
+            except Exception as e:
+                print(f"[ERROR] Order stream disconnected: {e}")
+            finally:
+                with self._lock:
+                    # Reconciles still running for this connection are now stale
+                    self.generation += 1
+                    self.connected = False
+                    self.reconciled = False
+
+            if self._stop.is_set():
+                break
+            if time.monotonic() - started > 60:
+                backoff = 1.0
+            self.reconnects += 1
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            open_orders = sum(len(ids) for ids in self._by_market.values())
+            return {
+                "live": self.is_live,
+                "connected": self.connected,
+                "orders": len(self.orders),
+                "open_orders": open_orders,
+                "frames": self.frames,
+                "reconnects": self.reconnects,
+                "reconciliations": self.reconciliations,
+            }
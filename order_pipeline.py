@@ -0,0 +1,407 @@
+# order_pipeline.py
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from api_service import is_ambiguous_error
+
+
+class ClientOrderIds:
+    """
+    Monotonic, collision-free client order ids: "<prefix>_<node>_<counter>".
+
+    The counter starts at the current time in microseconds and goes up by
+    one per id, so ids never repeat within a process and keep increasing
+    across restarts. A random node tag separates processes started at the
+    same moment.
+    """
+
+    def __init__(self, prefix: str = "coindcx", node: Optional[str] = None):
+        self.prefix = prefix
+        self.node = node or os.urandom(2).hex()
+        self._last = 0
+        self._lock = threading.Lock()
+
+    def next_id(self) -> str:
+        with self._lock:
+            self._last = max(self._last + 1, time.time_ns() // 1000)
+            return f"{self.prefix}_{self.node}_{self._last}"
+
+
+_default_ids = None
+_default_ids_lock = threading.Lock()
+
+
+def get_default_client_ids() -> ClientOrderIds:
+    """
+    Get the process-wide client order id generator.
+    """
+    global _default_ids
+    if _default_ids is None:
+        with _default_ids_lock:
+            if _default_ids is None:
+                _default_ids = ClientOrderIds()
+    return _default_ids
+
+
+class OrderStatusUnknown(RuntimeError):
+    """
+    Set on an order's Future when sending it failed in a way that may still
+    have placed it (timeout, connection lost, 5xx) and its status could not
+    be confirmed. The order stays pending in the journal, with its funds
+    reserved, until recover() looks it up.
+    """
+
+    def __init__(self, client_order_id: str, error: str):
+        super().__init__(f"Order {client_order_id} status unknown: {error}")
+        self.client_order_id = client_order_id
+        self.error = error
+
+
+class OrderJournal:
+    """
+    Append-only JSON-lines journal of submitted orders.
+
+    Every order is written as "pending" before it is sent and as "done"
+    (or "failed") once the exchange answered, so after a crash the orders
+    that were in flight can be found and checked. The file is rewritten
+    with only the pending entries when it is opened and whenever the
+    number of finished entries passes `compact_after`.
+    """
+
+    def __init__(self, path: str, fsync: bool = False, compact_after: int = 10000):
+        """
+        Args:
+            path: Journal file
+            fsync: fsync after every entry (survives power loss, not just a crash)
+            compact_after: Finished entries after which the file is compacted
+        """
+        self.path = path
+        self.fsync = fsync
+        self.compact_after = compact_after
+        self.pending = {}  # client_order_id -> spec
+        self._finished = 0
+        self._lock = threading.Lock()
+        self._load()
+        self._file = None
+        self._rewrite()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash
+                if entry["state"] == "pending":
+                    self.pending[entry["client_order_id"]] = entry["spec"]
+                else:
+                    self.pending.pop(entry["client_order_id"], None)
+
+    def _rewrite(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self._file is not None:
+            self._file.close()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            for client_order_id, spec in self.pending.items():
+                f.write(json.dumps({"state": "pending", "client_order_id": client_order_id, "spec": spec}) + "\n")
+        os.replace(tmp, self.path)
+        self._file = open(self.path, "a")
+        self._finished = 0
+
+    def _write(self, entry: Dict) -> None:
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def add(self, client_order_id: str, spec: Dict) -> None:
+        with self._lock:
+            self.pending[client_order_id] = spec
+            self._write({"state": "pending", "client_order_id": client_order_id, "spec": spec, "t": time.time()})
+
+    def finish(self, client_order_id: str, state: str = "done", order_id: Optional[str] = None,
+               error: Optional[str] = None) -> None:
+        with self._lock:
+            self.pending.pop(client_order_id, None)
+            self._write({"state": state, "client_order_id": client_order_id, "order_id": order_id, "error": error,
+                         "t": time.time()})
+            self._finished += 1
+            if self._finished >= self.compact_after:
+                self._rewrite()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class OrderPipeline:
+    """
+    Asynchronous order submission.
+
+    submit() checks the order against the market rules, gives it a client
+    order id, journals it and queues it, then returns a Future right away.
+    A pool of worker threads sends the queued orders. When several are
+    waiting, a worker sends up to OrderService.MAX_ORDERS_PER_BATCH of them
+    in one create_multiple request. The queue is bounded, so a producer
+    faster than the exchange blocks (or gets queue.Full) instead of piling
+    up memory.
+
+    A send that fails ambiguously (the exchange may have the order) is not
+    marked failed: the order is looked up by client order id, and if that
+    is inconclusive too it stays pending and its Future raises
+    OrderStatusUnknown.
+    """
+
+    def __init__(self, order_service, workers: int = 8, queue_size: int = 1000,
+                 journal_path: Optional[str] = "order_journal.jsonl", batch: bool = True, fsync: bool = False,
+                 resolve_delay: float = 1.0):
+        """
+        Args:
+            order_service: OrderService used to send the orders
+            workers: Worker threads sending orders
+            queue_size: Orders waiting to be sent before submit() blocks
+            journal_path: Pending-order journal (None to disable)
+            batch: Send waiting orders together through create_multiple
+            fsync: fsync every journal entry
+            resolve_delay: Seconds to wait before looking up an order whose
+                send failed ambiguously
+        """
+        self.order_service = order_service
+        self.batch = batch
+        self.resolve_delay = resolve_delay
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.journal = OrderJournal(journal_path, fsync=fsync) if journal_path else None
+        self._lock = threading.Lock()
+        self._counts = {"submitted": 0, "placed": 0, "failed": 0, "unknown": 0, "requests": 0}
+        self._in_flight = set()  # client ids queued or being sent; recover() leaves them alone
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"order-pipeline-{i}", daemon=True) for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, market: str, side: str, quantity: float, price: Optional[float] = None,
+               order_type: Optional[str] = None, client_order_id: Optional[str] = None,
+               timeout: Optional[float] = None) -> Future:
+        """
+        Queue an order.
+
+        Args:
+            market: Market identifier (e.g., "BTCINR")
+            side: "buy" or "sell"
+            quantity: Order quantity
+            price: Limit price (market order if None)
+            order_type: Order type (defaults from price)
+            client_order_id: Client id (a fresh monotonic one if None)
+            timeout: Seconds to wait for queue space (None waits indefinitely)
+
+        Returns:
+            Future resolving to the order acknowledged by the exchange
+
+        Raises:
+            OrderValidationError: If the order breaks the market rules or a
+                risk limit (nothing is queued)
+            queue.Full: If no queue space frees up within `timeout`
+        """
+        if self._closed:
+            raise RuntimeError("Order pipeline is closed")
+        order_type = order_type or ("limit_order" if price is not None else "market_order")
+        client_order_id = client_order_id or self.order_service.client_ids.next_id()
+        price, quantity = self.order_service.check_order(market, side, order_type, quantity, price, client_order_id)
+        spec = {
+            "market": market,
+            "side": side.lower(),
+            "order_type": order_type,
+            "quantity": quantity,
+            "client_order_id": client_order_id,
+        }
+        if price is not None:
+            spec["price"] = price
+        return self._enqueue(spec, timeout)
+
+    def _enqueue(self, spec: Dict, timeout: Optional[float] = None) -> Future:
+        future = Future()
+        if self.journal is not None:
+            self.journal.add(spec["client_order_id"], spec)
+        with self._lock:
+            self._in_flight.add(spec["client_order_id"])
+        try:
+            self.queue.put((spec, future), timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self._in_flight.discard(spec["client_order_id"])
+            if self.journal is not None:
+                self.journal.finish(spec["client_order_id"], "failed", error="queue full")
+            self.order_service._release(spec["client_order_id"])
+            raise
+        with self._lock:
+            self._counts["submitted"] += 1
+        return future
+
+    def _worker(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            items = [item]
+            if self.batch:
+                while len(items) < self.order_service.MAX_ORDERS_PER_BATCH:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        self.queue.put(None)  # leave the stop signal for another worker
+                        break
+                    items.append(item)
+            items = [(spec, future) for spec, future in items if future.set_running_or_notify_cancel()]
+            if items:
+                self._send(items)
+
+    def _send(self, items) -> None:
+        with self._lock:
+            self._counts["requests"] += 1
+        try:
+            if len(items) == 1:
+                spec = items[0][0]
+                if spec.get("price") is not None:
+                    response = self.order_service.place_limit_order(
+                        spec["market"], spec["side"], spec["price"], spec["quantity"],
+                        client_order_id=spec["client_order_id"],
+                    )
+                else:
+                    response = self.order_service.place_market_order(
+                        spec["market"], spec["side"], spec["quantity"], client_order_id=spec["client_order_id"],
+                    )
+                orders = response.get("orders", [response]) if isinstance(response, dict) else response
+                results = [{"ok": True, "order": orders[0], "error": None}]
+            else:
+                results = self.order_service.place_orders_batch([spec for spec, _ in items], max_workers=1)
+        except Exception as e:
+            results = [{"ok": False, "order": None, "error": str(e), "unknown": is_ambiguous_error(e)}] * len(items)
+
+        if any(result.get("unknown") for result in results):
+            # Give an order that did reach the exchange time to show up in a status lookup
+            time.sleep(self.resolve_delay)
+        for (spec, future), result in zip(items, results):
+            client_order_id = spec["client_order_id"]
+            if result.get("unknown"):
+                result = self._resolve(client_order_id, result["error"])
+            if result["ok"]:
+                if self.journal is not None:
+                    self.journal.finish(client_order_id, "done", order_id=result["order"].get("id"))
+                with self._lock:
+                    self._counts["placed"] += 1
+                future.set_result(result["order"])
+            elif result.get("unknown"):
+                # Left pending in the journal (and reserved) for recover()
+                with self._lock:
+                    self._counts["unknown"] += 1
+                future.set_exception(OrderStatusUnknown(client_order_id, result["error"]))
+            else:
+                if self.journal is not None:
+                    self.journal.finish(client_order_id, "failed", error=result["error"])
+                with self._lock:
+                    self._counts["failed"] += 1
+                future.set_exception(RuntimeError(f"Order {client_order_id} failed: {result['error']}"))
+            with self._lock:
+                self._in_flight.discard(client_order_id)
+
+    def _resolve(self, client_order_id: str, error: str) -> Dict:
+        """
+        Look up an order by client id after an ambiguous send (or, from
+        recover(), after a restart). A placed order is tracked; a rejected,
+        failed or unknown one has its reservation released and comes back
+        as not ok, with the exchange's copy in "order" if it has one; a
+        lookup that fails comes back "unknown".
+        """
+        try:
+            order = self.order_service.get_order_status_by_client_id(client_order_id)
+        except Exception as e:
+            if getattr(e, "status_code", None) != 404:
+                print(f"[ERROR] Could not check order {client_order_id}: {e}")
+                return {"ok": False, "order": None, "error": error, "unknown": True}
+            order = None
+        if order and order.get("id") and order.get("status") not in ("rejected", "failed"):
+            self.order_service._track(order)
+            return {"ok": True, "order": order, "error": None}
+        self.order_service._release(client_order_id)
+        if order and order.get("id"):
+            return {"ok": False, "order": order,
+                    "error": f"{error} (exchange status {order.get('status')}: {order.get('message', '')})"}
+        return {"ok": False, "order": None, "error": f"{error} (not placed on the exchange)"}
+
+    def recover(self, resubmit: bool = False) -> List[Dict]:
+        """
+        Resolve orders left pending in the journal by an earlier run.
+
+        Each is looked up by client order id, as after an ambiguous send.
+        Orders the exchange has are marked done, ones it rejected or failed
+        are marked failed. Orders it never received are resubmitted under the
+        same client id if `resubmit` is set, otherwise marked failed. Also resolves
+        orders of this run whose Future raised OrderStatusUnknown.
+
+        Returns:
+            One entry per recovered order: {"client_order_id", "spec", "state", "order", "future"}
+        """
+        if self.journal is None:
+            return []
+        recovered = []
+        with self._lock:
+            in_flight = set(self._in_flight)
+        for client_order_id, spec in list(self.journal.pending.items()):
+            if client_order_id in in_flight:
+                continue
+            result = self._resolve(client_order_id, "pending in the journal")
+            entry = {"client_order_id": client_order_id, "spec": spec, "state": None, "order": result["order"],
+                     "future": None}
+            if result.get("unknown"):
+                entry["state"] = "unknown"
+            elif result["ok"]:
+                entry["state"] = "placed"
+                self.journal.finish(client_order_id, "done", order_id=result["order"].get("id"))
+            elif result["order"] is not None:
+                # Received and rejected: final, and its client id is taken
+                entry["state"] = "rejected"
+                self.journal.finish(client_order_id, "failed", order_id=result["order"].get("id"),
+                                    error=result["error"])
+            elif resubmit:
+                entry["state"] = "resubmitted"
+                self.journal.pending.pop(client_order_id, None)
+                entry["future"] = self._enqueue(spec)
+            else:
+                entry["state"] = "not_sent"
+                self.journal.finish(client_order_id, "failed", error="not received by the exchange")
+            recovered.append(entry)
+        return recovered
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop accepting orders; with `wait`, send everything queued first.
+        """
+        self._closed = True
+        for _ in self._workers:
+            self.queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        if self.journal is not None and wait:
+            self.journal.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._counts, queued=self.queue.qsize(),
+                        pending=len(self.journal.pending) if self.journal is not None else None)
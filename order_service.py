@@ -1,33 +1,152 @@
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List
 from datetime import datetime
-from redis_cache import cache_data, get_cached_data, append_to_cache_list
+from api_service import is_ambiguous_error
+from redis_cache import cache_data, get_cached_data, extend_cache_list, get_cache_list
+from market_metadata import MarketMetadataCache, OrderValidationError, get_default_market_metadata
+from order_ledger import OrderLedger, get_default_order_ledger
+from order_manager import _orders_from
+from order_pipeline import ClientOrderIds, get_default_client_ids
 
 class OrderService:
     """
     Service for handling order-related operations.
     """
+
+    # Maximum orders CoinDCX accepts in one create_multiple call
+    MAX_ORDERS_PER_BATCH = 10
+    # Order ids sent in one cancel_by_ids call
+    MAX_IDS_PER_CANCEL = 100
     
-    def __init__(self, api_service):
+    def __init__(self, api_service, market_metadata: MarketMetadataCache = None, order_manager=None,
+                 client_ids: ClientOrderIds = None, ledger: OrderLedger = None, risk_engine=None):
         """
         Initialize the order service.
         
         Args:
             api_service: An instance of CoinDCXApiService
+            market_metadata: Optional MarketMetadataCache used to round and
+                check orders before sending; by default the process-wide one
+            order_manager: Optional order_manager.OrderManager; while it is
+                live, active orders and order status are local lookups
+            client_ids: Optional ClientOrderIds generator; by default the
+                process-wide one
+            ledger: Optional OrderLedger holding trade and order history; by
+                default the process-wide one for the account and base URL
+            risk_engine: Optional risk_engine.RiskEngine; orders are checked
+                against its limits and their funds reserved before sending
         """
         self.api_service = api_service
+        self.market_metadata = (market_metadata if market_metadata is not None
+                                else get_default_market_metadata(self.api_service.base_url))
+        self.order_manager = order_manager
+        self.client_ids = client_ids or get_default_client_ids()
+        self.ledger = (ledger if ledger is not None
+                       else get_default_order_ledger(self.api_service.base_url, self.api_service.api_key))
+        self.risk_engine = risk_engine
+
+    def _load_market_details(self) -> List[Dict]:
+        return self.api_service.make_public_request("/exchange/v1/markets_details")
+
+    def check_order(self, market: str, side: str, order_type: str, quantity: float, price: float = None,
+                    client_order_id: str = None):
+        """
+        Round an order to its market's precision and step size and check it
+        against the market's limits, without a round-trip to the exchange.
+        If the market rules cannot be loaded the order is passed through as given.
+        With a risk engine and a client_order_id, the order is then checked
+        against the risk limits and its funds are reserved.
+        
+        Returns:
+            Tuple of (price, quantity) to send
+            
+        Raises:
+            OrderValidationError: If the exchange would reject the order
+                (RiskLimitError if it breaches a risk limit)
+        """
+        price, quantity = self._apply_market_rules(market, side, order_type, quantity, price)
+        if self.risk_engine is not None and client_order_id:
+            self.risk_engine.check(client_order_id, market, side, order_type, quantity, price)
+        return price, quantity
+
+    def _apply_market_rules(self, market: str, side: str, order_type: str, quantity: float, price: float = None):
+        try:
+            self.market_metadata.ensure_loaded(self._load_market_details)
+        except Exception as e:
+            print(f"[ERROR] Market rules unavailable, order not checked locally: {e}")
+            return price, quantity
+        if not len(self.market_metadata):
+            return price, quantity
+        return self.market_metadata.check_order(market, side, order_type, quantity, price)
+
+    def _release(self, client_order_id: str) -> None:
+        if self.risk_engine is not None:
+            self.risk_engine.release(client_order_id)
+
+    def _released(self, results: List[Dict]) -> List[Dict]:
+        # Cancelled orders give their reserved funds back
+        if self.risk_engine is not None:
+            for result in results:
+                if result["ok"]:
+                    self.risk_engine.release_order(result["id"])
+        return results
     
+    def _track(self, response, user_id=None) -> None:
+        """
+        Hand the orders in a create response to the order manager and the
+        ledger, and append them to the user's capped order list in Redis.
+        """
+        orders = _orders_from(response)
+        if self.order_manager is not None:
+            self.order_manager.apply_response(orders)
+        if self.risk_engine is not None:
+            self.risk_engine.on_orders(orders)
+        try:
+            self.ledger.record_orders(orders)
+        except Exception as e:
+            print(f"[ERROR] Could not record orders in the ledger: {e}")
+        if user_id and orders:
+            try:
+                # One atomic RPUSH + LTRIM for all orders in the response
+                extend_cache_list(user_id, "order_history", orders)
+            except Exception as e:
+                print(f"[ERROR] Could not cache order history for {user_id}: {e}")
+
+    def on_order_update(self, order: Dict) -> None:
+        """
+        Keep the ledger and the risk engine current from an order stream update.
+        """
+        try:
+            self.ledger.record_orders([order])
+        except Exception as e:
+            print(f"[ERROR] Could not record order update in the ledger: {e}")
+        if self.risk_engine is not None:
+            self.risk_engine.on_order(order)
+
+    def get_placed_orders(self, user_id, page: int = 0, page_size: int = 50) -> List[Dict]:
+        """
+        Orders a user placed through this app, newest first, one page at a
+        time from their capped Redis list.
+        """
+        return get_cache_list(user_id, "order_history", page=page, page_size=page_size)
+
     def place_limit_order(
         self, 
         market: str,
         side: str, 
         price: float, 
         quantity: float,
-        user_id=None
+        user_id=None,
+        client_order_id: str = None
     ) -> Dict:
         """
-        Place a limit order.
+        Place a limit order. Price and quantity are rounded to the market's
+        rules first; an invalid order raises OrderValidationError unsent.
         """
+        client_order_id = client_order_id or self.client_ids.next_id()
+        price, quantity = self.check_order(market, side, "limit_order", quantity, price, client_order_id)
+
         # Updated endpoint to match CoinDCX API
         endpoint = "/exchange/v1/orders/create"
         
@@ -38,12 +157,17 @@ class OrderService:
             "price_per_unit": float(price),
             "total_quantity": float(quantity),
             "timestamp": int(time.time() * 1000),
-            "client_order_id": f"coindcx_{int(time.time() * 1000)}"
+            "client_order_id": client_order_id
         }
         
-        response = self.api_service.make_authenticated_request(endpoint, body)
-        if user_id:
-            append_to_cache_list(f"order_history:{user_id}", response)
+        try:
+            response = self.api_service.make_authenticated_request(endpoint, body)
+        except Exception as e:
+            # The exchange may have the order after a timeout or 5xx: keep its funds reserved
+            if not is_ambiguous_error(e):
+                self._release(client_order_id)
+            raise
+        self._track(response, user_id)
         return response
     
     def place_market_order(
@@ -51,11 +175,16 @@ class OrderService:
         market: str,
         side: str, 
         quantity: float,
-        user_id=None
+        user_id=None,
+        client_order_id: str = None
     ) -> Dict:
         """
-        Place a market order.
+        Place a market order. The quantity is rounded to the market's step
+        size first; an invalid order raises OrderValidationError unsent.
         """
+        client_order_id = client_order_id or self.client_ids.next_id()
+        _, quantity = self.check_order(market, side, "market_order", quantity, client_order_id=client_order_id)
+
         # Updated endpoint to match CoinDCX API
         endpoint = "/exchange/v1/orders/create"
         
@@ -65,13 +194,104 @@ class OrderService:
             "market": market,
             "total_quantity": float(quantity),
             "timestamp": int(time.time() * 1000),
-            "client_order_id": f"coindcx_{int(time.time() * 1000)}"
+            "client_order_id": client_order_id
         }
         
-        response = self.api_service.make_authenticated_request(endpoint, body)
-        if user_id:
-            append_to_cache_list(f"order_history:{user_id}", response)
+        try:
+            response = self.api_service.make_authenticated_request(endpoint, body)
+        except Exception as e:
+            # The exchange may have the order after a timeout or 5xx: keep its funds reserved
+            if not is_ambiguous_error(e):
+                self._release(client_order_id)
+            raise
+        self._track(response, user_id)
         return response
+
+
+    def place_orders_batch(self, specs: List[Dict], user_id=None, max_workers: int = 4) -> List[Dict]:
+        """
+        Place many orders through the multiple-order create endpoint.
+        
+        Orders are chunked to MAX_ORDERS_PER_BATCH per request and the chunks
+        are sent concurrently.
+        
+        Args:
+            specs: Order specs, each with market, side, quantity and optionally
+                price (limit order if given, market order otherwise) and client_order_id;
+                specs failing the local market rule check are not sent
+            user_id: User identifier; accepted orders are added to the order history
+            max_workers: Maximum chunks in flight at once
+            
+        Returns:
+            One result per spec, in input order: {"spec", "ok", "order", "error"};
+            orders of a chunk whose request may still have reached the exchange
+            (timeout, 5xx) also get "unknown": True and keep their reservation
+        """
+        endpoint = "/exchange/v1/orders/create_multiple"
+        results = [None] * len(specs)
+        bodies = [None] * len(specs)
+        for i, spec in enumerate(specs):
+            price = spec.get("price")
+            order_type = spec.get("order_type") or ("limit_order" if price is not None else "market_order")
+            client_order_id = spec.get("client_order_id") or self.client_ids.next_id()
+            try:
+                price, quantity = self.check_order(
+                    spec["market"], spec["side"], order_type, spec["quantity"], price, client_order_id
+                )
+            except OrderValidationError as e:
+                results[i] = {"spec": spec, "ok": False, "order": None, "error": str(e)}
+                continue
+            body = {
+                "side": spec["side"].lower(),
+                "order_type": order_type,
+                "market": spec["market"],
+                "total_quantity": float(quantity),
+                "client_order_id": client_order_id,
+            }
+            if price is not None:
+                body["price_per_unit"] = float(price)
+            bodies[i] = body
+
+        valid = [i for i, body in enumerate(bodies) if body is not None]
+        chunks = [
+            valid[start:start + self.MAX_ORDERS_PER_BATCH]
+            for start in range(0, len(valid), self.MAX_ORDERS_PER_BATCH)
+        ]
+
+        def send_chunk(indexes):
+            return self.api_service.make_authenticated_request(
+                endpoint, {"orders": [bodies[i] for i in indexes]}
+            )
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+            futures = [(indexes, pool.submit(send_chunk, indexes)) for indexes in chunks]
+
+            for indexes, future in futures:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    for i in indexes:
+                        results[i] = {"spec": specs[i], "ok": False, "order": None, "error": str(e),
+                                      "unknown": is_ambiguous_error(e)}
+                    continue
+
+                # Map acknowledged orders back to their spec by client_order_id
+                orders = response.get("orders", []) if isinstance(response, dict) else response
+                by_client_id = {order.get("client_order_id"): order for order in orders or []}
+                for i in indexes:
+                    order = by_client_id.get(bodies[i]["client_order_id"])
+                    if order is None:
+                        results[i] = {"spec": specs[i], "ok": False, "order": None, "error": "Order not acknowledged by exchange"}
+                    elif "id" not in order or order.get("status") in ("rejected", "failed"):
+                        results[i] = {"spec": specs[i], "ok": False, "order": order, "error": order.get("message", order.get("status"))}
+                    else:
+                        results[i] = {"spec": specs[i], "ok": True, "order": order, "error": None}
+
+        self._track([r["order"] for r in results if r["ok"]], user_id)
+        for body, result in zip(bodies, results):
+            if body is not None and not result["ok"] and not result.get("unknown"):
+                self._release(body["client_order_id"])
+        return results
    
     def cancel_order(self, order_id: str, user_id=None) -> Dict:
         """
@@ -86,34 +306,174 @@ class OrderService:
         }
         
         response = self.api_service.make_authenticated_request(endpoint, body)
+        if self.risk_engine is not None:
+            self.risk_engine.release_order(order_id)
         return response
+
+    def cancel_orders(self, order_ids: List[str], max_workers: int = 8) -> List[Dict]:
+        """
+        Cancel many orders by id.
+        
+        Ids are sent in cancel_by_ids requests of up to MAX_IDS_PER_CANCEL,
+        concurrently. If a bulk request fails, its orders are cancelled one
+        by one, concurrently, so each still gets its own result.
+        
+        Args:
+            order_ids: Ids of the orders to cancel
+            max_workers: Maximum requests in flight at once
+            
+        Returns:
+            One result per id, in input order: {"id", "ok", "error"}
+        """
+        order_ids = list(dict.fromkeys(order_ids))
+        chunks = [
+            order_ids[start:start + self.MAX_IDS_PER_CANCEL]
+            for start in range(0, len(order_ids), self.MAX_IDS_PER_CANCEL)
+        ]
+
+        def cancel_chunk(ids):
+            try:
+                self.api_service.make_authenticated_request(
+                    "/exchange/v1/orders/cancel_by_ids", {"ids": ids, "timestamp": int(time.time() * 1000)}
+                )
+                return [{"id": order_id, "ok": True, "error": None} for order_id in ids]
+            except Exception as e:
+                print(f"[ERROR] Bulk cancel failed, cancelling {len(ids)} orders one by one: {e}")
+                return self._cancel_each(ids, max_workers)
+
+        if len(chunks) <= 1:
+            return self._released(cancel_chunk(chunks[0]) if chunks else [])
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+            return self._released([result for results in pool.map(cancel_chunk, chunks) for result in results])
+
+    def _cancel_each(self, order_ids: List[str], max_workers: int = 8) -> List[Dict]:
+        """
+        Cancel orders with concurrent single-order requests.
+        """
+        def cancel(order_id):
+            try:
+                self.cancel_order(order_id)
+                return {"id": order_id, "ok": True, "error": None}
+            except Exception as e:
+                return {"id": order_id, "ok": False, "error": str(e)}
+
+        if not order_ids:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(order_ids)))) as pool:
+            return list(pool.map(cancel, order_ids))
+
+    def cancel_all(self, market: str = None, side: str = None, max_workers: int = 8) -> List[Dict]:
+        """
+        Cancel every open order, optionally only in one market and/or side.
+        
+        With a market, the cancel_all endpoint cancels them in one request;
+        otherwise (or if that request fails) the open orders are cancelled by
+        id through cancel_orders.
+        
+        Args:
+            market: Only cancel orders in this market (e.g., "BTCINR")
+            side: Only cancel "buy" or "sell" orders
+            max_workers: Maximum requests in flight at once
+            
+        Returns:
+            One result per order that was open: {"id", "ok", "error"}
+        """
+        targets = [
+            order for order in self._open_orders(market)
+            if (not market or order.get("market") == market) and (not side or order.get("side") == side.lower())
+        ]
+        order_ids = [order["id"] for order in targets]
+        if not order_ids:
+            return []
+
+        if market:
+            body = {"market": market, "timestamp": int(time.time() * 1000)}
+            if side:
+                body["side"] = side.lower()
+            try:
+                self.api_service.make_authenticated_request("/exchange/v1/orders/cancel_all", body)
+                return self._released([{"id": order_id, "ok": True, "error": None} for order_id in order_ids])
+            except Exception as e:
+                print(f"[ERROR] cancel_all failed for {market}, cancelling by id: {e}")
+        return self.cancel_orders(order_ids, max_workers)
+
+    def _open_orders(self, market: str = None) -> List[Dict]:
+        """
+        Current open orders, bypassing the Redis cache (local table when live).
+        """
+        if self.order_manager is not None and self.order_manager.is_live:
+            return self.order_manager.active_orders(market)
+        response = self._fetch_active_orders(market)
+        if isinstance(response, dict):
+            response = response.get("orders", [])
+        return [order for order in response or [] if not market or order.get("market") == market]
     
-    def get_active_orders(self, user_id=None):
+    def get_active_orders(self, user_id=None, market: str = None):
         """
-        Get active orders (with Redis caching).
+        Get active orders: from the local order table while the order
+        stream is live, else from the API (with Redis caching per market).
         """
-        cache_key = f"active_orders:{user_id}" if user_id else "active_orders:global"
-        cached = get_cached_data(cache_key)
-        if cached:
-            return cached
+        if self.order_manager is not None and self.order_manager.is_live:
+            return self.order_manager.active_orders(market)
+
+        cache_key = f"active_orders:{market}" if market else "active_orders"
+        if user_id:
+            cached = get_cached_data(user_id, cache_key)
+            if cached:
+                return cached
+
+        result = self._fetch_active_orders(market)
+        if market:
+            # Keep the response shape, but never return another market's orders
+            if isinstance(result, dict) and "orders" in result:
+                result = dict(result, orders=[o for o in result["orders"] or [] if o.get("market") == market])
+            elif isinstance(result, list):
+                result = [o for o in result if isinstance(o, dict) and o.get("market") == market]
+        
+        if user_id:
+            cache_data(user_id, cache_key, result, ttl=30)  # Cache for 30 seconds
+        return result
 
+    def _fetch_active_orders(self, market: str = None):
         # Updated endpoint to match CoinDCX API
         endpoint = "/exchange/v1/orders/active_orders"
         
         body = {
             "timestamp": int(time.time() * 1000)
         }
+        if market:
+            body["market"] = market
         
-        result = self.api_service.make_authenticated_request(endpoint, body)
-        
-        if user_id:
-            cache_data(cache_key, result, ttl=30)  # Cache for 30 seconds
-        return result
+        return self.api_service.make_authenticated_request(endpoint, body)
     
     def get_order_status(self, order_id: str) -> Dict:
         """
-        Get the status of a specific order.
+        Get the status of a specific order: a local lookup while the order
+        stream is live, else (or for orders it doesn't hold) from the API.
         """
+        if self.order_manager is not None and self.order_manager.is_live:
+            order = self.order_manager.get(order_id)
+            if order is not None:
+                return order
+        return self._fetch_order_status(order_id)
+
+    def get_order_status_by_client_id(self, client_order_id: str) -> Dict:
+        """
+        Get the status of an order by its client order id (local lookup
+        while the order stream is live).
+        """
+        if self.order_manager is not None and self.order_manager.is_live:
+            order = self.order_manager.get_by_client_id(client_order_id)
+            if order is not None:
+                return order
+        endpoint = "/exchange/v1/orders/status"
+        body = {
+            "client_order_id": client_order_id,
+            "timestamp": int(time.time() * 1000)
+        }
+        return self.api_service.make_authenticated_request(endpoint, body)
+
+    def _fetch_order_status(self, order_id: str) -> Dict:
         endpoint = "/exchange/v1/orders/status"
         
         body = {
@@ -123,34 +483,50 @@ class OrderService:
         
         return self.api_service.make_authenticated_request(endpoint, body)
     
-    def get_order_history(self, user_id=None) -> List[Dict]:
+    def get_order_history(self, user_id=None, market: str = None, start: int = None, end: int = None,
+                          limit: int = None) -> List[Dict]:
         """
-        Get order history from API or cache.
+        Get trade history from the local ledger, after syncing the trades
+        made since the last stored one. If the API is unreachable the stored
+        history is returned.
+
+        Args:
+            user_id: Unused; kept for compatibility
+            market: Market symbol (e.g., "BTCINR"), all markets if None
+            start: Inclusive start, epoch milliseconds
+            end: Exclusive end, epoch milliseconds
+            limit: Maximum number of trades
+
+        Returns:
+            trade_history records, newest first
+        """
+        self.sync_order_history()
+        return self.ledger.trades(market=market, start=start, end=end, limit=limit)
+
+    def sync_order_history(self, force: bool = False) -> int:
+        """
+        Fetch the trades made since the last one in the ledger (skipped if
+        the ledger synced within its min_sync_interval, unless `force`).
+
+        Returns:
+            Number of new trades
         """
-        cache_key = f"order_history:{user_id}" if user_id else "order_history:global"
-        
-        # Try to get from cache first
-        cached_history = get_cached_data(cache_key)
-        if cached_history:
-            return cached_history
-            
-        # If not in cache, try to get from API
         try:
-            endpoint = "/exchange/v1/orders/trade_history"
-            body = {
-                "timestamp": int(time.time() * 1000)
-            }
-            
-            history = self.api_service.make_authenticated_request(endpoint, body)
-            
-            # Cache the result
-            if user_id:
-                cache_data(cache_key, history, ttl=60)  # Cache for 1 minute
-                
-            return history
+            return self.ledger.sync(self._fetch_trade_page, force=force)
         except Exception as e:
-            print(f"Failed to get order history: {e}")
-            return []
+            print(f"[ERROR] Failed to sync order history: {e}")
+            return 0
+
+    def _fetch_trade_page(self, from_id: int, limit: int) -> List[Dict]:
+        endpoint = "/exchange/v1/orders/trade_history"
+        body = {
+            "limit": limit,
+            "sort": "asc",
+            "timestamp": int(time.time() * 1000)
+        }
+        if from_id:
+            body["from_id"] = from_id
+        return self.api_service.make_authenticated_request(endpoint, body)
     
     def display_active_orders(self, user_id=None) -> None:
         """
@@ -184,13 +560,13 @@ class OrderService:
             return
             
         print("\n==== Order History ====")
-        for order in history:
-            print(f"ID: {order.get('id')}")
-            print(f"Market: {order.get('market')}")
-            print(f"Side: {order.get('side')}")
-            print(f"Type: {order.get('order_type')}")
-            print(f"Price: {order.get('price_per_unit') if 'price_per_unit' in order else 'N/A'}")
-            print(f"Quantity: {order.get('total_quantity')}")
-            print(f"Status: {order.get('status')}")
-            print(f"Timestamp: {datetime.fromtimestamp(order.get('timestamp')/1000)}")
+        for trade in history:
+            print(f"Trade ID: {trade.get('id')}")
+            print(f"Order ID: {trade.get('order_id')}")
+            print(f"Market: {trade.get('symbol')}")
+            print(f"Side: {trade.get('side')}")
+            print(f"Price: {trade.get('price', 'N/A')}")
+            print(f"Quantity: {trade.get('quantity')}")
+            print(f"Fee: {trade.get('fee_amount')}")
+            print(f"Timestamp: {datetime.fromtimestamp(trade.get('timestamp')/1000)}")
             print("-" * 40)
\ No newline at end of file
@@ -0,0 +1,286 @@
+# rate_limiter.py
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+import metrics
+from transport import get_default_transport
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, holding at most `capacity`.
+    Not thread-safe on its own; RequestScheduler guards it with its lock.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        """
+        Seconds until a token is available (0 if one is available now).
+        """
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, seconds: float, now: float) -> None:
+        """
+        Stop handing out tokens for `seconds` (used after a 429 from the server).
+        """
+        self._refill(now)
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class _GroupStats:
+    def __init__(self, window: int):
+        self.requests = 0
+        self.rate_limited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.waits = deque(maxlen=window)
+
+    def record(self, wait: float) -> None:
+        self.requests += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.waits.append(wait)
+
+    def summary(self) -> Dict:
+        waits = sorted(self.waits)
+
+        def pct(p):
+            return waits[min(len(waits) - 1, int(len(waits) * p))] if waits else 0.0
+
+        return {
+            "requests": self.requests,
+            "rate_limited": self.rate_limited,
+            "avg_wait_ms": (self.total_wait / self.requests * 1000) if self.requests else 0.0,
+            "p50_wait_ms": pct(0.50) * 1000,
+            "p99_wait_ms": pct(0.99) * 1000,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+class RequestScheduler:
+    """
+    Client-side pacing for CoinDCX requests.
+
+    Requests are classified into endpoint groups, each with its own token
+    bucket. Waiting requests are dispatched in priority order (order
+    create/cancel, then private reads, then public market data), and an
+    optional cap on requests in flight makes sure order traffic gets the
+    next free connection ahead of ticker polling.
+    """
+
+    ORDERS = "orders"
+    PRIVATE = "private"
+    PUBLIC = "public"
+
+    PRIORITIES = {ORDERS: 0, PRIVATE: 1, PUBLIC: 2}
+
+    # (tokens per second, burst) — CoinDCX allows 2000 order creates/cancels
+    # per minute and a few hundred private reads per minute per key
+    DEFAULT_LIMITS = {
+        ORDERS: (30.0, 30),
+        PRIVATE: (5.0, 10),
+        PUBLIC: (10.0, 20),
+    }
+
+    ORDER_ENDPOINT_PREFIXES = (
+        "/exchange/v1/orders/create",
+        "/exchange/v1/orders/cancel",
+    )
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        max_in_flight: Optional[int] = None,
+        stats_window: int = 1000,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            limits: Group -> (tokens per second, burst); missing groups use DEFAULT_LIMITS
+            max_in_flight: Maximum concurrent requests across all groups (None = unlimited)
+            stats_window: Number of recent wait times kept per group for percentiles
+        """
+        limits = {**self.DEFAULT_LIMITS, **(limits or {})}
+        self.buckets = {group: TokenBucket(rate, burst) for group, (rate, burst) in limits.items()}
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+        self._cond = threading.Condition()
+        self._waiters = []  # (priority, seq, group) tickets of blocked requests
+        self._seq = itertools.count()
+        self._stats = {group: _GroupStats(stats_window) for group in self.buckets}
+
+    @classmethod
+    def unlimited(cls) -> "RequestScheduler":
+        """
+        A scheduler that never delays anything (pacing disabled).
+        """
+        inf = float("inf")
+        return cls(limits={group: (inf, inf) for group in cls.DEFAULT_LIMITS})
+
+    def classify(self, endpoint: str, authenticated: bool) -> str:
+        """
+        Map an endpoint to its rate-limit group.
+        """
+        if endpoint.startswith(self.ORDER_ENDPOINT_PREFIXES):
+            return self.ORDERS
+        return self.PRIVATE if authenticated else self.PUBLIC
+
+    def _delay(self, ticket, now: float) -> Optional[float]:
+        """
+        Seconds `ticket` must still wait, or None if it waits on another request.
+        """
+        group = ticket[2]
+        for other in sorted(self._waiters):
+            if other == ticket:
+                break
+            # Same group is FIFO; a higher-priority request that is ready goes first
+            if other[2] == group or self.buckets[other[2]].delay(now) == 0:
+                return None
+
+        if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+            return None
+        return self.buckets[group].delay(now)
+
+    def acquire(self, group: str) -> float:
+        """
+        Block until a request in `group` may be sent.
+
+        Returns:
+            Seconds spent waiting
+        """
+        start = time.monotonic()
+        ticket = (self.PRIORITIES.get(group, len(self.PRIORITIES)), next(self._seq), group)
+
+        with self._cond:
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = self._delay(ticket, now)
+                    if delay == 0:
+                        break
+                    # Re-check periodically in case a wake-up was missed
+                    self._cond.wait(1.0 if delay is None else min(delay, 1.0))
+
+                self.buckets[group].take(now)
+                self.in_flight += 1
+            finally:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()
+
+            wait = now - start
+            self._stats[group].record(wait)
+        return wait
+
+    def release(self, group: str) -> None:
+        """
+        Mark a request acquired with `acquire` as finished.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, group: str):
+        """
+        Context manager around acquire/release.
+        """
+        self.acquire(group)
+        try:
+            yield
+        finally:
+            self.release(group)
+
+    def on_rate_limited(self, group: str, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Back off a group after the server answered 429.
+
+        Args:
+            group: Rate-limit group of the rejected request
+            retry_after: Seconds from the Retry-After header (defaults to one token interval)
+
+        Returns:
+            Seconds the group is paused for, or None if pacing is disabled for it
+        """
+        with self._cond:
+            self._stats[group].rate_limited += 1
+            bucket = self.buckets[group]
+            if bucket.rate == float("inf"):
+                return None  # pacing disabled for this group
+            if retry_after is None:
+                retry_after = 1.0 / bucket.rate if bucket.rate > 0 else 1.0
+            bucket.pause(retry_after, time.monotonic())
+            self._cond.notify_all()
+            return retry_after
+
+    def collect_metrics(self):
+        """
+        Metric families for metrics.MetricsRegistry.register_collector.
+        """
+        stats = self.stats()
+        yield ("coindcx_scheduler_requests_total", "counter", "Requests dispatched by the client-side scheduler.",
+               [({"group": group}, s["requests"]) for group, s in stats.items()])
+        yield ("coindcx_scheduler_rate_limited_total", "counter", "429 responses seen per rate-limit group.",
+               [({"group": group}, s["rate_limited"]) for group, s in stats.items()])
+        yield ("coindcx_scheduler_queue_wait_seconds", "gauge", "Recent scheduler queue wait per rate-limit group.",
+               [({"group": group, "quantile": q}, s[f"{key}_wait_ms"] / 1000)
+                for group, s in stats.items() for q, key in (("0.5", "p50"), ("0.99", "p99"), ("1", "max"))])
+        yield ("coindcx_scheduler_in_flight", "gauge", "Requests currently in flight.", [({}, self.in_flight)])
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Queue wait metrics per group.
+
+        Returns:
+            Dictionary of group -> requests, rate_limited and wait time statistics (ms)
+        """
+        with self._cond:
+            return {group: stats.summary() for group, stats in self._stats.items()}
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler() -> RequestScheduler:
+    """
+    Get the process-wide scheduler (rate limits apply per API key, not per service).
+    Requests in flight are capped at the shared connection pool size.
+    Its metrics are exported through metrics.REGISTRY.
+    """
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_scheduler_lock:
+            if _default_scheduler is None:
+                _default_scheduler = RequestScheduler(max_in_flight=get_default_transport().pool_size)
+                metrics.REGISTRY.register_collector("scheduler", _default_scheduler.collect_metrics)
+    return _default_scheduler
@@ -1,11 +1,25 @@
 import json
+import os
 import pandas as pd
 import streamlit as st
 import redis
 
+from metrics import CACHE_OPERATION_DURATION, CACHE_REQUESTS
+
 # Initialize Redis client (default port 6379)
 redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
 
+# Entries kept in each cached list (e.g. a user's order history); older ones are trimmed
+DEFAULT_LIST_CAP = int(os.getenv("COINDCX_CACHE_LIST_CAP", "10000"))
+
+def _key_prefix(user_id, key=None):
+    """
+    Low-cardinality metrics label for a cache key ("portfolio", "balance", ...).
+    """
+    if isinstance(key, str) and key:
+        return key.split(":", 1)[0]
+    return str(user_id).split(":", 1)[0]
+
 def cache_data(user_id, key, value=None, ttl=None):
     """
     Cache data in Redis with optional TTL.
@@ -21,10 +35,11 @@ def cache_data(user_id, key, value=None, ttl=None):
     if isinstance(value, (list, dict)):
         value = json.dumps(value)  # Convert list or dict to a JSON string
     
-    if ttl:
-        redis_client.setex(full_key, ttl, str(value))  # Set with expiry
-    else:
-        redis_client.set(full_key, str(value))  # Set without expiry
+    with CACHE_OPERATION_DURATION.time(prefix=_key_prefix(user_id, key), operation="set"):
+        if ttl:
+            redis_client.setex(full_key, ttl, str(value))  # Set with expiry
+        else:
+            redis_client.set(full_key, str(value))  # Set without expiry
 
 def get_cached_data(user_id, key=None):
     """
@@ -40,7 +55,11 @@ def get_cached_data(user_id, key=None):
     # If key is None, assume user_id is the full key
     full_key = f"{user_id}:{key}" if key else user_id
     
-    value = redis_client.get(full_key)
+    prefix = _key_prefix(user_id, key)
+    with CACHE_OPERATION_DURATION.time(prefix=prefix, operation="get"):
+        value = redis_client.get(full_key)
+    CACHE_REQUESTS.inc(prefix=prefix, result="hit" if value else "miss")
+
     if value:
         try:
             return json.loads(value)  # Convert JSON string back to list or dict
@@ -56,7 +75,37 @@ def add_user(user_id):
     """Add a user to Redis."""
     redis_client.set(user_id, "exists")
 
-def append_to_cache_list(user_id, key, value):
+def _full_key(user_id, key=None):
+    return f"{user_id}:{key}" if key else user_id
+
+def _migrate_list(full_key):
+    """
+    Convert a list cached as one JSON string (the old format) into a
+    native Redis list, once, so it can be appended to in place.
+    """
+    if redis_client.type(full_key) != "string":
+        return
+    old = get_cached_data(full_key)
+    items = old if isinstance(old, list) else [old]
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.delete(full_key)
+    if items:
+        pipe.rpush(full_key, *[json.dumps(item) for item in items])
+    pipe.execute()
+
+def _with_list(full_key, operation):
+    """
+    Run a list operation, migrating an old-format JSON string key first if needed.
+    """
+    try:
+        return operation()
+    except redis.ResponseError as e:
+        if "WRONGTYPE" not in str(e):
+            raise
+        _migrate_list(full_key)
+        return operation()
+
+def append_to_cache_list(user_id, key, value, cap=None):
     """
     Append a value to a cached list.
     
@@ -64,21 +113,78 @@ def append_to_cache_list(user_id, key, value):
         user_id: User identifier
         key: Cache key
         value: Value to append
+        cap: Entries to keep, oldest dropped first (default DEFAULT_LIST_CAP; 0 for no cap)
+    """
+    extend_cache_list(user_id, key, [value], cap=cap)
+
+def extend_cache_list(user_id, key=None, values=None, cap=None):
     """
-    cached = get_cached_data(user_id, key)
+    Append several values to a cached list.
     
-    # Standardize the cached data structure
-    if cached is None:
-        new_data = [value]
-    elif isinstance(cached, list):
-        # If already a list, append to it
-        new_data = cached + [value]
-    elif isinstance(cached, dict):
-        if isinstance(value, dict):
-            new_data = [cached, value]
-        else:
-            new_data = [cached, {"value": value}]
-    else:
-        new_data = [cached, value]
+    The list is a native Redis list: RPUSH and LTRIM run together in one
+    MULTI/EXEC, so appends are atomic and cost the same however long the
+    list is.
     
-    cache_data(user_id, key, new_data)
\ No newline at end of file
+    Args:
+        user_id: User identifier or full cache key
+        key: Cache key (optional, if user_id contains the full key)
+        values: Values to append
+        cap: Entries to keep, oldest dropped first (default DEFAULT_LIST_CAP; 0 for no cap)
+    """
+    if not values:
+        return
+
+    full_key = _full_key(user_id, key)
+    cap = DEFAULT_LIST_CAP if cap is None else cap
+    encoded = [json.dumps(value) for value in values]
+
+    def push():
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.rpush(full_key, *encoded)
+        if cap:
+            pipe.ltrim(full_key, -cap, -1)
+        pipe.execute()
+
+    with CACHE_OPERATION_DURATION.time(prefix=_key_prefix(user_id, key), operation="push"):
+        _with_list(full_key, push)
+
+def get_cache_list(user_id, key=None, page=0, page_size=50, newest_first=True):
+    """
+    Read one page of a cached list.
+    
+    Args:
+        user_id: User identifier or full cache key
+        key: Cache key (optional, if user_id contains the full key)
+        page: Page number, starting at 0
+        page_size: Entries per page
+        newest_first: Page from the most recently appended entry backwards
+    
+    Returns:
+        List of entries (empty past the end)
+    """
+    full_key = _full_key(user_id, key)
+    first = page * page_size
+    if newest_first:
+        read = lambda: redis_client.lrange(full_key, -(first + page_size), -(first + 1))[::-1]
+    else:
+        read = lambda: redis_client.lrange(full_key, first, first + page_size - 1)
+
+    prefix = _key_prefix(user_id, key)
+    with CACHE_OPERATION_DURATION.time(prefix=prefix, operation="range"):
+        values = _with_list(full_key, read)
+    CACHE_REQUESTS.inc(prefix=prefix, result="hit" if values else "miss")
+
+    entries = []
+    for value in values:
+        try:
+            entries.append(json.loads(value))
+        except json.JSONDecodeError:
+            entries.append(value)
+    return entries
+
+def cache_list_length(user_id, key=None):
+    """
+    Number of entries in a cached list.
+    """
+    full_key = _full_key(user_id, key)
+    return _with_list(full_key, lambda: redis_client.llen(full_key))
@@ -0,0 +1,340 @@
+# resilience.py
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import metrics
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a circuit breaker is open and no snapshot can be served.
+    """
+
+
+def is_server_failure(error: Exception) -> bool:
+    """
+    Whether an error says something about the server's health.
+    4xx answers (other than 429) mean the server is up, so they don't trip breakers.
+    """
+    status_code = getattr(error, "status_code", None)
+    return status_code is None or status_code >= 500 or status_code == 429
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    closed: requests flow; `failure_threshold` consecutive failures open it.
+    open: requests fail fast for `reset_timeout` seconds.
+    half_open: one trial request is let through; success closes, failure re-opens.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Whether a request may be sent now.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """
+    Rolling window of request latencies used to pick the hedging delay.
+    """
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self.samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class PublicRequestGuard:
+    """
+    Resilience layer for public market-data requests.
+
+    Each endpoint gets a circuit breaker. While a breaker is open, callers
+    get the last good response for the same request instead of waiting on a
+    sick server. Snapshots are only kept for endpoints answering with current
+    state (a ranged candle page is no stand-in for another range), keyed
+    without volatile params such as limit, at most `max_snapshots` of them
+    (least recently used dropped first), and served for `snapshot_ttl`
+    seconds. Optionally, a request that hasn't answered by the endpoint's
+    recent p95 latency is hedged: a second identical request is fired and
+    whichever answers first wins.
+    """
+
+    # Endpoints whose answer is the current state, so an older answer is a usable stand-in
+    SNAPSHOT_ENDPOINTS = ("/exchange/ticker", "/exchange/v1/markets", "/exchange/v1/markets_details",
+                          "/market_data/orderbook", "/market_data/trade_history")
+    # Params that differ between requests for the same data; left out of snapshot keys
+    VOLATILE_PARAMS = ("limit", "startTime", "endTime", "start", "end", "from", "to", "timestamp")
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        hedge: bool = False,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+        hedge_min_delay: float = 0.01,
+        max_workers: int = 8,
+        max_snapshots: int = 512,
+        snapshot_ttl: Optional[float] = 300.0,
+        snapshot_endpoints: Optional[Tuple[str, ...]] = SNAPSHOT_ENDPOINTS,
+    ):
+        """
+        Initialize the guard.
+
+        Args:
+            failure_threshold: Consecutive failures that open an endpoint's breaker
+            reset_timeout: Seconds an open breaker waits before a trial request
+            hedge: Fire a second request when the first is slower than the hedge delay
+            hedge_percentile: Latency percentile used as the hedge delay
+            hedge_min_samples: Samples needed before hedging kicks in
+            hedge_min_delay: Lower bound on the hedge delay in seconds
+            max_workers: Threads available for hedged requests
+            max_snapshots: Last good responses kept, least recently used dropped first
+            snapshot_ttl: Seconds a snapshot may be served for (None: no limit)
+            snapshot_endpoints: Endpoints whose responses are kept (None: all)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.max_workers = max_workers
+        self.max_snapshots = max_snapshots
+        self.snapshot_ttl = snapshot_ttl
+        self.snapshot_endpoints = snapshot_endpoints
+
+        self.breakers = {}               # endpoint -> CircuitBreaker
+        self.latencies = {}              # endpoint -> LatencyTracker
+        self.snapshots = OrderedDict()   # snapshot key -> (stored_at, last good result), oldest use first
+        self.counters = {"served_stale": 0, "rejected": 0, "hedges_fired": 0, "hedges_won": 0,
+                         "snapshots_evicted": 0}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self.breakers.get(endpoint)
+            if breaker is None:
+                breaker = self.breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self.latencies[endpoint] = LatencyTracker()
+            return breaker
+
+    def snapshot_key(self, endpoint: str, params: Optional[Dict] = None, origin: Optional[str] = None) -> Tuple:
+        """
+        Snapshot identity of a request: origin, endpoint and its params
+        minus VOLATILE_PARAMS.
+        """
+        stable = tuple(sorted((k, v) for k, v in (params or {}).items() if k not in self.VOLATILE_PARAMS))
+        return origin, endpoint, stable
+
+    def _snapshot(self, key: Hashable):
+        # Caller holds self._lock
+        entry = self.snapshots.get(key)
+        if entry is None:
+            return None
+        if self.snapshot_ttl is not None and time.monotonic() - entry[0] > self.snapshot_ttl:
+            del self.snapshots[key]
+            return None
+        self.snapshots.move_to_end(key)
+        return entry
+
+    def _store(self, endpoint: str, key: Hashable, result) -> None:
+        if self.snapshot_endpoints is not None and endpoint not in self.snapshot_endpoints:
+            return
+        with self._lock:
+            self.snapshots[key] = (time.monotonic(), result)
+            self.snapshots.move_to_end(key)
+            while len(self.snapshots) > self.max_snapshots:
+                self.snapshots.popitem(last=False)
+                self.counters["snapshots_evicted"] += 1
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    def call(self, endpoint: str, key: Hashable, fn: Callable):
+        """
+        Run `fn` for `endpoint` behind the endpoint's breaker (and hedging, if enabled).
+
+        Args:
+            endpoint: API endpoint, used to pick the breaker and latency tracker
+            key: Identity of the request, used to store and serve snapshots
+                (see snapshot_key)
+            fn: Function performing the request
+        """
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            with self._lock:
+                entry = self._snapshot(key)
+                if entry is not None:
+                    self.counters["served_stale"] += 1
+                    return entry[1]
+                self.counters["rejected"] += 1
+            raise CircuitOpenError(f"Circuit open for {endpoint}; no snapshot available")
+
+        start = time.perf_counter()
+        try:
+            result = self._hedged(endpoint, fn) if self.hedge else fn()
+        except Exception as e:
+            if is_server_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+
+        self.latencies[endpoint].observe(time.perf_counter() - start)
+        breaker.record_success()
+        self._store(endpoint, key, result)
+        return result
+
+    def _hedge_delay(self, endpoint: str) -> Optional[float]:
+        tracker = self.latencies[endpoint]
+        if len(tracker) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, tracker.percentile(self.hedge_percentile))
+
+    def _hedged(self, endpoint: str, fn: Callable):
+        delay = self._hedge_delay(endpoint)
+        if delay is None:
+            return fn()
+
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="coindcx-hedge")
+
+        primary = self._executor.submit(fn)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        self._count("hedges_fired")
+        hedge = self._executor.submit(fn)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedges_won")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            Counters, snapshots held, plus breaker state and p95 latency per endpoint
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            endpoints = list(self.breakers.items())
+            snapshots = len(self.snapshots)
+        return {
+            **counters,
+            "snapshots": snapshots,
+            "endpoints": {
+                endpoint: {
+                    "state": breaker.state,
+                    "failures": breaker.failures,
+                    "times_opened": breaker.times_opened,
+                    "p95_ms": (self.latencies[endpoint].percentile(0.95) or 0.0) * 1000,
+                }
+                for endpoint, breaker in endpoints
+            },
+        }
+
+    def collect_metrics(self):
+        """
+        Metric families for metrics.MetricsRegistry.register_collector.
+        """
+        stats = self.stats()
+        states = (CircuitBreaker.CLOSED, CircuitBreaker.HALF_OPEN, CircuitBreaker.OPEN)
+        yield ("coindcx_circuit_breaker_state", "gauge", "Breaker state per endpoint (0 closed, 1 half-open, 2 open).",
+               [({"endpoint": e}, states.index(s["state"])) for e, s in stats["endpoints"].items()])
+        yield ("coindcx_circuit_breaker_opened_total", "counter", "Times each endpoint's breaker opened.",
+               [({"endpoint": e}, s["times_opened"]) for e, s in stats["endpoints"].items()])
+        yield ("coindcx_public_guard_events_total", "counter",
+               "Stale snapshots served, fast rejections, hedges and snapshot evictions.",
+               [({"event": name}, stats[name])
+                for name in ("served_stale", "rejected", "hedges_fired", "hedges_won", "snapshots_evicted")])
+        yield ("coindcx_public_guard_snapshots", "gauge", "Last good responses held for open breakers.",
+               [({}, stats["snapshots"])])
+
+
+_default_guard = None
+_default_guard_lock = threading.Lock()
+
+
+def get_default_guard() -> PublicRequestGuard:
+    """
+    Get the process-wide guard, so breaker state is shared by every session.
+    Its metrics are exported through metrics.REGISTRY.
+    """
+    global _default_guard
+    if _default_guard is None:
+        with _default_guard_lock:
+            if _default_guard is None:
+                _default_guard = PublicRequestGuard()
+                metrics.REGISTRY.register_collector("public_guard", _default_guard.collect_metrics)
+    return _default_guard
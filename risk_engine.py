@@ -0,0 +1,386 @@
+# risk_engine.py
+import threading
+import time
+from typing import Dict, List, Optional
+
+from market_index import split_market
+from market_metadata import OrderValidationError
+from order_manager import OPEN_STATUSES, _orders_from
+
+
+class RiskLimitError(OrderValidationError):
+    """
+    Raised when an order would breach a pre-trade risk limit, before it is sent.
+    """
+
+    def __init__(self, market: str, limit: str, message: str):
+        super().__init__(market, message)
+        self.limit = limit
+
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class RiskEngine:
+    """
+    Pre-trade risk checks against an in-memory balance and exposure model.
+
+    Balances and open orders are loaded from REST once, then kept current
+    locally: submitting an order reserves its funds (quote currency for a
+    buy, base currency for a sell), a fill moves them into the bought
+    currency and a cancel or reject releases what is left. Checks are dict
+    lookups under one lock and never call the API. The model is re-synced
+    from REST in the background every `balance_ttl` seconds, which also
+    corrects fills and cancels that were not observed.
+
+    Reservations are keyed by client order id, so checking the same order
+    twice (e.g. in OrderPipeline.submit and again when it is sent) reserves
+    once.
+    """
+
+    def __init__(self, account_service, market_service, order_service=None, max_open_orders: Optional[int] = 200,
+                 max_notional: Optional[Dict[str, float]] = None, default_max_notional: Optional[float] = None,
+                 price_band: Optional[float] = 0.05, fee_rate: float = 0.001, balance_ttl: float = 60.0,
+                 price_ttl: float = 5.0, require_reference: bool = True):
+        """
+        Args:
+            account_service: AccountService used to load balances
+            market_service: MarketService providing reference prices
+            order_service: OrderService whose open orders are loaded into the model
+            max_open_orders: Open orders allowed at once (None for no limit)
+            max_notional: Per-market cap on open order value, in the market's quote currency
+            default_max_notional: Cap for markets not in `max_notional` (None for no cap)
+            price_band: Largest allowed distance of a limit price from the
+                reference mid, as a fraction (0.05 = 5%; None to disable)
+            fee_rate: Fee fraction reserved on top of a buy's cost
+            balance_ttl: Seconds before balances and open orders are re-synced in the background
+            price_ttl: Seconds before reference prices from the ticker are reloaded
+            require_reference: Reject limit orders whose price band can't be
+                checked for lack of a reference price; if False they pass on
+                the market's min/max price alone and are counted in
+                counters["band_skipped"]
+        """
+        self.account_service = account_service
+        self.market_service = market_service
+        self.order_service = order_service
+        self.max_open_orders = max_open_orders
+        self.max_notional = dict(max_notional or {})
+        self.default_max_notional = default_max_notional
+        self.price_band = price_band
+        self.fee_rate = fee_rate
+        self.balance_ttl = balance_ttl
+        self.price_ttl = price_ttl
+        self.require_reference = require_reference
+
+        self.free = {}            # currency -> funds not committed to an order
+        self.reservations = {}    # client_order_id (or order id) -> reservation
+        self._by_order_id = {}    # order id -> reservation key
+        self._notional = {}       # market -> value of open orders
+        self._currencies = {}     # market -> (base, quote)
+        self._prices = {}         # market -> reference price from the ticker
+        self._lock = threading.RLock()
+        self.synced_at = 0.0
+        self.prices_at = 0.0
+        self._syncing = False
+        self._loading_prices = False
+        self.counters = {"checks": 0, "rejected": 0, "fills": 0, "released": 0, "band_skipped": 0}
+
+    # --- reference data ------------------------------------------------
+
+    def _split(self, market: str):
+        currencies = self._currencies.get(market)
+        if currencies is None:
+            rules = self.market_service.market_metadata.rules(market) if self.market_service is not None else None
+            currencies = (rules.base, rules.quote) if rules is not None else split_market(market)
+            self._currencies[market] = currencies
+        return currencies
+
+    def update_price(self, market: str, price: float) -> None:
+        """
+        Set the reference price of a market (e.g. from a price feed).
+        """
+        self._prices[market] = float(price)
+
+    def _load_prices(self) -> None:
+        try:
+            prices = {}
+            for row in self.market_service.get_ticker_data() or []:
+                bid, ask = _float(row.get("bid")), _float(row.get("ask"))
+                price = (bid + ask) / 2 if bid > 0 and ask > 0 else _float(row.get("last_price"))
+                if row.get("market") and price > 0:
+                    prices[row["market"]] = price
+            self._prices.update(prices)
+        except Exception as e:
+            print(f"[ERROR] Could not load reference prices: {e}")
+        finally:
+            self.prices_at = time.time()
+            self._loading_prices = False
+
+    def reference_price(self, market: str) -> Optional[float]:
+        """
+        Mid of the live order book if one is maintained, else the ticker mid
+        (reloaded in the background once older than `price_ttl`).
+        """
+        if self.market_service is None:
+            return self._prices.get(market)
+        book = self.market_service.order_books.books.get(market)
+        if book is not None and time.time() - book.updated_at < self.price_ttl:
+            mid = book.mid_price
+            if mid:
+                return mid
+        if time.time() - self.prices_at >= self.price_ttl and not self._loading_prices:
+            self._loading_prices = True
+            if not self._prices:
+                self._load_prices()
+            else:
+                threading.Thread(target=self._load_prices, name="risk-prices", daemon=True).start()
+        return self._prices.get(market)
+
+    # --- sync ----------------------------------------------------------
+
+    def sync(self) -> None:
+        """
+        Reload balances and open orders from REST. Funds reserved for
+        orders the exchange had not acknowledged when the snapshot was
+        taken stay reserved.
+        """
+        started = time.time()
+        balances = self.account_service._fetch_balances()
+        open_orders = _orders_from(self.order_service._open_orders()) if self.order_service is not None else None
+        with self._lock:
+            free = {b["currency"]: _float(b.get("balance")) for b in balances or []}
+            for reservation in self.reservations.values():
+                if not reservation["order_id"] or reservation["acked_at"] >= started:
+                    free[reservation["currency"]] = free.get(reservation["currency"], 0.0) - reservation["amount"]
+            self.free = free
+            if open_orders is not None:
+                self._sync_orders(open_orders, started)
+            self.synced_at = time.time()
+
+    def _sync_orders(self, open_orders: List[Dict], started: float) -> None:
+        # Caller holds self._lock. Acknowledged orders no longer open are done;
+        # open orders placed elsewhere are added (their funds are already locked).
+        listed = {order["id"]: order for order in open_orders if order.get("id")}
+        for key, reservation in list(self.reservations.items()):
+            if reservation["order_id"] and reservation["acked_at"] < started and reservation["order_id"] not in listed:
+                self._drop(key)
+        for order_id, order in listed.items():
+            key = self._by_order_id.get(order_id)
+            if key is None:
+                self._add(order.get("client_order_id") or order_id, order.get("market"), order.get("side", ""),
+                          _float(order.get("remaining_quantity", order.get("total_quantity"))),
+                          _float(order.get("price_per_unit")), amount=None, order_id=order_id)
+            else:
+                self._settle(key, order)
+
+    def _sync_in_background(self) -> None:
+        def run():
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"[ERROR] Risk model sync failed: {e}")
+            finally:
+                self._syncing = False
+
+        self._syncing = True
+        threading.Thread(target=run, name="risk-sync", daemon=True).start()
+
+    def ensure_synced(self) -> "RiskEngine":
+        """
+        Load the model on first use; once stale, re-sync it in the background.
+        """
+        if not self.synced_at:
+            with self._lock:
+                if not self.synced_at:
+                    self.sync()
+        elif time.time() - self.synced_at >= self.balance_ttl and not self._syncing:
+            self._sync_in_background()
+        return self
+
+    # --- reservations --------------------------------------------------
+
+    def _add(self, key: str, market: str, side: str, quantity: float, price: float, amount: Optional[float],
+             order_id: Optional[str] = None) -> Dict:
+        # Caller holds self._lock. amount=None: funds already locked on the exchange.
+        base, quote = self._split(market)
+        buy = side.lower() == "buy"
+        unit = price * (1 + self.fee_rate) if buy else 1.0
+        reservation = {
+            "market": market, "side": side.lower(), "currency": quote if buy else base,
+            "quantity": quantity, "price": price, "unit": unit,
+            "amount": quantity * unit if amount is None else amount, "order_id": order_id, "acked_at": 0.0,
+        }
+        self.reservations[key] = reservation
+        if order_id:
+            self._by_order_id[order_id] = key
+        self._notional[market] = self._notional.get(market, 0.0) + quantity * price
+        return reservation
+
+    def _drop(self, key: str) -> Optional[Dict]:
+        # Caller holds self._lock. Forget a reservation without crediting it back.
+        reservation = self.reservations.pop(key, None)
+        if reservation is None:
+            return None
+        if reservation["order_id"]:
+            self._by_order_id.pop(reservation["order_id"], None)
+        market = reservation["market"]
+        self._notional[market] = max(self._notional.get(market, 0.0) - reservation["quantity"] * reservation["price"], 0.0)
+        return reservation
+
+    def check(self, client_order_id: str, market: str, side: str, order_type: str, quantity: float,
+              price: Optional[float] = None) -> Dict:
+        """
+        Check an order against the limits and reserve its funds.
+
+        Args:
+            client_order_id: Key of the reservation (checking it again is a no-op)
+            market: Market identifier (e.g., "BTCINR")
+            side: "buy" or "sell"
+            order_type: e.g. "limit_order" or "market_order"
+            quantity: Order quantity (already rounded)
+            price: Limit price (None for market orders, which use the reference price)
+
+        Returns:
+            The reservation
+
+        Raises:
+            RiskLimitError: If the order would breach a limit (nothing is reserved)
+        """
+        self.ensure_synced()
+        reference = self.reference_price(market)
+        with self._lock:
+            self.counters["checks"] += 1
+            existing = self.reservations.get(client_order_id)
+            if existing is not None:
+                return existing
+            try:
+                return self._check(client_order_id, market, side, order_type, quantity, price, reference)
+            except RiskLimitError:
+                self.counters["rejected"] += 1
+                raise
+
+    def _check(self, key, market, side, order_type, quantity, price, reference) -> Dict:
+        # Caller holds self._lock
+        if price is None:
+            if reference is None:
+                raise RiskLimitError(market, "reference_price", "no reference price to value a market order")
+            # Market orders may fill anywhere inside the band
+            price = reference * (1 + (self.price_band or 0.0)) if side.lower() == "buy" else reference
+        elif self.price_band is not None and not reference:
+            # The market's min/max price was already checked by OrderService._apply_market_rules
+            if self.require_reference:
+                raise RiskLimitError(market, "reference_price", "no reference price to check the price band")
+            self.counters["band_skipped"] += 1
+            print(f"[ERROR] No reference price for {market}; price {price:.8g} not checked against the band")
+        elif self.price_band is not None:
+            distance = abs(price - reference) / reference
+            if distance > self.price_band:
+                raise RiskLimitError(
+                    market, "price_band",
+                    f"price {price:.8g} is {distance:.1%} from the mid {reference:.8g} (band {self.price_band:.1%})",
+                )
+
+        if self.max_open_orders is not None and len(self.reservations) >= self.max_open_orders:
+            raise RiskLimitError(market, "max_open_orders", f"{len(self.reservations)} open orders (limit {self.max_open_orders})")
+
+        notional = quantity * price
+        limit = self.max_notional.get(market, self.default_max_notional)
+        if limit is not None and self._notional.get(market, 0.0) + notional > limit:
+            raise RiskLimitError(
+                market, "max_notional",
+                f"open order value would be {self._notional.get(market, 0.0) + notional:.8g} (limit {limit:.8g})",
+            )
+
+        base, quote = self._split(market)
+        buy = side.lower() == "buy"
+        currency = quote if buy else base
+        amount = quantity * price * (1 + self.fee_rate) if buy else quantity
+        available = self.free.get(currency, 0.0)
+        if amount > available:
+            raise RiskLimitError(
+                market, "balance", f"needs {amount:.8g} {currency}, {max(available, 0.0):.8g} available",
+            )
+
+        self.free[currency] = available - amount
+        return self._add(key, market, side, quantity, price, amount)
+
+    def release(self, client_order_id: str) -> None:
+        """
+        Return the funds still reserved for an order (not sent, rejected or cancelled).
+        """
+        with self._lock:
+            reservation = self._drop(client_order_id)
+            if reservation is not None:
+                currency = reservation["currency"]
+                self.free[currency] = self.free.get(currency, 0.0) + reservation["amount"]
+                self.counters["released"] += 1
+
+    def release_order(self, order_id: str) -> None:
+        """
+        Release an order by exchange id (e.g. after a successful cancel).
+        """
+        key = self._by_order_id.get(order_id)
+        if key is not None:
+            self.release(key)
+
+    def _settle(self, key: str, order: Dict) -> None:
+        # Caller holds self._lock. Apply fills since the last update, then
+        # release the rest if the order is done.
+        reservation = self.reservations[key]
+        remaining = _float(order.get("remaining_quantity"), reservation["quantity"])
+        filled = reservation["quantity"] - remaining
+        if filled > 1e-12:
+            base, quote = self._split(reservation["market"])
+            fill_price = _float(order.get("avg_price")) or reservation["price"]
+            reserved = filled * reservation["unit"]
+            reservation["amount"] = max(reservation["amount"] - reserved, 0.0)
+            reservation["quantity"] = remaining
+            self._notional[reservation["market"]] = max(
+                self._notional.get(reservation["market"], 0.0) - filled * reservation["price"], 0.0
+            )
+            if reservation["side"] == "buy":
+                # Unused price headroom goes back; the bought coins become free
+                self.free[quote] = self.free.get(quote, 0.0) + reserved - filled * fill_price * (1 + self.fee_rate)
+                self.free[base] = self.free.get(base, 0.0) + filled
+            else:
+                self.free[quote] = self.free.get(quote, 0.0) + filled * fill_price * (1 - self.fee_rate)
+            self.counters["fills"] += 1
+        if order.get("status") and order["status"] not in OPEN_STATUSES:
+            self.release(key)
+
+    def on_order(self, order: Dict) -> None:
+        """
+        Apply an order update (create response or stream frame): link the
+        exchange id, account for fills, release on cancel/reject/fill.
+        """
+        with self._lock:
+            key = order.get("client_order_id")
+            if key not in self.reservations:
+                key = self._by_order_id.get(order.get("id"))
+            if key is None:
+                return
+            reservation = self.reservations[key]
+            if order.get("id") and not reservation["order_id"]:
+                reservation["order_id"] = order["id"]
+                reservation["acked_at"] = time.time()
+                self._by_order_id[order["id"]] = key
+            self._settle(key, order)
+
+    def on_orders(self, response) -> None:
+        for order in _orders_from(response):
+            self.on_order(order)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(
+                self.counters,
+                open_orders=len(self.reservations),
+                reserved={c: sum(r["amount"] for r in self.reservations.values() if r["currency"] == c)
+                          for c in {r["currency"] for r in self.reservations.values()}},
+                free=dict(self.free),
+                synced_age=time.time() - self.synced_at if self.synced_at else None,
+            )
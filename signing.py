@@ -0,0 +1,70 @@
+# signing.py
+import hashlib
+import hmac
+import json
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import orjson  # optional, much faster than the stdlib encoder
+except ImportError:
+    orjson = None
+
+_compact_encoder = json.JSONEncoder(separators=(',', ':'))
+
+
+def encode_json_stdlib(payload: Dict) -> bytes:
+    """
+    Serialize `payload` to compact JSON bytes with the stdlib encoder.
+    """
+    return _compact_encoder.encode(payload).encode('utf-8')
+
+
+def encode_json(payload: Dict) -> bytes:
+    """
+    Serialize `payload` to compact JSON bytes, using orjson when installed.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload)
+        except TypeError:
+            pass  # types orjson doesn't know (e.g. Decimal) fall back to the stdlib
+    return encode_json_stdlib(payload)
+
+
+class RequestSigner:
+    """
+    HMAC-SHA256 signer for CoinDCX request bodies.
+
+    The keyed HMAC state is computed once from the API secret and copied for
+    each request. `sign_payload` returns the exact bytes that were signed,
+    which are the bytes that must be sent.
+    """
+
+    def __init__(self, api_secret: str, encoder: Optional[Callable[[Dict], bytes]] = None):
+        """
+        Initialize the signer.
+
+        Args:
+            api_secret: CoinDCX API secret
+            encoder: Function serializing a payload dict to bytes (defaults to encode_json)
+        """
+        self._mac = hmac.new(api_secret.encode('utf-8'), digestmod=hashlib.sha256)
+        self.encode = encoder or encode_json
+
+    def sign(self, body: bytes) -> str:
+        """
+        Hex HMAC-SHA256 signature of an already serialized body.
+        """
+        mac = self._mac.copy()
+        mac.update(body)
+        return mac.hexdigest()
+
+    def sign_payload(self, payload: Dict) -> Tuple[bytes, str]:
+        """
+        Serialize and sign a payload.
+
+        Returns:
+            Tuple of (body bytes to send, signature)
+        """
+        body = self.encode(payload)
+        return body, self.sign(body)
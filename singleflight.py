@@ -0,0 +1,139 @@
+# singleflight.py
+import threading
+import time
+from typing import Callable, Dict, Hashable
+
+import metrics
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    In-process request coalescing.
+
+    Concurrent callers asking for the same key share one in-flight call and
+    its result; a finished result is reused for `ttl` seconds. Shared results
+    are handed to every caller as-is, so treat them as read-only.
+    """
+
+    def __init__(self, ttl: float = 1.0):
+        """
+        Initialize the coalescer.
+
+        Args:
+            ttl: Seconds a finished result stays fresh (0 = only coalesce in-flight calls)
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calls = {}    # key -> _Call in flight
+        self._results = {}  # key -> (finished_at, value)
+        self.hits = 0       # served from a fresh finished result
+        self.coalesced = 0  # joined a call already in flight
+        self.misses = 0     # started a new call
+
+    def do(self, key: Hashable, fn: Callable, ttl: float = None):
+        """
+        Return fn()'s result for `key`, sharing it with concurrent and recent callers.
+
+        Args:
+            key: Identity of the request (e.g. endpoint and params)
+            fn: Function performing the request
+            ttl: Freshness window for this call (defaults to the instance ttl)
+        """
+        ttl = self.ttl if ttl is None else ttl
+
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and time.monotonic() - cached[0] < ttl:
+                self.hits += 1
+                return cached[1]
+
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None:
+                    self._results[key] = (time.monotonic(), call.value)
+                    self._evict_expired()
+            call.done.set()
+        return call.value
+
+    def _evict_expired(self) -> None:
+        if len(self._results) < 256:
+            return
+        horizon = time.monotonic() - self.ttl
+        for key in [k for k, (finished_at, _) in self._results.items() if finished_at < horizon]:
+            del self._results[key]
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """
+        Drop the finished result for `key` (or all results if key is None).
+        """
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+    def collect_metrics(self):
+        """
+        Metric families for metrics.MetricsRegistry.register_collector.
+        """
+        stats = self.stats()
+        yield ("coindcx_single_flight_requests_total", "counter", "Coalesced public requests by outcome.",
+               [({"result": result}, stats[result]) for result in ("hits", "coalesced", "misses")])
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dictionary with hits, coalesced, misses and in_flight counts
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "in_flight": len(self._calls),
+            }
+
+
+_default_single_flight = None
+_default_single_flight_lock = threading.Lock()
+
+
+def get_default_single_flight() -> SingleFlight:
+    """
+    Get the process-wide coalescer shared by all sessions of the app.
+    Its metrics are exported through metrics.REGISTRY.
+    """
+    global _default_single_flight
+    if _default_single_flight is None:
+        with _default_single_flight_lock:
+            if _default_single_flight is None:
+                _default_single_flight = SingleFlight()
+                metrics.REGISTRY.register_collector("single_flight", _default_single_flight.collect_metrics)
+    return _default_single_flight
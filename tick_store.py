@@ -0,0 +1,376 @@
+# tick_store.py
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DAY_MS = 86_400_000
+
+# Column layout per kind; "ts" (epoch milliseconds) is always first
+SCHEMAS = {
+    "trades": {"ts": np.int64, "price": np.float64, "quantity": np.float64, "maker": np.uint8},
+    "tickers": {
+        "ts": np.int64,
+        "last_price": np.float64,
+        "high": np.float64,
+        "low": np.float64,
+        "volume": np.float64,
+        "change_24_hour": np.float64,
+        "bid": np.float64,
+        "ask": np.float64,
+    },
+}
+
+COMPACTED_MARKER = ".compacted"
+
+
+def _safe_name(market: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", market)
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class TickStore:
+    """
+    Append-only columnar store for trades and ticker snapshots.
+
+    Layout: <root>/<kind>/<market>/<YYYY-MM-DD>/<column>.col, one raw
+    little-endian array per column, so a segment is one market for one
+    UTC day. Reads memory-map the columns and slice the requested time
+    range, so nothing outside it is loaded.
+
+    Records are queued by record_trades / record_tickers and written by a
+    background thread, so callers never wait on disk. Segments from past
+    days are compacted in the background: rows are sorted by time and
+    duplicates (the same snapshot or trade fetched twice) are dropped,
+    after which range reads use a binary search.
+    """
+
+    def __init__(self, root: str = "tick_data", queue_size: int = 10000, flush_interval: float = 1.0,
+                 compact_interval: float = 3600.0):
+        """
+        Args:
+            root: Directory holding the store
+            queue_size: Batches buffered for the writer before new ones are dropped
+            flush_interval: Seconds the writer waits to batch records together
+            compact_interval: Seconds between background compaction passes
+        """
+        self.root = root
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.counters = {"written": 0, "dropped": 0, "compacted": 0}
+        self._segment_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    # --- paths ---------------------------------------------------------
+
+    def _segment_dir(self, kind: str, market: str, day: str) -> str:
+        return os.path.join(self.root, kind, _safe_name(market), day)
+
+    def segments(self, kind: str, market: str) -> List[str]:
+        """
+        Days (YYYY-MM-DD) stored for a market, oldest first.
+        """
+        path = os.path.join(self.root, kind, _safe_name(market))
+        if not os.path.isdir(path):
+            return []
+        # Skip in-progress compaction directories (<day>.compacting / <day>.old)
+        return sorted(d for d in os.listdir(path) if len(d) == 10)
+
+    # --- writing -------------------------------------------------------
+
+    def append(self, kind: str, market: str, columns: Dict[str, np.ndarray]) -> int:
+        """
+        Append rows synchronously, split into per-day segments.
+
+        Args:
+            kind: "trades" or "tickers"
+            market: Market symbol
+            columns: Arrays for every column of SCHEMAS[kind]
+
+        Returns:
+            Number of rows written
+        """
+        schema = SCHEMAS[kind]
+        arrays = {name: np.ascontiguousarray(columns[name], dtype=dtype) for name, dtype in schema.items()}
+        ts = arrays["ts"]
+        if not len(ts):
+            return 0
+        days = ts // DAY_MS
+        with self._segment_lock:
+            for day_number in np.unique(days):
+                rows = days == day_number
+                day = datetime.fromtimestamp(int(day_number) * 86400, tz=timezone.utc).strftime("%Y-%m-%d")
+                path = self._segment_dir(kind, market, day)
+                os.makedirs(path, exist_ok=True)
+                for name, array in arrays.items():
+                    with open(os.path.join(path, f"{name}.col"), "ab") as f:
+                        f.write(array[rows].tobytes())
+                marker = os.path.join(path, COMPACTED_MARKER)
+                if os.path.exists(marker):
+                    os.remove(marker)  # late rows: needs another compaction
+        self.counters["written"] += len(ts)
+        return len(ts)
+
+    def _submit(self, kind: str, market: Optional[str], records: List[Dict]) -> bool:
+        try:
+            self.queue.put_nowait((kind, market, records, int(time.time() * 1000)))
+            return True
+        except queue.Full:
+            self.counters["dropped"] += 1
+            return False
+
+    def record_trades(self, market: str, trades: Iterable[Dict]) -> bool:
+        """
+        Queue CoinDCX trades ({"p", "q", "T", "m"}) for writing. Never blocks;
+        parsing and disk I/O happen on the writer thread.
+        """
+        return self._submit("trades", market, list(trades))
+
+    def record_tickers(self, rows: Iterable[Dict]) -> bool:
+        """
+        Queue /exchange/ticker rows for writing, one segment per market. Never blocks.
+        """
+        return self._submit("tickers", None, list(rows))
+
+    def attach(self, stream) -> "TickStore":
+        """
+        Record a MarketStream's live trades.
+        """
+        from market_stream import pair_to_market
+
+        stream.subscribe(lambda trade: self.record_trades(pair_to_market(trade["s"]), [trade]))
+        return self
+
+    def _drain(self) -> None:
+        batches = {}
+        while True:
+            try:
+                kind, market, records, fetched_ms = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            for row in records:
+                if kind == "trades":
+                    if "T" not in row:
+                        continue
+                    key = (kind, market)
+                    values = (int(row["T"]), _to_float(row.get("p")), _to_float(row.get("q")), 1 if row.get("m") else 0)
+                else:
+                    if not row.get("market"):
+                        continue
+                    key = (kind, row["market"])
+                    ts = row.get("timestamp")
+                    values = (int(float(ts) * 1000) if ts else fetched_ms,) + tuple(
+                        _to_float(row.get(name)) for name in list(SCHEMAS[kind])[1:]
+                    )
+                batches.setdefault(key, []).append(values)
+
+        for (kind, market), rows in batches.items():
+            columns = dict(zip(SCHEMAS[kind], zip(*rows)))
+            try:
+                self.append(kind, market, columns)
+            except Exception as e:
+                print(f"[ERROR] Tick store write failed for {kind}/{market}: {e}")
+
+    def _writer(self) -> None:
+        while not self._stop.is_set():
+            self._stop.wait(self.flush_interval)
+            self._drain()
+        self._drain()
+
+    # --- compaction ----------------------------------------------------
+
+    def compact_segment(self, kind: str, market: str, day: str) -> bool:
+        """
+        Sort a segment by time and drop duplicate rows, replacing it atomically.
+
+        Returns:
+            True if the segment was rewritten
+        """
+        path = self._segment_dir(kind, market, day)
+        with self._segment_lock:
+            if os.path.exists(os.path.join(path, COMPACTED_MARKER)):
+                return False
+            columns = self._read_segment(kind, path, copy=True)
+            if columns is None:
+                return False
+            stacked = np.rec.fromarrays(list(columns.values()), names=list(columns))
+            # Unique rows in (ts, ...) order, i.e. sorted by time
+            _, order = np.unique(stacked, return_index=True)
+            tmp = path + ".compacting"
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            for name, array in columns.items():
+                with open(os.path.join(tmp, f"{name}.col"), "wb") as f:
+                    f.write(array[order].tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            open(os.path.join(tmp, COMPACTED_MARKER), "w").close()
+            old = path + ".old"
+            os.rename(path, old)
+            os.rename(tmp, path)
+            shutil.rmtree(old, ignore_errors=True)
+        self.counters["compacted"] += 1
+        return True
+
+    def compact(self, before_day: Optional[str] = None) -> int:
+        """
+        Compact every segment older than `before_day` (today, UTC, by default).
+
+        Returns:
+            Number of segments rewritten
+        """
+        before_day = before_day or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        compacted = 0
+        for kind in SCHEMAS:
+            kind_dir = os.path.join(self.root, kind)
+            if not os.path.isdir(kind_dir):
+                continue
+            for market in os.listdir(kind_dir):
+                for day in self.segments(kind, market):
+                    if day < before_day:
+                        try:
+                            compacted += self.compact_segment(kind, market, day)
+                        except Exception as e:
+                            print(f"[ERROR] Tick store compaction failed for {kind}/{market}/{day}: {e}")
+        return compacted
+
+    def _compactor(self) -> None:
+        while not self._stop.wait(self.compact_interval):
+            self.compact()
+
+    # --- background threads ---------------------------------------------
+
+    def start(self) -> "TickStore":
+        """
+        Start the background writer and compactor.
+        """
+        if not self._threads:
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._writer, name="tick-store-writer", daemon=True),
+                threading.Thread(target=self._compactor, name="tick-store-compactor", daemon=True),
+            ]
+            for thread in self._threads:
+                thread.start()
+        return self
+
+    def close(self) -> None:
+        """
+        Stop the background threads after flushing queued records.
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=10)
+        self._threads = []
+        self._drain()
+
+    # --- reading -------------------------------------------------------
+
+    def _read_segment(self, kind: str, path: str, copy: bool = False) -> Optional[Dict[str, np.ndarray]]:
+        arrays = {}
+        for name, dtype in SCHEMAS[kind].items():
+            file = os.path.join(path, f"{name}.col")
+            size = os.path.getsize(file) if os.path.exists(file) else 0
+            if size < np.dtype(dtype).itemsize:
+                return None
+            array = np.memmap(file, dtype=dtype, mode="r")
+            arrays[name] = np.array(array) if copy else array
+        # A crash between column writes can leave one column longer
+        rows = min(len(a) for a in arrays.values())
+        return {name: array[:rows] for name, array in arrays.items()}
+
+    def query(
+        self,
+        kind: str,
+        market: str,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Rows of one market in [start_ms, end_ms), read through memory maps.
+
+        Only the segments overlapping the range are opened. Within a
+        compacted segment the range is found by binary search and returned
+        as views of the mapped files.
+
+        Args:
+            kind: "trades" or "tickers"
+            market: Market symbol
+            start_ms: Inclusive start (epoch ms), None for the beginning
+            end_ms: Exclusive end (epoch ms), None for the end
+            columns: Columns to return (all by default)
+
+        Returns:
+            Dict of column name -> NumPy array
+        """
+        names = columns or list(SCHEMAS[kind])
+        first_day = _day(start_ms) if start_ms is not None else None
+        last_day = _day(end_ms - 1) if end_ms is not None else None
+        parts = {name: [] for name in names}
+
+        for day in self.segments(kind, market):
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            path = self._segment_dir(kind, market, day)
+            segment = self._read_segment(kind, path)
+            if segment is None:
+                continue
+            ts = segment["ts"]
+            if os.path.exists(os.path.join(path, COMPACTED_MARKER)):
+                lo = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, side="left"))
+                hi = len(ts) if end_ms is None else int(np.searchsorted(ts, end_ms, side="left"))
+                rows = slice(lo, hi)
+            else:
+                mask = np.ones(len(ts), dtype=bool)
+                if start_ms is not None:
+                    mask &= ts >= start_ms
+                if end_ms is not None:
+                    mask &= ts < end_ms
+                rows = np.flatnonzero(mask)
+                rows = rows[np.argsort(ts[rows], kind="stable")]
+            for name in names:
+                parts[name].append(segment[name][rows])
+
+        result = {}
+        for name in names:
+            if not parts[name]:
+                result[name] = np.empty(0, dtype=SCHEMAS[kind][name])
+            elif len(parts[name]) == 1:
+                result[name] = parts[name][0]
+            else:
+                result[name] = np.concatenate(parts[name])
+        return result
+
+    def query_frame(self, kind: str, market: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None,
+                    columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Same as query, as a DataFrame indexed by UTC timestamp (copies the data).
+        """
+        data = self.query(kind, market, start_ms, end_ms, columns)
+        ts = data.pop("ts", None)
+        if ts is None:
+            ts = self.query(kind, market, start_ms, end_ms, ["ts"])["ts"]
+        df = pd.DataFrame({name: np.asarray(values) for name, values in data.items()})
+        df.index = pd.to_datetime(np.asarray(ts), unit="ms", utc=True)
+        df.index.name = "ts"
+        return df
+
+
+def _day(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
@@ -0,0 +1,203 @@
+# ticker_snapshot.py
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+NUMERIC_COLUMNS = ["last_price", "high", "low", "volume", "change_24_hour", "bid", "ask"]
+QUOTE_CURRENCIES = ("USDT", "USDC", "BUSD", "TUSD", "INR", "BTC", "ETH", "BNB", "TRX", "XRP", "DAI")
+
+DISPLAY_COLUMNS = {
+    "market": "Market",
+    "last_price": "Last Price",
+    "high": "High",
+    "low": "Low",
+    "volume": "Volume",
+    "change_24_hour": "Change %",
+}
+
+
+def quote_currency(market: str) -> str:
+    """
+    Quote currency of a ticker market name ("BTCINR" -> "INR"), or "" if unknown.
+    """
+    for quote in QUOTE_CURRENCIES:
+        if market.endswith(quote) and len(market) > len(quote):
+            return quote
+    return ""
+
+
+class TickerSnapshot:
+    """
+    Immutable, typed view of one ticker download.
+
+    Numeric columns are float64 and the market and quote columns are
+    categorical, so the rows are parsed once and every page render only
+    slices. Filtered views are memoized on the snapshot.
+    """
+
+    def __init__(self, frame: pd.DataFrame, version=None):
+        self.frame = frame
+        self.version = version
+        self.created_at = time.monotonic()
+        self._views = {}
+        self._row_of = None  # market -> row, built on first indexed lookup
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict], version=None) -> "TickerSnapshot":
+        """
+        Parse /exchange/ticker rows (strings or numbers) into a snapshot.
+        """
+        rows = [row for row in rows if row.get("market")]
+        markets = [row["market"] for row in rows]
+        columns = {
+            "market": pd.Categorical(markets),
+            "quote": pd.Categorical([quote_currency(m) for m in markets]),
+        }
+        for name in NUMERIC_COLUMNS:
+            columns[name] = pd.to_numeric(pd.Series([row.get(name) for row in rows], dtype=object),
+                                          errors="coerce").astype(np.float64)
+        columns["timestamp"] = pd.to_numeric(pd.Series([row.get("timestamp") for row in rows], dtype=object),
+                                             errors="coerce")
+        return cls(pd.DataFrame(columns), version=version)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+    def _contains_mask(self, text: str) -> np.ndarray:
+        # Match against the (few) categories, then broadcast through the codes
+        markets = self.frame["market"].cat
+        hits = np.asarray(markets.categories.str.contains(text.upper(), regex=False), dtype=bool)
+        codes = markets.codes.to_numpy()
+        return np.where(codes >= 0, hits[codes], False)
+
+    def rows_for(self, markets: Iterable[str]) -> List[int]:
+        """
+        Row positions of the given markets (missing ones are skipped), in frame order.
+        """
+        if self._row_of is None:
+            self._row_of = {market: row for row, market in enumerate(self.frame["market"])}
+        row_of = self._row_of
+        return sorted(row_of[m] for m in markets if m in row_of)
+
+    def view(
+        self,
+        quote: Optional[str] = "INR",
+        filter_market: str = "",
+        display: bool = True,
+        index=None,
+    ) -> pd.DataFrame:
+        """
+        Rows for one quote currency (None for all), optionally filtered by market.
+
+        The returned frame is shared and cached; copy it before modifying it.
+
+        Args:
+            quote: Quote currency, e.g. "INR"
+            filter_market: Coin, symbol or prefix with an index; otherwise a
+                case-insensitive substring of the market name
+            display: Select and rename DISPLAY_COLUMNS (Market, Last Price, ...)
+            index: Optional market_index.MarketIndex used for exact lookups
+        """
+        key = (quote, filter_market.upper(), display, id(index), index.version if index else None)
+        with self._lock:
+            df = self._views.get(key)
+        if df is not None:
+            return df
+
+        frame = self.frame
+        if index is not None:
+            df = frame.iloc[self.rows_for(index.search(filter_market, quote))]
+        else:
+            mask = np.ones(len(frame), dtype=bool)
+            if quote is not None:
+                mask &= (frame["quote"] == quote).to_numpy()
+            if filter_market:
+                mask &= self._contains_mask(filter_market)
+            df = frame[mask]
+        if display:
+            df = df[list(DISPLAY_COLUMNS)].rename(columns=DISPLAY_COLUMNS)
+
+        with self._lock:
+            self._views[key] = df
+        return df
+
+    def __len__(self):
+        return len(self.frame)
+
+
+class TickerSnapshotCache:
+    """
+    Process-wide ticker snapshots with a TTL.
+
+    A snapshot is reused until it is older than `ttl` or, for sources that
+    carry a version (the live stream table), until the version changes.
+    Only one caller per key rebuilds it; the rest wait and share the result.
+    """
+
+    def __init__(self, ttl: float = 2.0):
+        self.ttl = ttl
+        self.snapshots = {}  # key -> TickerSnapshot
+        self.counters = {"hits": 0, "loads": 0}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, snapshot: Optional[TickerSnapshot], version) -> bool:
+        if snapshot is None:
+            return False
+        if version is not None:
+            return snapshot.version == version
+        return snapshot.age < self.ttl
+
+    def get(self, key: Hashable, load: Callable[[], List[Dict]], version=None) -> TickerSnapshot:
+        """
+        Get the snapshot for `key`, rebuilding it from `load()` rows when stale.
+
+        Args:
+            key: Source identity, e.g. ("rest", base_url)
+            load: Function returning ticker rows
+            version: Source version; when given it decides freshness instead of the TTL
+        """
+        snapshot = self.snapshots.get(key)
+        if self._fresh(snapshot, version):
+            self.counters["hits"] += 1
+            return snapshot
+
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            snapshot = self.snapshots.get(key)
+            if self._fresh(snapshot, version):
+                self.counters["hits"] += 1
+                return snapshot
+            snapshot = TickerSnapshot.from_rows(load(), version=version)
+            self.snapshots[key] = snapshot
+            self.counters["loads"] += 1
+            return snapshot
+
+    def invalidate(self, key: Hashable = None) -> None:
+        with self._lock:
+            if key is None:
+                self.snapshots.clear()
+            else:
+                self.snapshots.pop(key, None)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_ticker_cache() -> TickerSnapshotCache:
+    """
+    Get the process-wide ticker snapshot cache shared by every session.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = TickerSnapshotCache()
+    return _default_cache
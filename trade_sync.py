@@ -0,0 +1,224 @@
+# trade_sync.py
+import math
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+def trade_key(trade: Dict) -> tuple:
+    """
+    Identity of a CoinDCX trade. Public trades carry no id, so two trades
+    are the same when time, price, quantity and side all match.
+    """
+    return (trade["T"], trade["p"], trade["q"], trade.get("m"))
+
+
+class TradeCursor:
+    """
+    Sync position for one market: the newest trade time seen, the trades
+    seen at exactly that millisecond, and an estimate of the trade rate
+    used to size the next request.
+    """
+
+    def __init__(self):
+        self.last_ms = -1
+        self.seen = Counter()      # trade_key -> copies seen at last_ms
+        self.rate = 0.0            # new trades per second (EWMA)
+        self.polled_at = None      # monotonic time of the last poll
+        self.gaps = 0
+
+    def merge(self, trades: Iterable[Dict]) -> List[Dict]:
+        """
+        Advance the cursor over a fetched page and return only the trades
+        not seen before, oldest first.
+        """
+        trades = sorted(trades, key=lambda t: t["T"])
+        page = Counter()
+        new = []
+        for trade in trades:
+            ts = trade["T"]
+            if ts < self.last_ms:
+                continue
+            if ts > self.last_ms:
+                self.last_ms, self.seen, page = ts, Counter(), Counter()
+            key = trade_key(trade)
+            page[key] += 1
+            # Identical trades in the same millisecond are counted, not collapsed
+            if page[key] > self.seen[key]:
+                self.seen[key] = page[key]
+                new.append(trade)
+        return new
+
+    def observe(self, new_trades: int, now: float) -> None:
+        """
+        Update the trade rate estimate after a poll that found `new_trades`.
+        """
+        if self.polled_at is not None:
+            elapsed = max(now - self.polled_at, 1e-3)
+            sample = new_trades / elapsed
+            self.rate = sample if self.rate == 0.0 else 0.7 * self.rate + 0.3 * sample
+        self.polled_at = now
+
+
+class TradeSync:
+    """
+    Incremental trade history sync across many markets.
+
+    The public trade history endpoint only returns the latest N trades and
+    has no "since" parameter, so each market keeps a TradeCursor: fetched
+    pages are cut at the cursor, overlaps dropped, and only new trades are
+    handed to subscribers (candle builders, the tick store, ...). The page
+    size follows the observed trade rate, so a quiet market costs a request
+    for a handful of trades rather than the whole window. A page made up
+    entirely of new trades means trades may have been missed; that is
+    counted as a gap and the next page is twice as large.
+    """
+
+    def __init__(self, fetch: Callable[[str, int], List[Dict]], min_limit: int = 10, max_limit: int = 500,
+                 initial_limit: int = 100, headroom: float = 2.0, max_workers: int = 8):
+        """
+        Args:
+            fetch: fetch(market, limit) returning the latest trades ({"p", "q", "T", "m"})
+            min_limit: Smallest page requested for a market
+            max_limit: Largest page requested (the API allows up to 5000)
+            initial_limit: Page size for a market's first poll
+            headroom: Multiplier over the expected number of new trades
+            max_workers: Markets polled at the same time by poll_many
+        """
+        self.fetch = fetch
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.initial_limit = initial_limit
+        self.headroom = headroom
+        self.max_workers = max_workers
+        self.cursors = {}  # market -> TradeCursor
+        self.limits = {}   # market -> limit of the next request
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "fetched": 0, "new": 0, "gaps": 0}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback: Callable[[str, List[Dict]], None]) -> None:
+        """
+        Register callback(market, trades) for every batch of new trades, oldest first.
+        """
+        self._subscribers.append(callback)
+
+    def next_limit(self, market: str) -> int:
+        """
+        Page size for the next request of a market.
+        """
+        with self._lock:
+            return self.limits.get(market, self.initial_limit)
+
+    def ingest(self, market: str, trades: List[Dict], limit: Optional[int] = None) -> List[Dict]:
+        """
+        Merge a fetched page into a market's cursor and notify subscribers.
+
+        Args:
+            market: Market identifier (e.g., "BTCINR")
+            trades: Latest trades as returned by the API
+            limit: Page size that was requested (for gap detection)
+
+        Returns:
+            The trades not seen before, oldest first
+        """
+        now = time.monotonic()
+        with self._lock:
+            cursor = self.cursors.get(market)
+            first = cursor is None
+            if first:
+                cursor = self.cursors[market] = TradeCursor()
+            elapsed = now - cursor.polled_at if cursor.polled_at is not None else 0.0
+            new = cursor.merge(trades)
+            cursor.observe(len(new), now)
+
+            gap = not first and limit is not None and len(trades) >= limit and len(new) == len(trades)
+            if gap:
+                cursor.gaps += 1
+                self._counts["gaps"] += 1
+                next_limit = limit * 2
+            else:
+                next_limit = math.ceil(cursor.rate * elapsed * self.headroom)
+            self.limits[market] = max(self.min_limit, min(self.max_limit, next_limit))
+            self._counts["fetched"] += len(trades)
+            self._counts["new"] += len(new)
+
+        if new:
+            for callback in list(self._subscribers):
+                try:
+                    callback(market, new)
+                except Exception as e:
+                    print(f"[ERROR] Trade subscriber failed for {market}: {e}")
+        return new
+
+    def poll(self, market: str) -> List[Dict]:
+        """
+        Fetch and merge the latest trades of one market.
+
+        Returns:
+            New trades, oldest first
+        """
+        limit = self.next_limit(market)
+        with self._lock:
+            self._counts["requests"] += 1
+        trades = self.fetch(market, limit) or []
+        return self.ingest(market, trades, limit)
+
+    def poll_many(self, markets: Iterable[str]) -> Dict[str, List[Dict]]:
+        """
+        Poll several markets concurrently. A market whose request fails is
+        reported and left out; its cursor is unchanged.
+
+        Returns:
+            Dict of market -> new trades
+        """
+        markets = list(markets)
+
+        def poll(market):
+            try:
+                return market, self.poll(market)
+            except Exception as e:
+                print(f"[ERROR] Trade sync failed for {market}: {e}")
+                return market, None
+
+        if len(markets) <= 1 or self.max_workers <= 1:
+            results = [poll(market) for market in markets]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(markets))) as pool:
+                results = list(pool.map(poll, markets))
+        return {market: new for market, new in results if new is not None}
+
+    def start(self, markets: Iterable[str], interval: float = 5.0) -> "TradeSync":
+        """
+        Poll `markets` every `interval` seconds on a background thread.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            markets = list(markets)
+            self._stop.clear()
+
+            def run():
+                while not self._stop.is_set():
+                    started = time.monotonic()
+                    self.poll_many(markets)
+                    self._stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+            self._thread = threading.Thread(target=run, name="trade-sync", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        """
+        Requests made, trades fetched vs new, detected gaps and tracked markets.
+        """
+        with self._lock:
+            return dict(self._counts, markets=len(self.cursors))
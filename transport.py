@@ -0,0 +1,120 @@
+# transport.py
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class HttpTransport:
+    """
+    Pooled keep-alive HTTP transport for the CoinDCX services.
+
+    Wraps a single requests.Session so every call reuses open TCP/TLS
+    connections instead of paying a fresh handshake per request.
+    Idempotent GETs are retried with exponential backoff; POSTs are only
+    retried when the connection could not be established (nothing was sent).
+    429 is not retried here: retrying inside the request's scheduler slot
+    would bypass the rate limiter, so CoinDCXApiService backs the group off
+    and re-acquires a slot instead.
+    """
+
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    def __init__(
+        self,
+        pool_size: int = 20,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff_factor: float = 0.3,
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            pool_size: Maximum number of kept-alive connections per host
+            connect_timeout: Seconds to wait for a connection to be established
+            read_timeout: Seconds to wait for the server to send a response
+            max_retries: Retry attempts for idempotent GET requests
+            backoff_factor: Backoff multiplier between retries (0.3 -> 0.3s, 0.6s, 1.2s ...)
+        """
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.session = self._build_session()
+
+    def _build_session(self) -> requests.Session:
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    ) -> requests.Response:
+        """
+        Send a GET request over the pooled session.
+        """
+        return self.session.get(url, params=params, headers=headers, timeout=timeout or self.timeout)
+
+    def post(
+        self,
+        url: str,
+        data=None,
+        json: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        timeout: Optional[Union[float, Tuple[float, float]]] = None,
+    ) -> requests.Response:
+        """
+        Send a POST request over the pooled session.
+        """
+        return self.session.post(url, data=data, json=json, headers=headers, timeout=timeout or self.timeout)
+
+    def close(self) -> None:
+        """
+        Close all pooled connections.
+        """
+        self.session.close()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> HttpTransport:
+    """
+    Get the process-wide transport shared by services that were not given one.
+
+    Returns:
+        The shared HttpTransport instance
+    """
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = HttpTransport()
+    return _default_transport